@@ -0,0 +1,231 @@
+"""Admission control for workflow runs.
+
+At most AGENT_MAX_CONCURRENT workflows run at once, and at most
+AGENT_MAX_PER_PROJECT of them for one project. Requests beyond that wait in
+a weighted fair queue: every (project, kind) flow gets virtual finish tags
+spaced 1 / weight apart, and the waiting run with the smallest tag goes
+next (self-clocked fair queueing). A project that floods the queue only
+pushes its own runs back, and interactive chat (higher weight) gets ahead of
+background full workflow runs without starving them.
+
+A full queue is rejected up front instead of timing out later: 429 when the
+project already has AGENT_MAX_QUEUED_PER_PROJECT runs waiting, 503 when the
+whole queue is full or a run waited longer than AGENT_QUEUE_TIMEOUT_SECONDS.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import config
+from app.telemetry import ADMISSION_QUEUED, ADMISSION_REJECTED, ADMISSION_RUNNING, ADMISSION_WAIT
+
+INTERACTIVE = "interactive"
+WORKFLOW = "workflow"
+
+
+class AdmissionRejected(Exception):
+    """A run was not admitted; carries the HTTP status and a retry hint"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int, queued: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+        self.queued = queued
+
+
+class Admission:
+    """How a run got in: its queue position on arrival (0 = ran at once)
+    and how long it waited"""
+
+    def __init__(self, position: int, waited_ms: float):
+        self.position = position
+        self.waited_ms = waited_ms
+
+
+class _Ticket:
+    __slots__ = ("project_id", "kind", "finish", "seq", "future")
+
+    def __init__(self, project_id: str, kind: str, finish: float, seq: int, future: asyncio.Future):
+        self.project_id = project_id
+        self.kind = kind
+        self.finish = finish
+        self.seq = seq
+        self.future = future
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_per_project: int,
+        max_queued: int,
+        max_queued_per_project: int,
+        queue_timeout: float,
+        weights: Dict[str, float],
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_project = max_per_project
+        self.max_queued = max_queued
+        self.max_queued_per_project = max_queued_per_project
+        self.queue_timeout = queue_timeout
+        self.weights = weights
+        self._waiting: List[_Ticket] = []
+        self._running: Dict[str, int] = {}
+        self._running_total = 0
+        # Last finish tag per (project, kind) flow, and the tag of the last
+        # admitted run as virtual time
+        self._finish: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+        # Moving average of run time, for Retry-After hints
+        self._avg_run_seconds = 10.0
+        self._executor = ThreadPoolExecutor(max_concurrent, thread_name_prefix="workflow")
+
+    async def run(
+        self, project_id: str, kind: str, fn: Callable[..., Any], *args: Any
+    ) -> Tuple[Any, Admission]:
+        """Wait for admission, then run `fn(*args)` in a worker thread"""
+        started = time.perf_counter()
+        ticket = self._enqueue(project_id, kind)
+        position = self.position(ticket)
+        await self._admitted(ticket)
+        waited = time.perf_counter() - started
+        ADMISSION_WAIT.labels(kind).observe(waited)
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(self._executor, lambda: context.run(fn, *args))
+        run_started = time.perf_counter()
+
+        def finished(_: asyncio.Future) -> None:
+            elapsed = time.perf_counter() - run_started
+            self._avg_run_seconds += 0.2 * (elapsed - self._avg_run_seconds)
+            self._release(ticket)
+
+        # The slot is held until the thread is done, even if the request
+        # that started it has gone away
+        future.add_done_callback(finished)
+        result = await asyncio.shield(future)
+        return result, Admission(position, waited * 1000)
+
+    def position(self, ticket: _Ticket) -> int:
+        """1-based position among waiting runs; 0 once admitted"""
+        if ticket not in self._waiting:
+            return 0
+        key = (ticket.finish, ticket.seq)
+        return 1 + sum(1 for other in self._waiting if (other.finish, other.seq) < key)
+
+    def status(self, project_id: Optional[str] = None) -> Dict[str, Any]:
+        """Queue state, optionally with one project's waiting runs"""
+        result: Dict[str, Any] = {
+            "running": self._running_total,
+            "waiting": len(self._waiting),
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+        }
+        if project_id is not None:
+            result["project"] = {
+                "running": self._running.get(project_id, 0),
+                "waiting": [
+                    {"kind": ticket.kind, "position": self.position(ticket)}
+                    for ticket in self._waiting
+                    if ticket.project_id == project_id
+                ],
+            }
+        return result
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enqueue(self, project_id: str, kind: str) -> _Ticket:
+        queued = sum(1 for ticket in self._waiting if ticket.project_id == project_id)
+        if queued >= self.max_queued_per_project:
+            raise self._reject(kind, "project", 429, "Too many agent requests for this project")
+        if len(self._waiting) >= self.max_queued:
+            raise self._reject(kind, "queue_full", 503, "Agent queue is full")
+
+        flow = (project_id, kind)
+        finish = max(self._virtual_time, self._finish.get(flow, 0.0)) + 1 / self.weights[kind]
+        self._finish[flow] = finish
+        ticket = _Ticket(
+            project_id, kind, finish, next(self._seq), asyncio.get_running_loop().create_future()
+        )
+        self._waiting.append(ticket)
+        ADMISSION_QUEUED.labels(kind).inc()
+        self._dispatch()
+        return ticket
+
+    async def _admitted(self, ticket: _Ticket) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(ticket.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if ticket.future.done():
+                return
+            self._remove(ticket)
+            raise self._reject(ticket.kind, "timeout", 503, "Timed out waiting for an agent slot")
+        except asyncio.CancelledError:
+            if ticket.future.done():
+                self._release(ticket)
+            else:
+                self._remove(ticket)
+            raise
+
+    def _dispatch(self) -> None:
+        while self._running_total < self.max_concurrent and self._waiting:
+            eligible = [
+                ticket
+                for ticket in self._waiting
+                if self._running.get(ticket.project_id, 0) < self.max_per_project
+            ]
+            if not eligible:
+                break
+            ticket = min(eligible, key=lambda ticket: (ticket.finish, ticket.seq))
+            self._waiting.remove(ticket)
+            ADMISSION_QUEUED.labels(ticket.kind).dec()
+            self._virtual_time = ticket.finish
+            self._running[ticket.project_id] = self._running.get(ticket.project_id, 0) + 1
+            self._running_total += 1
+            ADMISSION_RUNNING.inc()
+            ticket.future.set_result(None)
+
+        # Flows whose last tag the virtual time has passed start over from it
+        for flow in [flow for flow, finish in self._finish.items() if finish <= self._virtual_time]:
+            del self._finish[flow]
+
+    def _release(self, ticket: _Ticket) -> None:
+        count = self._running[ticket.project_id] - 1
+        if count:
+            self._running[ticket.project_id] = count
+        else:
+            del self._running[ticket.project_id]
+        self._running_total -= 1
+        ADMISSION_RUNNING.dec()
+        self._dispatch()
+
+    def _remove(self, ticket: _Ticket) -> None:
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            ADMISSION_QUEUED.labels(ticket.kind).dec()
+
+    def _reject(self, kind: str, reason: str, status_code: int, detail: str) -> AdmissionRejected:
+        ADMISSION_REJECTED.labels(kind, reason).inc()
+        queued = len(self._waiting)
+        retry_after = math.ceil(self._avg_run_seconds * (queued + 1) / self.max_concurrent)
+        return AdmissionRejected(status_code, detail, max(1, retry_after), queued)
+
+
+# Singleton instance
+admission = AdmissionController(
+    max_concurrent=config.AGENT_MAX_CONCURRENT,
+    max_per_project=config.AGENT_MAX_PER_PROJECT,
+    max_queued=config.AGENT_MAX_QUEUED,
+    max_queued_per_project=config.AGENT_MAX_QUEUED_PER_PROJECT,
+    queue_timeout=config.AGENT_QUEUE_TIMEOUT_SECONDS,
+    weights={INTERACTIVE: config.AGENT_INTERACTIVE_WEIGHT, WORKFLOW: config.AGENT_WORKFLOW_WEIGHT},
+)
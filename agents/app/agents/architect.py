@@ -1,5 +1,5 @@
 from app.agents.base import BaseAgent
-from app.graph.state import AgentState, TaskResult, NodeOperation
+from app.graph.state import AgentState, AgentStateUpdate, TaskResult, NodeOperation
 from app.prompts.templates import ARCHITECT_SYSTEM_PROMPT
 import json
 import re
@@ -21,30 +21,32 @@ class ArchitectAgent(BaseAgent):
     def get_system_prompt(self) -> str:
         return ARCHITECT_SYSTEM_PROMPT
 
-    def _apply_response(self, state: AgentState, response: str) -> AgentState:
-        """Parse Architect response and update state"""
+    def _apply_response(
+        self, state: AgentState, response: str
+    ) -> AgentStateUpdate:
+        """Parse Architect response into a state update"""
 
         # Add response as message
-        state = self._add_message(state, response)
+        update = self._add_message({}, response)
 
         # Update current agent
-        state["current_agent"] = "architect"
+        update["current_agent"] = "architect"
 
         # Add task result
         task_result = TaskResult(
             agent="architect", status="completed", output=response[:500], artifacts=[]
         )
-        state["task_results"] = state.get("task_results", []) + [task_result]
+        update["task_results"] = [task_result]
 
         # Parse node operations from response
         node_ops = self._parse_node_operations(response)
         if node_ops:
-            state["node_operations"] = state.get("node_operations", []) + node_ops
+            update["node_operations"] = node_ops
 
         # Move to next stage (coding)
-        state["workflow_stage"] = "coding"
+        update["workflow_stage"] = "coding"
 
-        return state
+        return update
 
     def _parse_node_operations(self, response: str) -> list:
         """Parse node operations from architect response"""
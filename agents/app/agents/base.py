@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 
-from app.graph.state import AgentState, Message
-from app.config import get_llm
+from app.graph.state import AgentState, AgentStateUpdate, Message
+from app.agents.context import format_project_context, format_retrieved
+from app.agents.summary import format_summary
+from app.config import config, get_llm
+from app.llm.gateway import llm_gateway
+from app.telemetry import AGENT_PARSE_OUTCOMES
 
 
 class BaseAgent(ABC):
@@ -12,23 +15,42 @@ class BaseAgent(ABC):
     def __init__(self, name: str, role: str):
         self.name = name
         self.role = role
-        self.llm = get_llm()
+        self._llm = None
+
+    @property
+    def llm(self):
+        """LLM client, created on first use"""
+        if self._llm is None:
+            self._llm = get_llm(self.name)
+        return self._llm
 
     @abstractmethod
     def get_system_prompt(self) -> str:
         """Get the system prompt for this agent"""
         pass
 
-    def process(self, state: AgentState) -> AgentState:
-        """Process the current state and return updated state"""
+    def process(self, state: AgentState) -> AgentStateUpdate:
+        """Process the current state and return the partial state update"""
         # Build messages for LLM
         messages = self._build_messages(state)
 
         # Get response from LLM
-        response = self.llm.invoke(messages)
+        response = self._invoke_llm(messages)
 
         # Parse and apply response
-        return self._apply_response(state, response.content)
+        try:
+            update = self._apply_response(state, response.content)
+        except Exception:
+            AGENT_PARSE_OUTCOMES.labels(self.name, "error").inc()
+            raise
+        AGENT_PARSE_OUTCOMES.labels(
+            self.name, update.get("workflow_stage", "unchanged")
+        ).inc()
+        return update
+
+    def _invoke_llm(self, messages: list) -> AIMessage:
+        """Call the LLM through the shared gateway (rate limits and retries)"""
+        return llm_gateway.invoke(self.llm, messages, self.name)
 
     def _build_messages(self, state: AgentState) -> list:
         """Build message list for LLM from state"""
@@ -55,6 +77,31 @@ class BaseAgent(ABC):
         if state.get("user_request"):
             parts.append(f"사용자 요청: {state['user_request']}")
 
+        if state.get("project_context"):
+            # Earlier turns of the project reach the agents only as the
+            # rolling summary, never as the raw transcript
+            summary = format_summary(
+                state["project_context"].get("summary") or {},
+                config.AGENT_SUMMARY_MAX_TOKENS,
+            )
+            if summary:
+                parts.append(f"\n대화 요약:\n{summary}")
+
+            project = format_project_context(
+                state["project_context"],
+                state.get("user_request", ""),
+                config.AGENT_CONTEXT_MAX_TOKENS,
+            )
+            if project:
+                parts.append(f"\n{project}")
+
+            retrieved = format_retrieved(
+                state["project_context"].get("retrieved") or [],
+                config.AGENT_RETRIEVAL_MAX_TOKENS,
+            )
+            if retrieved:
+                parts.append(f"\n관련 기록:\n{retrieved}")
+
         if state.get("task_results"):
             parts.append("\n이전 작업 결과:")
             for result in state["task_results"]:
@@ -65,12 +112,15 @@ class BaseAgent(ABC):
         return "\n".join(parts)
 
     @abstractmethod
-    def _apply_response(self, state: AgentState, response: str) -> AgentState:
-        """Apply LLM response to state"""
+    def _apply_response(self, state: AgentState, response: str) -> AgentStateUpdate:
+        """Turn the LLM response into a partial state update.
+
+        Only new items go into list fields; the state reducers append them.
+        """
         pass
 
-    def _add_message(self, state: AgentState, content: str) -> AgentState:
-        """Add a message from this agent to state"""
+    def _add_message(self, update: AgentStateUpdate, content: str) -> AgentStateUpdate:
+        """Add a message from this agent to the update"""
         new_message = Message(role="assistant", content=content, agent_type=self.name)
-        state["messages"] = state.get("messages", []) + [new_message]
-        return state
+        update["messages"] = update.get("messages", []) + [new_message]
+        return update
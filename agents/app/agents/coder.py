@@ -1,5 +1,5 @@
 from app.agents.base import BaseAgent
-from app.graph.state import AgentState, TaskResult
+from app.graph.state import AgentState, AgentStateUpdate, TaskResult
 from app.prompts.templates import CODER_SYSTEM_PROMPT
 
 
@@ -18,14 +18,16 @@ class CoderAgent(BaseAgent):
     def get_system_prompt(self) -> str:
         return CODER_SYSTEM_PROMPT
 
-    def _apply_response(self, state: AgentState, response: str) -> AgentState:
-        """Parse Coder response and update state"""
+    def _apply_response(
+        self, state: AgentState, response: str
+    ) -> AgentStateUpdate:
+        """Parse Coder response into a state update"""
 
         # Add response as message
-        state = self._add_message(state, response)
+        update = self._add_message({}, response)
 
         # Update current agent
-        state["current_agent"] = "coder"
+        update["current_agent"] = "coder"
 
         # Extract code artifacts from response
         code_artifacts = self._extract_code_blocks(response)
@@ -37,12 +39,12 @@ class CoderAgent(BaseAgent):
             output=response[:500],
             artifacts=code_artifacts,
         )
-        state["task_results"] = state.get("task_results", []) + [task_result]
+        update["task_results"] = [task_result]
 
         # Move to QA stage
-        state["workflow_stage"] = "qa"
+        update["workflow_stage"] = "qa"
 
-        return state
+        return update
 
     def _extract_code_blocks(self, response: str) -> list:
         """Extract code blocks from response"""
@@ -0,0 +1,126 @@
+"""Prompt context from the project summary the backend sends with a run.
+
+The summary also carries "retrieved": the project's nodes and earlier chat
+messages that best match the request, from the backend's retrieval index.
+
+The summary (see the backend's project_context service) already holds only
+the most important nodes of the canvas. Agents get a slice of it ranked by
+relevance to the request: risk hotspots, then nodes whose labels share
+character bigrams with the request, then the rest in summary order (most
+important first), and the edges between them, cut off at
+AGENT_CONTEXT_MAX_TOKENS.
+"""
+
+from typing import Any, Dict, List, Set
+
+from app.llm.tokens import estimate_tokens
+
+
+def bigrams(text: str) -> Set[str]:
+    """Character bigrams of the words in `text`; matches Korean words across
+    particles (e.g. "로그인을" and "로그인")"""
+    grams: Set[str] = set()
+    for word in text.lower().split():
+        if len(word) == 1:
+            grams.add(word)
+        grams.update(word[i : i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def relevance(label: str, query: Set[str]) -> float:
+    """Share of the label's bigrams that occur in the query"""
+    grams = bigrams(label)
+    return len(grams & query) / len(grams) if grams else 0.0
+
+
+def _describe(node: Dict[str, Any]) -> str:
+    text = f"{node.get('label', '')} [{node.get('type', '')}]"
+    if "risk" in node:
+        text += f" 리스크 {node['risk']}"
+    return text
+
+
+def format_project_context(project_context: Dict[str, Any], request: str, max_tokens: int) -> str:
+    """Relevance-ranked, token-bounded view of the project summary"""
+    nodes: List[Dict[str, Any]] = project_context.get("nodes") or []
+    if not project_context.get("node_count"):
+        return ""
+
+    type_counts = ", ".join(
+        f"{name or '기타'} {count}" for name, count in (project_context.get("type_counts") or {}).items()
+    )
+    lines = [
+        f"프로젝트 현황: 노드 {project_context['node_count']}개 ({type_counts}), "
+        f"연결 {project_context.get('edge_count', 0)}개"
+    ]
+    hotspots = set(project_context.get("hotspots") or [])
+    if hotspots:
+        lines.append(
+            "리스크가 높은 노드: "
+            + ", ".join(_describe(nodes[i]) for i in sorted(hotspots) if i < len(nodes))
+        )
+    budget = max_tokens - sum(estimate_tokens(line) for line in lines)
+
+    # Nodes take up to three quarters of the budget, edges between them the
+    # rest; hotspots are already listed above
+    query = bigrams(request)
+    order = sorted(
+        (i for i in range(len(nodes)) if i not in hotspots),
+        key=lambda i: (-relevance(nodes[i].get("label", ""), query), i),
+    )
+    shown: Set[int] = set(hotspots)
+    node_lines: List[str] = []
+    node_budget = budget * 3 // 4
+    for i in order:
+        line = f"- {_describe(nodes[i])}"
+        cost = estimate_tokens(line)
+        if cost > node_budget:
+            break
+        node_budget -= cost
+        budget -= cost
+        shown.add(i)
+        node_lines.append(line)
+    if node_lines:
+        lines.append("관련 노드:")
+        lines.extend(node_lines)
+
+    edge_lines: List[str] = []
+    for source, target in project_context.get("edges") or []:
+        if source in shown and target in shown:
+            line = f"- {nodes[source].get('label', '')} -> {nodes[target].get('label', '')}"
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            budget -= cost
+            edge_lines.append(line)
+    if edge_lines:
+        lines.append("연결:")
+        lines.extend(edge_lines)
+
+    if project_context.get("truncated") or len(shown) < len(nodes):
+        lines.append("(일부 노드만 표시)")
+    return "\n".join(lines)
+
+
+ROLE_NAMES = {"user": "사용자", "assistant": "에이전트", "system": "시스템"}
+
+
+def format_retrieved(retrieved: List[Dict[str, Any]], max_tokens: int) -> str:
+    """Retrieved nodes and earlier chat messages, best match first, cut off
+    at `max_tokens`"""
+    lines: List[str] = []
+    budget = max_tokens
+    for hit in retrieved:
+        text = " ".join(str(hit.get("text", "")).split())
+        if hit.get("kind") == "node":
+            line = f"- [노드] {hit.get('label', '')} ({hit.get('type', '')})"
+            if text != hit.get("label"):
+                line += f": {text}"
+        else:
+            line = f"- [{ROLE_NAMES.get(hit.get('role'), '대화')}] {text}"
+        cost = estimate_tokens(line)
+        if cost > budget:
+            break
+        budget -= cost
+        lines.append(line)
+    return "\n".join(lines)
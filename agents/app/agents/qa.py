@@ -1,5 +1,5 @@
 from app.agents.base import BaseAgent
-from app.graph.state import AgentState, TaskResult
+from app.graph.state import AgentState, AgentStateUpdate, TaskResult
 from app.prompts.templates import QA_SYSTEM_PROMPT
 
 
@@ -19,14 +19,16 @@ class QAAgent(BaseAgent):
     def get_system_prompt(self) -> str:
         return QA_SYSTEM_PROMPT
 
-    def _apply_response(self, state: AgentState, response: str) -> AgentState:
-        """Parse QA response and update state"""
+    def _apply_response(
+        self, state: AgentState, response: str
+    ) -> AgentStateUpdate:
+        """Parse QA response into a state update"""
 
         # Add response as message
-        state = self._add_message(state, response)
+        update = self._add_message({}, response)
 
         # Update current agent
-        state["current_agent"] = "qa"
+        update["current_agent"] = "qa"
 
         # Analyze QA results
         has_issues = self._check_for_issues(response)
@@ -38,17 +40,17 @@ class QAAgent(BaseAgent):
             output=response[:500],
             artifacts=self._extract_issues(response),
         )
-        state["task_results"] = state.get("task_results", []) + [task_result]
+        update["task_results"] = [task_result]
 
         # Determine next stage based on QA results
         if has_issues:
             # Go back to coding for fixes
-            state["workflow_stage"] = "coding"
+            update["workflow_stage"] = "coding"
         else:
             # QA passed, complete the workflow
-            state["workflow_stage"] = "complete"
+            update["workflow_stage"] = "complete"
 
-        return state
+        return update
 
     def _check_for_issues(self, response: str) -> bool:
         """Check if QA found any issues"""
@@ -1,5 +1,5 @@
 from app.agents.base import BaseAgent
-from app.graph.state import AgentState, Message, TaskResult
+from app.graph.state import AgentState, AgentStateUpdate
 from app.prompts.templates import SISYPHUS_SYSTEM_PROMPT
 import json
 import re
@@ -22,32 +22,34 @@ class SisyphusAgent(BaseAgent):
     def get_system_prompt(self) -> str:
         return SISYPHUS_SYSTEM_PROMPT
 
-    def _apply_response(self, state: AgentState, response: str) -> AgentState:
-        """Parse Sisyphus response and update state"""
+    def _apply_response(
+        self, state: AgentState, response: str
+    ) -> AgentStateUpdate:
+        """Parse Sisyphus response into a state update"""
 
         # Add response as message
-        state = self._add_message(state, response)
+        update = self._add_message({}, response)
 
         # Parse the response to determine next action
         next_stage = self._parse_next_stage(response)
 
         # Update workflow stage
         if next_stage:
-            state["workflow_stage"] = next_stage
+            update["workflow_stage"] = next_stage
 
         # Update current agent
-        state["current_agent"] = "sisyphus"
+        update["current_agent"] = "sisyphus"
 
         # If stage is complete, set final response
         if next_stage == "complete":
-            state["final_response"] = response
+            update["final_response"] = response
 
         # Parse any task assignments
         tasks = self._parse_tasks(response)
         if tasks:
-            state["task_queue"] = state.get("task_queue", []) + tasks
+            update["task_queue"] = tasks
 
-        return state
+        return update
 
     def _parse_next_stage(self, response: str) -> str:
         """Parse the response to determine next workflow stage"""
@@ -0,0 +1,126 @@
+"""Rolling per-project conversation summary.
+
+After every finished workflow the previous summary (sent by the backend in
+project_context["summary"]) is folded together with the run's outcome into
+a new one, which the backend stores and sends with the next run. Agents see
+this summary instead of the project's earlier transcript, so prompts stay
+the same size however long the project's history gets.
+
+The update is rule-based, with no extra LLM call: it records the request
+and the first line of the final answer as a decision, the nodes the run
+created, updated or deleted, and the run's open issues (failed tasks, runs
+that stopped before "complete"). Each list keeps only its newest
+AGENT_SUMMARY_MAX_* entries; a later run of the same request that completes
+cleanly resolves that request's open issues.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from app.config import config
+from app.graph.state import AgentState
+from app.llm.tokens import estimate_tokens
+
+MAX_REQUEST_CHARS = 120
+MAX_OUTCOME_CHARS = 160
+MAX_ISSUE_CHARS = 160
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _first_line(text: str) -> str:
+    for line in text.splitlines():
+        line = line.strip(" #*-")
+        if line:
+            return line
+    return ""
+
+
+def update_summary(previous: Optional[Dict[str, Any]], state: AgentState) -> Dict[str, Any]:
+    """Fold one finished run into the previous summary (not modified)"""
+    previous = previous or {}
+    request = _clip(state.get("user_request", ""), MAX_REQUEST_CHARS)
+    stage = state.get("workflow_stage", "idle")
+    answers = [msg for msg in state.get("messages", []) if msg.role == "assistant"]
+    outcome = state.get("final_response") or (answers[-1].content if answers else "")
+
+    decisions: List[Dict[str, Any]] = list(previous.get("decisions") or [])
+    decisions.append(
+        {
+            "request": request,
+            "outcome": _clip(_first_line(outcome), MAX_OUTCOME_CHARS),
+            "stage": stage,
+            "risk_score": state.get("risk_score", 0),
+        }
+    )
+
+    # Nodes by label, most recently touched last
+    nodes: Dict[str, Dict[str, Any]] = {
+        node["label"]: node for node in previous.get("nodes") or []
+    }
+    for op in state.get("node_operations", []):
+        if not op.label:
+            continue
+        nodes.pop(op.label, None)
+        if op.operation != "delete":
+            nodes[op.label] = {"label": op.label, "type": op.node_type or "", "op": op.operation}
+
+    failures = [
+        {"request": request, "text": _clip(f"{result.agent}: {result.output or '실패'}", MAX_ISSUE_CHARS)}
+        for result in state.get("task_results", [])
+        if result.status == "failed"
+    ]
+    issues: List[Dict[str, Any]] = list(previous.get("open_issues") or [])
+    if stage == "complete" and not failures:
+        issues = [issue for issue in issues if issue.get("request") != request]
+    issues.extend(failures)
+    if stage != "complete":
+        issues.append({"request": request, "text": f"{stage} 단계에서 중단됨: {request}"})
+
+    return {
+        "runs": previous.get("runs", 0) + 1,
+        "decisions": decisions[-config.AGENT_SUMMARY_MAX_DECISIONS :],
+        "nodes": list(nodes.values())[-config.AGENT_SUMMARY_MAX_NODES :],
+        "open_issues": issues[-config.AGENT_SUMMARY_MAX_ISSUES :],
+    }
+
+
+def format_summary(summary: Dict[str, Any], max_tokens: int) -> str:
+    """Token-bounded view of the summary: open issues first, then the newest
+    decisions and nodes"""
+    if not summary.get("runs"):
+        return ""
+    budget = max_tokens
+    sections: List[List[str]] = []
+    for header, lines in (
+        ("미해결 이슈:", [f"- {issue['text']}" for issue in reversed(summary.get("open_issues") or [])]),
+        (
+            "결정 사항 (최근 순):",
+            [
+                f"- {decision['request']} → {decision['outcome'] or decision['stage']}"
+                for decision in reversed(summary.get("decisions") or [])
+            ],
+        ),
+        (
+            "생성·변경된 노드:",
+            [f"- {node['label']} [{node['type']}]" for node in reversed(summary.get("nodes") or [])],
+        ),
+    ):
+        shown: List[str] = []
+        for line in lines:
+            cost = estimate_tokens(line)
+            if cost > budget:
+                break
+            budget -= cost
+            shown.append(line)
+        if shown:
+            sections.append([header, *shown])
+
+    if not sections:
+        return ""
+    lines = [f"지금까지 {summary['runs']}회 작업"]
+    for section in sections:
+        lines.extend(section)
+    return "\n".join(lines)
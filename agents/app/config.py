@@ -1,6 +1,9 @@
 import os
+from typing import Optional, TYPE_CHECKING
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
+
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
 
 load_dotenv()
 
@@ -10,14 +13,73 @@ class Config:
     MODEL_NAME: str = "llama-3.3-70b-versatile"
     TEMPERATURE: float = 0.7
 
+    # Retries are done by the LLM gateway so they show up in metrics:
+    # failed calls up to LLM_MAX_RETRIES times, 429s up to
+    # LLM_MAX_RATE_LIMIT_RETRIES times
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_MAX_RATE_LIMIT_RETRIES: int = int(os.getenv("LLM_MAX_RATE_LIMIT_RETRIES", "5"))
+    LLM_RETRY_BACKOFF: float = float(os.getenv("LLM_RETRY_BACKOFF", "1.0"))
+
+    # Admission control: concurrent workflow runs overall and per project,
+    # waiting runs overall (503 beyond) and per project (429 beyond), max
+    # wait for a slot (503), and fair-queue weights of interactive chat
+    # versus background full workflow runs
+    AGENT_MAX_CONCURRENT: int = int(os.getenv("AGENT_MAX_CONCURRENT", "8"))
+    AGENT_MAX_PER_PROJECT: int = int(os.getenv("AGENT_MAX_PER_PROJECT", "2"))
+    AGENT_MAX_QUEUED: int = int(os.getenv("AGENT_MAX_QUEUED", "64"))
+    AGENT_MAX_QUEUED_PER_PROJECT: int = int(os.getenv("AGENT_MAX_QUEUED_PER_PROJECT", "8"))
+    AGENT_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("AGENT_QUEUE_TIMEOUT_SECONDS", "30"))
+    AGENT_INTERACTIVE_WEIGHT: float = float(os.getenv("AGENT_INTERACTIVE_WEIGHT", "4"))
+    AGENT_WORKFLOW_WEIGHT: float = float(os.getenv("AGENT_WORKFLOW_WEIGHT", "1"))
+
+    # Estimated tokens of project summary and of retrieved nodes / earlier
+    # messages added to each agent prompt
+    AGENT_CONTEXT_MAX_TOKENS: int = int(os.getenv("AGENT_CONTEXT_MAX_TOKENS", "800"))
+    AGENT_RETRIEVAL_MAX_TOKENS: int = int(os.getenv("AGENT_RETRIEVAL_MAX_TOKENS", "600"))
+
+    # Rolling conversation summary: estimated tokens added to each agent
+    # prompt, and how many decisions, nodes and open issues it keeps
+    AGENT_SUMMARY_MAX_TOKENS: int = int(os.getenv("AGENT_SUMMARY_MAX_TOKENS", "500"))
+    AGENT_SUMMARY_MAX_DECISIONS: int = int(os.getenv("AGENT_SUMMARY_MAX_DECISIONS", "10"))
+    AGENT_SUMMARY_MAX_NODES: int = int(os.getenv("AGENT_SUMMARY_MAX_NODES", "30"))
+    AGENT_SUMMARY_MAX_ISSUES: int = int(os.getenv("AGENT_SUMMARY_MAX_ISSUES", "10"))
+
+    # LLM provider: "groq" (default) or "fake" for offline runs and benchmarks
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "groq")
+
+    # Fake LLM settings (only used when LLM_PROVIDER=fake)
+    FAKE_LLM_SCRIPT: str = os.getenv("FAKE_LLM_SCRIPT", "")
+    FAKE_LLM_LATENCY_MS: float = float(os.getenv("FAKE_LLM_LATENCY_MS", "0"))
+    FAKE_LLM_TOKENS_PER_SEC: float = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "0"))
+
+    # LLM quota per model: requests and tokens per minute (0 = unlimited;
+    # the defaults match the Groq quota, the fake provider is unlimited),
+    # max concurrent calls, and the completion size assumed before a call
+    LLM_RPM: int = int(os.getenv("LLM_RPM", "0" if LLM_PROVIDER == "fake" else "30"))
+    LLM_TPM: int = int(os.getenv("LLM_TPM", "0" if LLM_PROVIDER == "fake" else "6000"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_COMPLETION_TOKENS_ESTIMATE: int = int(os.getenv("LLM_COMPLETION_TOKENS_ESTIMATE", "512"))
+
 
 config = Config()
 
 
-def get_llm() -> ChatGroq:
-    """Get the configured LLM instance"""
+def get_llm(agent_name: Optional[str] = None) -> "BaseChatModel":
+    """Get the configured LLM instance.
+
+    Provider packages are imported here rather than at module load so that
+    importing the app stays cheap; see app.graph.workflow.warm_up().
+    """
+    if config.LLM_PROVIDER == "fake":
+        from app.llm.fake import FakeChatModel
+
+        return FakeChatModel.from_config(agent_name or "default")
+
+    from langchain_groq import ChatGroq
+
     return ChatGroq(
         model=config.MODEL_NAME,
         temperature=config.TEMPERATURE,
         groq_api_key=config.GROQ_API_KEY,
+        max_retries=0,
     )
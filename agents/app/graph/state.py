@@ -40,8 +40,8 @@ class AgentState(TypedDict):
     current_agent: str
 
     # Task management
-    task_queue: List[dict]
-    task_results: List[TaskResult]
+    task_queue: Annotated[List[dict], operator.add]
+    task_results: Annotated[List[TaskResult], operator.add]
 
     # Workflow stage
     workflow_stage: Literal["idle", "planning", "design", "coding", "qa", "complete"]
@@ -53,10 +53,27 @@ class AgentState(TypedDict):
     risk_score: int
 
     # Node operations to perform
-    node_operations: List[NodeOperation]
+    node_operations: Annotated[List[NodeOperation], operator.add]
 
     # User's original request
     user_request: str
 
     # Final response to user
     final_response: Optional[str]
+
+
+class AgentStateUpdate(TypedDict, total=False):
+    """Partial state returned by a graph node.
+
+    List fields hold only the items produced by that node; LangGraph merges
+    them into AgentState through the reducers declared above.
+    """
+
+    messages: List[Message]
+    current_agent: str
+    task_queue: List[dict]
+    task_results: List[TaskResult]
+    workflow_stage: Literal["idle", "planning", "design", "coding", "qa", "complete"]
+    risk_score: int
+    node_operations: List[NodeOperation]
+    final_response: Optional[str]
@@ -1,37 +1,67 @@
 from langgraph.graph import StateGraph, END
-from typing import Literal
+from functools import lru_cache
+from typing import Dict, Literal
+import time
 
-from app.graph.state import AgentState, Message, TaskResult
+from app.graph.state import AgentState, AgentStateUpdate
+from app.agents.base import BaseAgent
 from app.agents.sisyphus import SisyphusAgent
 from app.agents.architect import ArchitectAgent
 from app.agents.coder import CoderAgent
 from app.agents.qa import QAAgent
+from app.telemetry import AGENT_LATENCY, LOOP_ITERATIONS, STAGE_TRANSITIONS, span
 
-# Initialize agents
-sisyphus = SisyphusAgent()
-architect = ArchitectAgent()
-coder = CoderAgent()
-qa = QAAgent()
 
+@lru_cache(maxsize=None)
+def get_agents() -> Dict[str, BaseAgent]:
+    """Agent instances, created on first use"""
+    return {
+        "sisyphus": SisyphusAgent(),
+        "architect": ArchitectAgent(),
+        "coder": CoderAgent(),
+        "qa": QAAgent(),
+    }
 
-def sisyphus_node(state: AgentState) -> AgentState:
+
+def _run_agent(agent: BaseAgent, state: AgentState) -> AgentStateUpdate:
+    """Run an agent as a graph node, recording its span and workflow metrics"""
+    from_stage = state.get("workflow_stage", "idle")
+
+    # A second visit within one run means the workflow looped back
+    if any(msg.agent_type == agent.name for msg in state.get("messages", [])):
+        LOOP_ITERATIONS.labels(agent.name).inc()
+
+    with span(f"node.{agent.name}", agent=agent.name, stage=from_stage) as attrs:
+        start = time.perf_counter()
+        try:
+            update = agent.process(state)
+        finally:
+            AGENT_LATENCY.labels(agent.name).observe(time.perf_counter() - start)
+        to_stage = update.get("workflow_stage", from_stage)
+        attrs["next_stage"] = to_stage
+
+    STAGE_TRANSITIONS.labels(from_stage, to_stage).inc()
+    return update
+
+
+def sisyphus_node(state: AgentState) -> AgentStateUpdate:
     """PM agent that orchestrates the workflow"""
-    return sisyphus.process(state)
+    return _run_agent(get_agents()["sisyphus"], state)
 
 
-def architect_node(state: AgentState) -> AgentState:
+def architect_node(state: AgentState) -> AgentStateUpdate:
     """Architecture and design agent"""
-    return architect.process(state)
+    return _run_agent(get_agents()["architect"], state)
 
 
-def coder_node(state: AgentState) -> AgentState:
+def coder_node(state: AgentState) -> AgentStateUpdate:
     """Code generation agent"""
-    return coder.process(state)
+    return _run_agent(get_agents()["coder"], state)
 
 
-def qa_node(state: AgentState) -> AgentState:
+def qa_node(state: AgentState) -> AgentStateUpdate:
     """Quality assurance agent"""
-    return qa.process(state)
+    return _run_agent(get_agents()["qa"], state)
 
 
 def route_from_sisyphus(
@@ -102,3 +132,16 @@ def compile_workflow():
     """Compile the workflow into a runnable graph"""
     workflow = create_workflow()
     return workflow.compile()
+
+
+@lru_cache(maxsize=None)
+def get_workflow():
+    """Compiled workflow shared by all requests, compiled on first use"""
+    return compile_workflow()
+
+
+def warm_up() -> None:
+    """Create all agents and their LLM clients and compile the workflow"""
+    for agent in get_agents().values():
+        agent.llm
+    get_workflow()
@@ -0,0 +1,125 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.config import config
+from app.llm.tokens import estimate_tokens
+
+# Default script: drives one full design -> coding -> qa -> complete run
+DEFAULT_SCRIPT: Dict[str, List[str]] = {
+    "pm": [
+        "요구사항을 분석했습니다. 설계를 시작합니다.\n"
+        "- 화면 흐름 정의\n- 데이터 구조 정의\n- 처리 함수 정의",
+        "설계 결과를 확인했습니다. 코딩을 시작합니다.",
+        "구현 결과를 확인했습니다. QA를 시작합니다.",
+    ],
+    "architect": [
+        "설계안입니다.\n"
+        "노드: 로그인 버튼 클릭\n"
+        "노드: 인증 API 처리\n"
+        "노드: 사용자 데이터 저장"
+    ],
+    "coder": [
+        "구현 코드입니다.\n"
+        "```python\n"
+        "def handle_login(user_id: str) -> bool:\n"
+        "    return bool(user_id)\n"
+        "```"
+    ],
+    "qa": ["검증 결과: 모든 시나리오 통과. 배포해도 좋습니다."],
+    "default": ["완료되었습니다."],
+}
+
+
+def load_script(path: str) -> Dict[str, List[str]]:
+    """Load scripted or recorded responses.
+
+    Accepts a JSON object mapping agent name -> list of responses, or a
+    JSONL transcript of {"agent": ..., "content": ...} records in call order.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            script: Dict[str, List[str]] = {}
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                script.setdefault(record["agent"], []).append(record["content"])
+            return script
+        return json.load(f)
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic offline chat model
+
+    Returns scripted responses for one agent. The n-th call within a workflow
+    run gets the n-th response, where n is the number of this model's own
+    responses already visible in the prompt history. The last response
+    repeats once the script runs out. Selection depends only on the prompt,
+    so concurrent runs sharing one instance stay deterministic.
+    """
+
+    agent_name: str = "default"
+    responses: List[str] = []
+    latency_ms: float = 0.0
+    tokens_per_sec: float = 0.0
+
+    @classmethod
+    def from_config(cls, agent_name: str) -> "FakeChatModel":
+        script = (
+            load_script(config.FAKE_LLM_SCRIPT)
+            if config.FAKE_LLM_SCRIPT
+            else DEFAULT_SCRIPT
+        )
+        responses = script.get(agent_name) or script.get("default") or [""]
+        return cls(
+            agent_name=agent_name,
+            responses=responses,
+            latency_ms=config.FAKE_LLM_LATENCY_MS,
+            tokens_per_sec=config.FAKE_LLM_TOKENS_PER_SEC,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _select_response(self, messages: List[BaseMessage]) -> str:
+        own = set(self.responses)
+        turn = sum(
+            1 for m in messages if isinstance(m, AIMessage) and m.content in own
+        )
+        return self.responses[min(turn, len(self.responses) - 1)]
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        content = self._select_response(messages)
+
+        prompt_tokens = sum(estimate_tokens(str(m.content)) for m in messages)
+        completion_tokens = estimate_tokens(content)
+
+        # Simulate time-to-first-token plus generation at a fixed token rate
+        delay = self.latency_ms / 1000
+        if self.tokens_per_sec > 0:
+            delay += completion_tokens / self.tokens_per_sec
+        if delay > 0:
+            time.sleep(delay)
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,227 @@
+"""Shared gateway for LLM calls.
+
+Every agent call goes through one LLMGateway, which keeps the service
+inside the provider quota per model instead of finding it with failed runs:
+
+- token buckets for requests/min (LLM_RPM) and tokens/min (LLM_TPM); a call
+  reserves its estimated tokens up front and settles the difference once
+  the provider reports actual usage
+- an AIMD concurrency limit: +1/limit per success up to
+  LLM_MAX_CONCURRENCY, halved on every 429
+- on a 429 both buckets are paused for the provider's retry-after (or an
+  exponential backoff), and the call is retried with jitter up to
+  LLM_MAX_RATE_LIMIT_RETRIES times; other errors are retried up to
+  LLM_MAX_RETRIES times
+
+Workflows run on several threads, so all of this is thread-safe.
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from app.config import config
+from app.llm.tokens import estimate_tokens
+from app.telemetry import (
+    LLM_CONCURRENCY_LIMIT,
+    LLM_ERRORS,
+    LLM_LATENCY,
+    LLM_RATE_LIMITED,
+    LLM_RETRIES,
+    LLM_THROTTLE_WAIT,
+    LLM_TOKENS,
+    span,
+)
+
+
+class TokenBucket:
+    """A per-minute budget that callers reserve from and wait off"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` now; returns how long to wait before using it"""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (or with a negative amount refund) after the fact"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def pause(self, seconds: float) -> None:
+        """Let nothing through for the next `seconds`"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class ModelLimiter:
+    """Budgets and adaptive concurrency limit of one model"""
+
+    def __init__(self, model: str, rpm: int, tpm: int, max_concurrency: int):
+        self.model = model
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_concurrency = max_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self._slots = threading.Condition()
+        LLM_CONCURRENCY_LIMIT.labels(model).set(self.limit)
+
+    def acquire(self, estimated_tokens: int) -> None:
+        """Wait for a concurrency slot and the request/token budget"""
+        start = time.monotonic()
+        with self._slots:
+            self._slots.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        wait = 0.0
+        if self.requests is not None:
+            wait = self.requests.reserve(1)
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.reserve(estimated_tokens))
+        if wait > 0:
+            time.sleep(wait)
+        LLM_THROTTLE_WAIT.labels(self.model).observe(time.monotonic() - start)
+
+    def release(self, succeeded: bool) -> None:
+        with self._slots:
+            self.in_flight -= 1
+            if succeeded and self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                LLM_CONCURRENCY_LIMIT.labels(self.model).set(self.limit)
+            self._slots.notify_all()
+
+    def settle(self, estimated_tokens: int, actual_tokens: int) -> None:
+        if self.tokens is not None:
+            self.tokens.adjust(actual_tokens - estimated_tokens)
+
+    def rate_limited(self, retry_after: float) -> None:
+        with self._slots:
+            self.limit = max(1.0, self.limit / 2)
+            LLM_CONCURRENCY_LIMIT.labels(self.model).set(self.limit)
+        for bucket in (self.requests, self.tokens):
+            if bucket is not None:
+                bucket.pause(retry_after)
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff"""
+    return random.uniform(0, config.LLM_RETRY_BACKOFF * 2 ** attempt)
+
+
+class LLMGateway:
+    def __init__(self):
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, model: str) -> ModelLimiter:
+        with self._lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limiter = ModelLimiter(
+                    model, config.LLM_RPM, config.LLM_TPM, config.LLM_MAX_CONCURRENCY
+                )
+                self._limiters[model] = limiter
+            return limiter
+
+    def invoke(self, llm: Any, messages: List[BaseMessage], agent: str) -> AIMessage:
+        """Call `llm` within its model's budget, retrying rate limits and
+        failures; records latency, token usage and one span per attempt"""
+        model = getattr(llm, "model_name", None) or llm._llm_type
+        limiter = self.limiter(model)
+        estimated = (
+            sum(estimate_tokens(str(message.content)) for message in messages)
+            + config.LLM_COMPLETION_TOKENS_ESTIMATE
+        )
+        failures = 0
+        rate_limits = 0
+        attempt = 0
+        while True:
+            limiter.acquire(estimated)
+            succeeded = False
+            try:
+                with span("llm.invoke", agent=agent, model=model, attempt=attempt) as attrs:
+                    start = time.perf_counter()
+                    try:
+                        response = llm.invoke(messages)
+                    finally:
+                        LLM_LATENCY.labels(agent).observe(time.perf_counter() - start)
+                    actual = self._record_usage(agent, response, attrs)
+                succeeded = True
+                limiter.settle(estimated, actual if actual is not None else estimated)
+                return response
+            except Exception as e:
+                if _status_code(e) == 429:
+                    LLM_RATE_LIMITED.labels(model).inc()
+                    rate_limits += 1
+                    retry_after = _retry_after(e)
+                    if retry_after is None:
+                        retry_after = config.LLM_RETRY_BACKOFF * 2 ** (rate_limits - 1)
+                    limiter.rate_limited(retry_after)
+                    retry = rate_limits <= config.LLM_MAX_RATE_LIMIT_RETRIES
+                    # The pause itself is waited off in acquire(); the jitter
+                    # keeps the paused calls from all retrying at once
+                    delay = _backoff(0)
+                else:
+                    failures += 1
+                    retry = failures <= config.LLM_MAX_RETRIES
+                    delay = _backoff(failures - 1)
+                if not retry:
+                    LLM_ERRORS.labels(agent).inc()
+                    raise
+            finally:
+                limiter.release(succeeded)
+
+            attempt += 1
+            LLM_RETRIES.labels(agent).inc()
+            time.sleep(delay)
+
+    def _record_usage(
+        self, agent: str, response: AIMessage, attrs: Dict[str, Any]
+    ) -> Optional[int]:
+        """Record prompt/completion token counts reported by the provider"""
+        usage = getattr(response, "usage_metadata", None) or {}
+        if not usage:
+            return None
+        attrs["prompt_tokens"] = usage.get("input_tokens", 0)
+        attrs["completion_tokens"] = usage.get("output_tokens", 0)
+        LLM_TOKENS.labels(agent, "prompt").observe(attrs["prompt_tokens"])
+        LLM_TOKENS.labels(agent, "completion").observe(attrs["completion_tokens"])
+        return attrs["prompt_tokens"] + attrs["completion_tokens"]
+
+
+# Singleton instance
+llm_gateway = LLMGateway()
@@ -0,0 +1,14 @@
+"""Token estimates for prompt budgets and rate limits.
+
+Provider tokenizers are not available offline, so counts are estimated from
+characters: about 4 ASCII characters per token, and one token per other
+character (Hangul syllables take one or more tokens each, so a 4-characters
+rule would undercount Korean text about fourfold). The backend uses the same
+estimate for the project summary it sends.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of `text` (at least 1)"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
@@ -1,15 +1,47 @@
 from typing import Optional
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+import asyncio
+import time
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from pydantic import BaseModel
 
+from app.admission import INTERACTIVE, WORKFLOW, Admission, AdmissionRejected, admission
+from app.agents.summary import update_summary
 from app.graph.state import AgentState, Message
-from app.graph.workflow import compile_workflow
+from app.telemetry import WORKFLOW_DURATION, WORKFLOW_HOPS, recent_spans, span
+
+
+def _warm_up() -> None:
+    # langgraph and the LLM provider are imported here, not at module load,
+    # so the process starts serving /health and /ready immediately
+    from app.graph.workflow import warm_up
+
+    warm_up()
+
+
+def _get_workflow():
+    from app.graph.workflow import get_workflow
+
+    return get_workflow()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: warm up in the background; /ready passes once it finishes
+    app.state.warmup = asyncio.create_task(asyncio.to_thread(_warm_up))
+    yield
+    # Shutdown
+    app.state.warmup.cancel()
+    admission.shutdown()
+
 
 app = FastAPI(
     title="AI-Sync OpenDev Agents",
     description="LangGraph-based multi-agent orchestration system",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # CORS for frontend
@@ -21,9 +53,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Compile the workflow
-workflow = compile_workflow()
-
 
 class ChatRequest(BaseModel):
     project_id: str
@@ -36,6 +65,38 @@ class ChatResponse(BaseModel):
     agent_type: str
     workflow_stage: str
     risk_score: int
+    # Rolling summary including this run, for the backend to store and send
+    # back as project_context["summary"]
+    conversation_summary: Optional[dict] = None
+
+
+def _run_workflow(initial_state: AgentState, endpoint: str) -> AgentState:
+    """Invoke the workflow inside a root span and record run metrics"""
+    with span("workflow.run", endpoint=endpoint) as attrs:
+        start = time.perf_counter()
+        try:
+            final_state = _get_workflow().invoke(initial_state)
+        finally:
+            WORKFLOW_DURATION.labels(endpoint).observe(time.perf_counter() - start)
+
+        hops = sum(1 for msg in final_state["messages"] if msg.role == "assistant")
+        attrs["hops"] = hops
+        attrs["workflow_stage"] = final_state.get("workflow_stage")
+        WORKFLOW_HOPS.observe(hops)
+    return final_state
+
+
+def _queue_headers(response: Response, admitted: Admission) -> None:
+    response.headers["X-Queue-Position"] = str(admitted.position)
+    response.headers["X-Queue-Wait-Ms"] = str(round(admitted.waited_ms))
+
+
+def _rejected(e: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail={"message": e.detail, "queued": e.queued, "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
 
 @app.get("/health")
@@ -43,8 +104,41 @@ async def health_check():
     return {"status": "healthy", "service": "ai-sync-agents"}
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Passes once agents, LLM clients and the workflow graph are warmed up"""
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is None or not warmup.done():
+        response.status_code = 503
+        return {"status": "warming_up"}
+    if warmup.cancelled() or warmup.exception():
+        response.status_code = 503
+        error = "cancelled" if warmup.cancelled() else str(warmup.exception())
+        return {"status": "failed", "error": error}
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/traces")
+async def traces(trace_id: Optional[str] = None, limit: int = 200):
+    """Recently finished spans, newest first"""
+    return {"spans": recent_spans(trace_id, limit)}
+
+
+@app.get("/api/queue")
+async def queue_status(project_id: Optional[str] = None):
+    """Admission queue state; with project_id, that project's waiting runs
+    and their positions"""
+    return admission.status(project_id)
+
+
 @app.post("/api/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, response: Response):
     """Process a chat message through the agent workflow"""
     try:
         # Initialize state
@@ -61,8 +155,11 @@ async def chat(request: ChatRequest):
             "final_response": None,
         }
 
-        # Run the workflow
-        final_state = workflow.invoke(initial_state)
+        # Run the workflow once admitted
+        final_state, admitted = await admission.run(
+            request.project_id, INTERACTIVE, _run_workflow, initial_state, "chat"
+        )
+        _queue_headers(response, admitted)
 
         # Extract response
         last_message = final_state["messages"][-1] if final_state["messages"] else None
@@ -74,13 +171,18 @@ async def chat(request: ChatRequest):
             agent_type=last_message.agent_type if last_message else "pm",
             workflow_stage=final_state.get("workflow_stage", "idle"),
             risk_score=final_state.get("risk_score", 0),
+            conversation_summary=update_summary(
+                (request.project_context or {}).get("summary"), final_state
+            ),
         )
+    except AdmissionRejected as e:
+        raise _rejected(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/api/workflow/run")
-async def run_full_workflow(request: ChatRequest):
+async def run_full_workflow(request: ChatRequest, response: Response):
     """Run the full workflow and return all results"""
     try:
         initial_state: AgentState = {
@@ -96,8 +198,11 @@ async def run_full_workflow(request: ChatRequest):
             "final_response": None,
         }
 
-        # Run the workflow
-        final_state = workflow.invoke(initial_state)
+        # Run the workflow once admitted, behind interactive chat
+        final_state, admitted = await admission.run(
+            request.project_id, WORKFLOW, _run_workflow, initial_state, "workflow_run"
+        )
+        _queue_headers(response, admitted)
 
         return {
             "messages": [msg.model_dump() for msg in final_state["messages"]],
@@ -107,6 +212,11 @@ async def run_full_workflow(request: ChatRequest):
                 op.model_dump() for op in final_state.get("node_operations", [])
             ],
             "risk_score": final_state["risk_score"],
+            "conversation_summary": update_summary(
+                (request.project_context or {}).get("summary"), final_state
+            ),
         }
+    except AdmissionRejected as e:
+        raise _rejected(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
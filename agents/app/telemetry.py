@@ -0,0 +1,166 @@
+"""In-process tracing and Prometheus metrics for the agents service.
+
+Metrics live in the default prometheus_client registry and are scraped from
+the /metrics endpoint; spans are kept in a bounded in-memory buffer served by
+/traces. Nothing here needs an external collector.
+"""
+
+import logging
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+logger = logging.getLogger("app.telemetry")
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+# Workflow level
+WORKFLOW_DURATION = Histogram(
+    "workflow_run_duration_seconds",
+    "End-to-end workflow run latency",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+WORKFLOW_HOPS = Histogram(
+    "workflow_run_hops",
+    "Graph node executions per workflow run",
+    buckets=(1, 2, 4, 6, 8, 12, 16, 24, 32),
+)
+STAGE_TRANSITIONS = Counter(
+    "workflow_stage_transitions_total",
+    "Workflow stage transitions made by agent nodes",
+    ["from_stage", "to_stage"],
+)
+LOOP_ITERATIONS = Counter(
+    "workflow_loop_iterations_total",
+    "Agent node re-entries within a single workflow run",
+    ["agent"],
+)
+
+# Admission control
+ADMISSION_QUEUED = Gauge(
+    "workflow_admission_queued",
+    "Workflow runs waiting for admission",
+    ["kind"],
+)
+ADMISSION_RUNNING = Gauge(
+    "workflow_admission_running",
+    "Admitted workflow runs in progress",
+)
+ADMISSION_WAIT = Histogram(
+    "workflow_admission_wait_seconds",
+    "Time a workflow run waited for admission",
+    ["kind"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "workflow_admission_rejected_total",
+    "Workflow runs rejected by admission control (project, queue_full, timeout)",
+    ["kind", "reason"],
+)
+
+# Agent level
+AGENT_LATENCY = Histogram(
+    "agent_node_duration_seconds",
+    "Latency of one agent graph node, including its LLM call",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+AGENT_PARSE_OUTCOMES = Counter(
+    "agent_parse_outcomes_total",
+    "Result of parsing agent responses (resulting stage, or error)",
+    ["agent", "outcome"],
+)
+
+# LLM level
+LLM_LATENCY = Histogram(
+    "llm_call_duration_seconds",
+    "Latency of a single LLM call attempt",
+    ["agent"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens",
+    "Tokens per LLM call",
+    ["agent", "kind"],
+    buckets=TOKEN_BUCKETS,
+)
+LLM_RETRIES = Counter(
+    "llm_retries_total",
+    "LLM call retries after a failed attempt",
+    ["agent"],
+)
+LLM_ERRORS = Counter(
+    "llm_errors_total",
+    "LLM calls that failed after all retries",
+    ["agent"],
+)
+LLM_RATE_LIMITED = Counter(
+    "llm_rate_limited_total",
+    "LLM call attempts rejected by the provider with 429",
+    ["model"],
+)
+LLM_CONCURRENCY_LIMIT = Gauge(
+    "llm_concurrency_limit",
+    "Current adaptive limit of concurrent LLM calls",
+    ["model"],
+)
+LLM_THROTTLE_WAIT = Histogram(
+    "llm_throttle_wait_seconds",
+    "Time an LLM call waited for a concurrency slot and rate budget",
+    ["model"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+# Tracing
+MAX_RECENT_SPANS = 1000
+
+_recent_spans: Deque[Dict[str, Any]] = deque(maxlen=MAX_RECENT_SPANS)
+_current_span: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "current_span", default=None
+)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Dict[str, Any]]:
+    """Record a timed span, nested under the current span if there is one.
+
+    The yielded dict can be used to attach attributes while the span is open.
+    """
+    parent = _current_span.get()
+    record: Dict[str, Any] = {
+        "name": name,
+        "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "start": time.time(),
+        "attributes": dict(attributes),
+        "status": "ok",
+    }
+    token = _current_span.set(record)
+    start = time.perf_counter()
+    try:
+        yield record["attributes"]
+    except Exception as e:
+        record["status"] = "error"
+        record["attributes"]["error"] = str(e)
+        raise
+    finally:
+        record["duration_ms"] = (time.perf_counter() - start) * 1000
+        _current_span.reset(token)
+        _recent_spans.append(record)
+        logger.debug("span %s %.1fms %s", name, record["duration_ms"], attributes)
+
+
+def recent_spans(trace_id: Optional[str] = None, limit: int = 200) -> List[dict]:
+    """Most recent finished spans, newest first"""
+    spans = [
+        s for s in reversed(_recent_spans) if not trace_id or s["trace_id"] == trace_id
+    ]
+    return spans[:limit]
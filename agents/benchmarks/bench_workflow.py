@@ -0,0 +1,192 @@
+"""Workflow benchmark for the agents service.
+
+Runs the compiled LangGraph workflow against the offline fake LLM and reports
+per-agent latency, state size per hop, total hops and /api/chat throughput
+under concurrency as JSON.
+
+Usage (from the agents/ directory):
+    python -m benchmarks.bench_workflow --runs 20 --concurrency 8 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+# The fake provider must be selected before app.config is imported
+os.environ["LLM_PROVIDER"] = "fake"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def _state_size(state: Dict[str, Any]) -> int:
+    """Serialized size of the workflow state in bytes"""
+
+    def default(value: Any) -> Any:
+        if hasattr(value, "model_dump"):
+            return value.model_dump()
+        return str(value)
+
+    return len(json.dumps(state, default=default, ensure_ascii=False).encode())
+
+
+def _initial_state(message: str) -> Dict[str, Any]:
+    from app.graph.state import Message
+
+    return {
+        "messages": [Message(role="user", content=message)],
+        "current_agent": "sisyphus",
+        "task_queue": [],
+        "task_results": [],
+        "workflow_stage": "planning",
+        "project_context": {},
+        "risk_score": 0,
+        "node_operations": [],
+        "user_request": message,
+        "final_response": None,
+    }
+
+
+def bench_graph(runs: int, message: str) -> Dict[str, Any]:
+    """Stream the workflow and time every hop"""
+    from app.graph.workflow import compile_workflow
+
+    workflow = compile_workflow()
+
+    agent_latency: Dict[str, List[float]] = {}
+    hops_per_run: List[int] = []
+    run_latency: List[float] = []
+    state_sizes: List[List[int]] = []
+
+    for _ in range(runs):
+        hops = 0
+        sizes: List[int] = []
+        run_start = hop_start = time.perf_counter()
+
+        for mode, chunk in workflow.stream(
+            _initial_state(message), stream_mode=["updates", "values"]
+        ):
+            if mode == "updates":
+                now = time.perf_counter()
+                for node_name in chunk:
+                    agent_latency.setdefault(node_name, []).append(
+                        (now - hop_start) * 1000
+                    )
+                    hops += 1
+                hop_start = now
+            elif hops:
+                sizes.append(_state_size(chunk))
+
+        run_latency.append((time.perf_counter() - run_start) * 1000)
+        hops_per_run.append(hops)
+        state_sizes.append(sizes)
+
+    return {
+        "runs": runs,
+        "run_latency_ms": _summarize(run_latency),
+        "agent_latency_ms": {
+            name: _summarize(values) for name, values in agent_latency.items()
+        },
+        "total_hops": _summarize([float(h) for h in hops_per_run]),
+        "state_bytes_per_hop": state_sizes[0] if state_sizes else [],
+    }
+
+
+async def bench_http(requests: int, concurrency: int, message: str) -> Dict[str, Any]:
+    """Drive /api/chat in-process with concurrent clients"""
+    import httpx
+
+    from app.main import app
+
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=300
+    ) as client:
+
+        async def one(i: int) -> None:
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/api/chat",
+                    json={"project_id": f"bench-{i % concurrency}", "message": message},
+                )
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_sec": requests / elapsed if elapsed else 0.0,
+        "latency_ms": _summarize(latencies),
+        "error_rate": errors / requests if requests else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--message", default="게시물에 좋아요 기능 추가해줘")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    from app.config import config
+
+    results = {
+        "benchmark": "agents.workflow",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "fake_llm": {
+            "script": config.FAKE_LLM_SCRIPT or "default",
+            "latency_ms": config.FAKE_LLM_LATENCY_MS,
+            "tokens_per_sec": config.FAKE_LLM_TOKENS_PER_SEC,
+        },
+        "graph": bench_graph(args.runs, args.message),
+        "http": asyncio.run(
+            bench_http(args.requests, args.concurrency, args.message)
+        ),
+    }
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
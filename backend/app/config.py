@@ -9,6 +9,123 @@ class Settings:
     SUPABASE_SERVICE_KEY: str = os.getenv("SUPABASE_SERVICE_KEY", "")
     GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
 
+    # Storage backend: "supabase" (default) or "sqlite" for local dev, CI and
+    # offline installs. SQLITE_PATH may be ":memory:".
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "supabase")
+    SQLITE_PATH: str = os.getenv("SQLITE_PATH", "ai_sync_local.db")
+
+    # Fast response path: orjson rendering without response_model
+    # re-validation of trusted DB rows on large list endpoints
+    FAST_RESPONSES: bool = os.getenv("FAST_RESPONSES", "false").lower() == "true"
+    # Responses at least this large are gzip/brotli compressed
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+    # Viewport queries: spatial grid cell size (canvas units), number of
+    # project indexes kept in memory, and the zoom level below which nodes
+    # are returned as cluster stubs of VIEWPORT_CLUSTER_PX screen pixels
+    SPATIAL_INDEX_CELL_SIZE: float = float(os.getenv("SPATIAL_INDEX_CELL_SIZE", "500"))
+    SPATIAL_INDEX_MAX_PROJECTS: int = int(os.getenv("SPATIAL_INDEX_MAX_PROJECTS", "100"))
+    VIEWPORT_CLUSTER_ZOOM: float = float(os.getenv("VIEWPORT_CLUSTER_ZOOM", "0.35"))
+    VIEWPORT_CLUSTER_PX: float = float(os.getenv("VIEWPORT_CLUSTER_PX", "160"))
+
+    # Project dependency graphs kept in memory for analysis (LRU)
+    GRAPH_CACHE_MAX_PROJECTS: int = int(os.getenv("GRAPH_CACHE_MAX_PROJECTS", "100"))
+
+    # Keep projects.risk_score and per-node scores updated from graph changes,
+    # recomputing at most once per debounce window per project
+    RISK_SCORE_TRACKING: bool = os.getenv("RISK_SCORE_TRACKING", "true").lower() == "true"
+    RISK_SCORE_DEBOUNCE_MS: int = int(os.getenv("RISK_SCORE_DEBOUNCE_MS", "500"))
+    # Nodes per reachability bitset pass; larger graphs take several passes
+    # so bitset memory stays bounded
+    RISK_BITSET_CHUNK_NODES: int = int(os.getenv("RISK_BITSET_CHUNK_NODES", "4096"))
+    # Rescore every node once the node count drifted by more than this
+    # fraction since the last full pass (scores are normalized by it)
+    RISK_RESCORE_DRIFT: float = float(os.getenv("RISK_RESCORE_DRIFT", "0.05"))
+
+    # Risk model: "degree" scores centrality from node degree; "centrality"
+    # blends approximate betweenness (CENTRALITY_SAMPLES BFS pivots, 0 =
+    # exact) and PageRank, recomputed in the background after changes
+    RISK_MODEL: str = os.getenv("RISK_MODEL", "degree")
+    CENTRALITY_SAMPLES: int = int(os.getenv("CENTRALITY_SAMPLES", "64"))
+    CENTRALITY_BETWEENNESS_WEIGHT: float = float(
+        os.getenv("CENTRALITY_BETWEENNESS_WEIGHT", "0.5")
+    )
+    CENTRALITY_PAGERANK_ALPHA: float = float(os.getenv("CENTRALITY_PAGERANK_ALPHA", "0.85"))
+    CENTRALITY_PAGERANK_TOL: float = float(os.getenv("CENTRALITY_PAGERANK_TOL", "1e-6"))
+    CENTRALITY_PAGERANK_MAX_ITER: int = int(os.getenv("CENTRALITY_PAGERANK_MAX_ITER", "100"))
+    CENTRALITY_DEBOUNCE_MS: int = int(os.getenv("CENTRALITY_DEBOUNCE_MS", "2000"))
+
+    # Analysis process pool: worker processes (0 = analyse inline), graphs
+    # smaller than ANALYSIS_POOL_MIN_NODES are analysed inline, jobs beyond
+    # ANALYSIS_MAX_WAITING queued ones are rejected, and a job running
+    # longer than ANALYSIS_TIMEOUT_SECONDS has its worker killed
+    ANALYSIS_POOL_WORKERS: int = int(
+        os.getenv("ANALYSIS_POOL_WORKERS", str(min(4, os.cpu_count() or 1)))
+    )
+    ANALYSIS_POOL_MIN_NODES: int = int(os.getenv("ANALYSIS_POOL_MIN_NODES", "2000"))
+    ANALYSIS_MAX_WAITING: int = int(os.getenv("ANALYSIS_MAX_WAITING", "64"))
+    ANALYSIS_TIMEOUT_SECONDS: float = float(os.getenv("ANALYSIS_TIMEOUT_SECONDS", "30"))
+    # Decoded graph snapshots each worker keeps (LRU)
+    ANALYSIS_WORKER_GRAPHS: int = int(os.getenv("ANALYSIS_WORKER_GRAPHS", "4"))
+    # How often a waiting request checks whether its client went away
+    ANALYSIS_DISCONNECT_POLL_MS: int = int(os.getenv("ANALYSIS_DISCONNECT_POLL_MS", "250"))
+
+    # Chat write-behind: messages are written in batches of up to
+    # CHAT_FLUSH_BATCH_SIZE at least every CHAT_FLUSH_INTERVAL_MS; senders
+    # wait once CHAT_BUFFER_MAX_PENDING messages are unwritten, and a message
+    # that failed CHAT_FLUSH_MAX_ATTEMPTS times is dropped
+    CHAT_WRITE_BEHIND: bool = os.getenv("CHAT_WRITE_BEHIND", "true").lower() == "true"
+    CHAT_FLUSH_BATCH_SIZE: int = int(os.getenv("CHAT_FLUSH_BATCH_SIZE", "100"))
+    CHAT_FLUSH_INTERVAL_MS: int = int(os.getenv("CHAT_FLUSH_INTERVAL_MS", "200"))
+    CHAT_BUFFER_MAX_PENDING: int = int(os.getenv("CHAT_BUFFER_MAX_PENDING", "10000"))
+    CHAT_FLUSH_MAX_ATTEMPTS: int = int(os.getenv("CHAT_FLUSH_MAX_ATTEMPTS", "5"))
+
+    # Idempotency-Key results of POST /api/chat/message kept per project
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_KEYS: int = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "1000"))
+
+    # Project summary sent to the agents: estimated token budget, and the
+    # most important nodes considered for it
+    PROJECT_CONTEXT_MAX_TOKENS: int = int(os.getenv("PROJECT_CONTEXT_MAX_TOKENS", "1500"))
+    PROJECT_CONTEXT_MAX_NODES: int = int(os.getenv("PROJECT_CONTEXT_MAX_NODES", "500"))
+
+    # Retrieval index over node text and chat messages: results sent to the
+    # agents per run, characters per result, newest messages indexed per
+    # project, and project indexes kept in memory (LRU)
+    RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+    RETRIEVAL_SNIPPET_CHARS: int = int(os.getenv("RETRIEVAL_SNIPPET_CHARS", "300"))
+    RETRIEVAL_MAX_MESSAGES: int = int(os.getenv("RETRIEVAL_MAX_MESSAGES", "2000"))
+    RETRIEVAL_MAX_PROJECTS: int = int(os.getenv("RETRIEVAL_MAX_PROJECTS", "20"))
+
+    # Projects whose rolling conversation summary is kept in memory
+    CONVERSATION_SUMMARY_MAX_PROJECTS: int = int(
+        os.getenv("CONVERSATION_SUMMARY_MAX_PROJECTS", "200")
+    )
+
+    # Path queries: cached results per graph topology version, query count
+    # after which a source gets a precomputed BFS tree, max k for k-shortest
+    PATH_CACHE_SIZE: int = int(os.getenv("PATH_CACHE_SIZE", "10000"))
+    PATH_HOT_SOURCE_HITS: int = int(os.getenv("PATH_HOT_SOURCE_HITS", "3"))
+    PATH_MAX_K: int = int(os.getenv("PATH_MAX_K", "10"))
+
+    # Max nodes in one batch impact request
+    BATCH_IMPACT_MAX_NODES: int = int(os.getenv("BATCH_IMPACT_MAX_NODES", "500"))
+
+    # Change log entries kept per project; older revisions require a full
+    # reload. Used by the SQLite triggers; on Supabase set the database's
+    # app.change_log_retention to the same value (schema.sql)
+    CHANGE_LOG_RETENTION: int = int(os.getenv("CHANGE_LOG_RETENTION", "5000"))
+
+    # Project export/import: rows read per page and inserted per batch, and
+    # the largest accepted archive after decompression
+    EXPORT_PAGE_SIZE: int = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+    IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+    IMPORT_MAX_BYTES: int = int(os.getenv("IMPORT_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # Slow-operation log thresholds (milliseconds)
+    SLOW_OPERATION_MS: float = float(os.getenv("SLOW_OPERATION_MS", "200"))
+    SLOW_REQUEST_MS: float = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+
     # CORS
     ALLOWED_ORIGINS: list = [
         "http://localhost:3000",
@@ -1,21 +1,34 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from app.config import settings
+from app.responses import CompressionMiddleware
+from app.telemetry import MetricsMiddleware, slow_operations
 from app.routers import projects, nodes, analysis, chat
-from app.websocket.manager import ConnectionManager
+from app.services.storage import storage_service
+from app.services.analysis_pool import analysis_pool
+from app.services.chat_buffer import chat_buffer
+from app.websocket.manager import manager
 
-manager = ConnectionManager()
+# Announce every recorded change as a new project revision
+storage_service.add_change_listener(manager.broadcast_revision)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("AI-Sync OpenDev Backend starting...")
+    app.state.ready = False
+    await storage_service.connect()
+    chat_buffer.start()
+    app.state.ready = True
     yield
     # Shutdown
     print("AI-Sync OpenDev Backend shutting down...")
+    await chat_buffer.stop()
+    analysis_pool.shutdown()
 
 
 app = FastAPI(
@@ -34,6 +47,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (brotli if installed, else gzip)
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+# Per-route latency and in-flight metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(projects.router, prefix="/api/projects", tags=["projects"])
 app.include_router(nodes.router, prefix="/api/nodes", tags=["nodes"])
@@ -46,6 +65,27 @@ async def health_check():
     return {"status": "healthy", "service": "ai-sync-opendev"}
 
 
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Passes once the storage client has been created"""
+    if not getattr(app.state, "ready", False):
+        response.status_code = 503
+        return {"status": "starting"}
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics in text exposition format"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/metrics/slow")
+async def slow_operation_log(limit: int = 100):
+    """Recent operations that exceeded the slow-operation thresholds"""
+    return {"operations": slow_operations(limit)}
+
+
 @app.websocket("/ws/{project_id}")
 async def websocket_endpoint(websocket: WebSocket, project_id: str):
     await manager.connect(websocket, project_id)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from uuid import UUID
 
+from app.config import settings
+
 
 class ImpactRequest(BaseModel):
     project_id: UUID
@@ -15,7 +17,77 @@ class ImpactResponse(BaseModel):
     message: str
 
 
+class BatchImpactRequest(BaseModel):
+    project_id: UUID
+    node_ids: List[UUID] = Field(
+        ..., min_length=1, max_length=settings.BATCH_IMPACT_MAX_NODES
+    )
+
+
+class NodeImpact(BaseModel):
+    node_id: UUID
+    risk_score: int
+    affected_count: int
+
+
+class ImpactOverlap(BaseModel):
+    node_a: UUID
+    node_b: UUID
+    shared_count: int
+
+
+class BatchImpactResponse(BaseModel):
+    node_ids: List[UUID]
+    risk_score: int
+    affected_nodes: List[str]
+    per_node: List[NodeImpact]
+    overlap_nodes: List[str]
+    overlaps: List[ImpactOverlap]
+    message: str
+
+
 class DependencyMapResponse(BaseModel):
     node_id: UUID
     upstream_nodes: List[str]
     downstream_nodes: List[str]
+
+
+class PathResponse(BaseModel):
+    source_id: UUID
+    target_id: UUID
+    path: List[str]
+    length: int
+
+
+class KShortestPathsResponse(BaseModel):
+    source_id: UUID
+    target_id: UUID
+    paths: List[List[str]]
+
+
+class CriticalPathResponse(BaseModel):
+    project_id: UUID
+    # Strongly connected components along the chain; a cycle is one step
+    components: List[List[str]]
+    nodes: List[str]
+    length: int
+
+
+class NodeCentrality(BaseModel):
+    node_id: str
+    betweenness: float
+    pagerank: float
+    # Blend of the two, relative to the most central node (0-1)
+    centrality: float
+
+
+class CentralityResponse(BaseModel):
+    project_id: UUID
+    # Graph topology version the snapshot was computed for
+    version: int
+    # False while a newer graph version is being recomputed in the background
+    current: bool
+    # Betweenness pivots sampled; None when computed exactly
+    samples: Optional[int]
+    elapsed_ms: float
+    nodes: List[NodeCentrality]
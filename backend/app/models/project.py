@@ -24,6 +24,7 @@ class ProjectResponse(ProjectBase):
     id: UUID
     version: str
     risk_score: int
+    revision: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,150 @@
+"""Fast response path for large node/edge/project lists.
+
+FastJSONResponse serializes with orjson when it is installed, and
+project_fields() trims rows to the columns a client asked for.
+CompressionMiddleware compresses large bodies with brotli when the optional
+brotli package is installed and the client accepts it, and with gzip
+otherwise.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    brotli = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson, falling back to the stdlib encoder.
+
+    Content is written as-is, without FastAPI's jsonable_encoder pass or
+    response_model validation, so only use it for trusted DB rows.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def project_fields(
+    rows: List[Dict[str, Any]], fields: Optional[str]
+) -> List[Dict[str, Any]]:
+    """Keep only the comma-separated `fields` of each row (id is always kept)"""
+    if not fields:
+        return rows
+    wanted = {f.strip() for f in fields.split(",") if f.strip()} | {"id"}
+    return [{k: v for k, v in row.items() if k in wanted} for row in rows]
+
+
+class _BrotliResponder:
+    """Buffers a complete response body and brotli-compresses it.
+
+    Streaming responses (more_body) are passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.body_parts: List[bytes] = []
+        self.streaming = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.streaming:
+            await self.send(message)
+            return
+
+        self.body_parts.append(message.get("body", b""))
+        if message.get("more_body", False):
+            self.streaming = True
+            await self.send(self.start_message)
+            await self.send(
+                {
+                    "type": "http.response.body",
+                    "body": b"".join(self.body_parts),
+                    "more_body": True,
+                }
+            )
+            return
+
+        body = b"".join(self.body_parts)
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        if len(body) >= self.minimum_size and "content-encoding" not in headers:
+            body = brotli.compress(body, quality=self.quality)
+            headers["Content-Encoding"] = "br"
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+        await self.send(self.start_message)
+        await self.send({"type": "http.response.body", "body": body})
+
+
+# Bodies that are compressed already (e.g. project archives)
+COMPRESSED_MEDIA_TYPES = ("application/gzip", "application/x-gzip", "application/zip")
+
+
+class CompressionMiddleware:
+    """Compress responses of at least `minimum_size` bytes (brotli or gzip).
+
+    Responses with a COMPRESSED_MEDIA_TYPES content type bypass the
+    compressor and are sent as they are.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        bypass = False
+
+        async def app(scope: Scope, receive: Receive, compress_send: Send) -> None:
+            async def send_or_bypass(message: Message) -> None:
+                nonlocal bypass
+                if message["type"] == "http.response.start":
+                    content_type = Headers(raw=message["headers"]).get("content-type", "")
+                    bypass = content_type.split(";")[0].strip() in COMPRESSED_MEDIA_TYPES
+                await (send if bypass else compress_send)(message)
+
+            await self.app(scope, receive, send_or_bypass)
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and "br" in accept_encoding:
+            responder = _BrotliResponder(app, self.minimum_size, self.brotli_quality)
+        else:
+            responder = GZipMiddleware(
+                app, minimum_size=self.minimum_size, compresslevel=self.gzip_level
+            )
+        await responder(scope, receive, send)
@@ -1,52 +1,253 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+import asyncio
+from contextlib import suppress
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Any, Optional
 from uuid import UUID
 
-from app.services.impact_analyzer import ImpactAnalyzer
-from app.services.supabase_service import supabase_service
-from app.models.analysis import ImpactRequest, ImpactResponse, DependencyMapResponse
+from app.config import settings
+from app.services.graph_cache import ProjectGraph, graph_cache
+from app.services.centrality import CentralitySnapshot, centrality_service
+from app.services.analysis_pool import AnalysisBusy, AnalysisTimeout, analysis_pool
+from app.telemetry import timed_stage
+from app.models.analysis import (
+    ImpactRequest,
+    ImpactResponse,
+    BatchImpactRequest,
+    BatchImpactResponse,
+    DependencyMapResponse,
+    PathResponse,
+    KShortestPathsResponse,
+    CriticalPathResponse,
+    NodeCentrality,
+    CentralityResponse,
+)
 
 router = APIRouter()
-analyzer = ImpactAnalyzer()
+
+
+def _scoring_centrality(project_id: str) -> Optional[CentralitySnapshot]:
+    """Centrality snapshot for risk scoring with the configured risk model.
+    The centrality model uses the latest background snapshot, never waiting
+    for a recomputation (nodes it does not cover yet are scored by degree)."""
+    if settings.RISK_MODEL == "centrality":
+        return centrality_service.latest(project_id)
+    return None
+
+
+async def _analyze(
+    http_request: Request,
+    project_graph: ProjectGraph,
+    operation: str,
+    centrality: Optional[CentralitySnapshot] = None,
+    **args: Any,
+) -> Any:
+    """Run an analysis job (in the process pool for large graphs), cancelling
+    it if the client disconnects while it runs"""
+    job = asyncio.ensure_future(
+        analysis_pool.analyze(project_graph, operation, centrality, **args)
+    )
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {job}, timeout=settings.ANALYSIS_DISCONNECT_POLL_MS / 1000
+            )
+            if done:
+                return job.result()
+            if await http_request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    except AnalysisBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    finally:
+        if not job.done():
+            # Kills the job's worker process
+            job.cancel()
+            with suppress(asyncio.CancelledError):
+                await job
 
 
 @router.post("/impact", response_model=ImpactResponse)
-async def calculate_impact(request: ImpactRequest):
+async def calculate_impact(request: ImpactRequest, http_request: Request):
     """Calculate impact score for modifying a node"""
     try:
-        # Get all nodes and edges for the project
-        nodes = await supabase_service.get_nodes_by_project(str(request.project_id))
-        edges = await supabase_service.get_edges_by_project(str(request.project_id))
+        # Cached project graph, kept up to date by node/edge changes
+        with timed_stage("impact.load_graph"):
+            project_graph = await graph_cache.get(str(request.project_id))
 
-        # Build graph and calculate impact
-        analyzer.build_graph(nodes, edges)
-        impact = analyzer.calculate_impact_score(str(request.node_id))
-        affected_nodes = analyzer.get_affected_nodes(str(request.node_id))
+        with timed_stage("impact.score"):
+            impact = await _analyze(
+                http_request,
+                project_graph,
+                "impact",
+                _scoring_centrality(str(request.project_id)),
+                node_id=str(request.node_id),
+            )
 
         return ImpactResponse(
             node_id=request.node_id,
-            risk_score=impact,
-            affected_nodes=affected_nodes,
-            message=_get_risk_message(impact),
+            message=_get_risk_message(impact["risk_score"]),
+            **impact,
         )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/impact/batch", response_model=BatchImpactResponse)
+async def calculate_batch_impact(request: BatchImpactRequest, http_request: Request):
+    """Calculate the combined and per-node impact of modifying several nodes"""
+    try:
+        with timed_stage("impact_batch.load_graph"):
+            project_graph = await graph_cache.get(str(request.project_id))
+
+        with timed_stage("impact_batch.score"):
+            impact = await _analyze(
+                http_request,
+                project_graph,
+                "batch_impact",
+                _scoring_centrality(str(request.project_id)),
+                node_ids=[str(node_id) for node_id in request.node_ids],
+            )
+
+        return BatchImpactResponse(
+            node_ids=request.node_ids,
+            message=_get_risk_message(impact["risk_score"]),
+            **impact,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/dependencies/{node_id}", response_model=DependencyMapResponse)
-async def get_dependencies(node_id: UUID, project_id: UUID):
+async def get_dependencies(node_id: UUID, project_id: UUID, http_request: Request):
     """Get dependency map for a node"""
     try:
-        nodes = await supabase_service.get_nodes_by_project(str(project_id))
-        edges = await supabase_service.get_edges_by_project(str(project_id))
+        with timed_stage("dependencies.load_graph"):
+            project_graph = await graph_cache.get(str(project_id))
 
-        analyzer.build_graph(nodes, edges)
-        upstream = analyzer.get_upstream_nodes(str(node_id))
-        downstream = analyzer.get_downstream_nodes(str(node_id))
+        with timed_stage("dependencies.traverse"):
+            dependencies = await _analyze(
+                http_request, project_graph, "dependencies", node_id=str(node_id)
+            )
+
+        return DependencyMapResponse(node_id=node_id, **dependencies)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/paths/shortest", response_model=PathResponse)
+async def get_shortest_path(
+    project_id: UUID, source_id: UUID, target_id: UUID, http_request: Request
+):
+    """Get the shortest dependency path from one node to another"""
+    try:
+        project_graph = await graph_cache.get(str(project_id))
+        with timed_stage("paths.shortest"):
+            path = await _analyze(
+                http_request,
+                project_graph,
+                "shortest_path",
+                source_id=str(source_id),
+                target_id=str(target_id),
+            )
+        return PathResponse(
+            source_id=source_id,
+            target_id=target_id,
+            path=path,
+            length=max(len(path) - 1, 0),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/paths/k-shortest", response_model=KShortestPathsResponse)
+async def get_k_shortest_paths(
+    project_id: UUID,
+    source_id: UUID,
+    target_id: UUID,
+    http_request: Request,
+    k: int = Query(3, ge=1),
+):
+    """Get up to k alternative dependency paths, shortest first"""
+    try:
+        project_graph = await graph_cache.get(str(project_id))
+        with timed_stage("paths.k_shortest"):
+            paths = await _analyze(
+                http_request,
+                project_graph,
+                "k_shortest_paths",
+                source_id=str(source_id),
+                target_id=str(target_id),
+                k=min(k, settings.PATH_MAX_K),
+            )
+        return KShortestPathsResponse(
+            source_id=source_id, target_id=target_id, paths=paths
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/paths/critical", response_model=CriticalPathResponse)
+async def get_critical_path(project_id: UUID, http_request: Request):
+    """Get the longest dependency chain of the project"""
+    try:
+        project_graph = await graph_cache.get(str(project_id))
+        with timed_stage("paths.critical"):
+            components = await _analyze(http_request, project_graph, "critical_path")
+        return CriticalPathResponse(
+            project_id=project_id,
+            components=components,
+            nodes=[node_id for component in components for node_id in component],
+            length=max(len(components) - 1, 0),
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/centrality", response_model=CentralityResponse)
+async def get_centrality(project_id: UUID, limit: int = Query(20, ge=1, le=1000)):
+    """Get the most central nodes from the latest approximate
+    betweenness/PageRank snapshot"""
+    try:
+        with timed_stage("centrality.snapshot"):
+            snapshot = await centrality_service.get(str(project_id))
+        project_graph = await graph_cache.get(str(project_id))
 
-        return DependencyMapResponse(
-            node_id=node_id, upstream_nodes=upstream, downstream_nodes=downstream
+        ranked = sorted(
+            snapshot.betweenness, key=lambda n: snapshot.score(n) or 0, reverse=True
+        )[:limit]
+        return CentralityResponse(
+            project_id=project_id,
+            version=snapshot.version,
+            current=snapshot.matches(project_graph),
+            samples=snapshot.samples,
+            elapsed_ms=snapshot.elapsed_ms,
+            nodes=[
+                NodeCentrality(
+                    node_id=node_id,
+                    betweenness=snapshot.betweenness[node_id],
+                    pagerank=snapshot.pagerank.get(node_id, 0),
+                    centrality=snapshot.score(node_id) or 0,
+                )
+                for node_id in ranked
+            ],
         )
+    except AnalysisBusy as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except AnalysisTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,37 +1,90 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, Header, HTTPException
+from typing import List, Optional
 from uuid import UUID
 
-from app.services.supabase_service import supabase_service
-from app.services.agent_bridge import AgentBridge
+from app.services.agent_bridge import AgentBridge, AgentsBusy
+from app.services.chat_buffer import chat_buffer
+from app.services.conversation_summary import conversation_summaries
+from app.services.project_context import project_context_service
+from app.services.retrieval import retrieval_index
+from app.services.storage import storage_service
+from app.services.idempotency import IdempotencyConflict, fingerprint, idempotency_store
+from app.websocket.manager import manager
 from app.models.chat import ChatMessageCreate, ChatMessageResponse
 
 router = APIRouter()
 agent_bridge = AgentBridge()
 
 
-@router.post("/message", response_model=ChatMessageResponse)
-async def send_message(message: ChatMessageCreate):
-    """Send a message to the PM agent and get a response"""
-    try:
-        # Save user message
-        await supabase_service.create_chat_message(message)
+async def _exchange(message: ChatMessageCreate) -> dict:
+    # Save user message; it is written in the background and broadcast
+    # right away
+    saved_message = await chat_buffer.add(message)
+    await manager.broadcast_chat_message(str(message.project_id), saved_message)
+    await retrieval_index.add_message(saved_message)
 
-        # Get response from agent
-        response = await agent_bridge.process_message(
-            project_id=str(message.project_id), user_message=message.content
-        )
+    # Get response from agent, with a summary of the project's canvas, the
+    # rolling summary of earlier turns and the nodes and earlier messages
+    # most related to this one
+    project_id = str(message.project_id)
+    project_context = {
+        **await project_context_service.get(project_id),
+        "summary": await conversation_summaries.summary(project_id),
+        "retrieved": await retrieval_index.search(
+            project_id, message.content, exclude={str(saved_message["id"])}
+        ),
+    }
+    response = await agent_bridge.process_message(
+        project_id=project_id,
+        user_message=message.content,
+        project_context=project_context,
+    )
+    if response.get("conversation_summary"):
+        await conversation_summaries.save(project_id, response["conversation_summary"])
 
-        # Save agent response
-        agent_message = ChatMessageCreate(
-            project_id=message.project_id,
-            role="assistant",
-            content=response["content"],
-            agent_type=response.get("agent_type", "pm"),
-        )
-        saved_response = await supabase_service.create_chat_message(agent_message)
+    # Save agent response
+    agent_message = ChatMessageCreate(
+        project_id=message.project_id,
+        role="assistant",
+        content=response["content"],
+        agent_type=response.get("agent_type", "pm"),
+    )
+    saved_response = await chat_buffer.add(agent_message)
+    await manager.broadcast_chat_message(str(message.project_id), saved_response)
+    await retrieval_index.add_message(saved_response)
+
+    return saved_response
 
-        return saved_response
+
+@router.post("/message", response_model=ChatMessageResponse)
+async def send_message(
+    message: ChatMessageCreate, idempotency_key: Optional[str] = Header(default=None)
+):
+    """Send a message to the PM agent and get a response.
+
+    A retry with the same Idempotency-Key gets the first response (waiting
+    for it if the agents are still working) instead of a new agent run.
+    """
+    try:
+        # Messages are written in the background, where a missing project
+        # could no longer be reported
+        if not await storage_service.get_project(str(message.project_id)):
+            raise HTTPException(status_code=404, detail="Project not found")
+        if idempotency_key is None:
+            return await _exchange(message)
+        return await idempotency_store.run(
+            str(message.project_id),
+            idempotency_key,
+            fingerprint(message.role, message.content, message.agent_type or ""),
+            lambda: _exchange(message),
+        )
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AgentsBusy as e:
+        headers = {"Retry-After": e.retry_after} if e.retry_after else None
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -40,7 +93,7 @@ async def send_message(message: ChatMessageCreate):
 async def get_chat_history(project_id: UUID, limit: int = 50):
     """Get chat history for a project"""
     try:
-        result = await supabase_service.get_chat_history(str(project_id), limit)
+        result = await chat_buffer.get_history(str(project_id), limit)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException
 from typing import List
 from uuid import UUID
 
-from app.services.supabase_service import supabase_service
+from app.services.storage import storage_service
 from app.models.node import (
     NodeCreate,
     NodeUpdate,
@@ -19,7 +19,7 @@ router = APIRouter()
 async def create_node(node: NodeCreate):
     """Create a new node"""
     try:
-        result = await supabase_service.create_node(node)
+        result = await storage_service.create_node(node)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -29,7 +29,7 @@ async def create_node(node: NodeCreate):
 async def get_node(node_id: UUID):
     """Get a node by ID"""
     try:
-        result = await supabase_service.get_node(str(node_id))
+        result = await storage_service.get_node(str(node_id))
         if not result:
             raise HTTPException(status_code=404, detail="Node not found")
         return result
@@ -43,7 +43,7 @@ async def get_node(node_id: UUID):
 async def update_node(node_id: UUID, node: NodeUpdate):
     """Update a node"""
     try:
-        result = await supabase_service.update_node(str(node_id), node)
+        result = await storage_service.update_node(str(node_id), node)
         if not result:
             raise HTTPException(status_code=404, detail="Node not found")
         return result
@@ -55,22 +55,28 @@ async def update_node(node_id: UUID, node: NodeUpdate):
 
 @router.delete("/{node_id}")
 async def delete_node(node_id: UUID):
-    """Delete a node"""
+    """Delete a node and the edges attached to it"""
     try:
-        await supabase_service.delete_node(str(node_id))
-        return {"message": "Node deleted successfully"}
+        deleted = await storage_service.delete_node(str(node_id))
+        return {
+            "message": "Node deleted successfully",
+            "deleted_edge_ids": deleted["edge_ids"],
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/batch-delete")
 async def batch_delete_nodes(request: BatchDeleteRequest):
-    """Delete multiple nodes at once"""
+    """Delete multiple nodes, and every edge attached to them, at once"""
     try:
-        deleted_count = await supabase_service.delete_nodes_batch(request.node_ids)
+        deleted = await storage_service.delete_nodes_batch(request.node_ids)
+        deleted_count = len(deleted["node_ids"])
         return {
             "message": f"{deleted_count} nodes deleted successfully",
             "deleted_count": deleted_count,
+            "deleted_node_ids": deleted["node_ids"],
+            "deleted_edge_ids": deleted["edge_ids"],
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -80,7 +86,7 @@ async def batch_delete_nodes(request: BatchDeleteRequest):
 async def create_edge(edge: EdgeCreate):
     """Create a new edge between nodes"""
     try:
-        result = await supabase_service.create_edge(edge)
+        result = await storage_service.create_edge(edge)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -90,7 +96,7 @@ async def create_edge(edge: EdgeCreate):
 async def delete_edge(edge_id: UUID):
     """Delete an edge"""
     try:
-        await supabase_service.delete_edge(str(edge_id))
+        await storage_service.delete_edge(str(edge_id))
         return {"message": "Edge deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
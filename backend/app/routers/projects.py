@@ -1,9 +1,20 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 from uuid import UUID
 
-from app.services.supabase_service import supabase_service
+from app.config import settings
+from app.responses import FastJSONResponse, project_fields
+from app.services.storage import storage_service
+from app.services.spatial_index import spatial_registry
+from app.services.risk_scores import risk_score_service
+from app.services.project_archive import (
+    ArchiveError,
+    ArchiveTooLarge,
+    export_project,
+    import_project,
+)
 from app.models.project import ProjectCreate, ProjectUpdate, ProjectResponse
 
 router = APIRouter()
@@ -13,7 +24,7 @@ router = APIRouter()
 async def create_project(project: ProjectCreate):
     """Create a new project"""
     try:
-        result = await supabase_service.create_project(project)
+        result = await storage_service.create_project(project)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -23,17 +34,37 @@ async def create_project(project: ProjectCreate):
 async def list_projects():
     """List all projects"""
     try:
-        result = await supabase_service.list_projects()
+        result = await storage_service.list_projects()
+        if settings.FAST_RESPONSES:
+            # Rows come straight from the DB; skip response_model re-validation
+            return FastJSONResponse(result)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/import")
+async def import_project_archive(request: Request, name: Optional[str] = None):
+    """Create a new project from an archive produced by the export endpoint
+
+    The request body is the (gzip-compressed) NDJSON archive; it is read as a
+    stream and inserted in batches. `name` overrides the archived name.
+    """
+    try:
+        return await import_project(storage_service, request.stream(), name)
+    except ArchiveTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(project_id: UUID):
     """Get a project by ID"""
     try:
-        result = await supabase_service.get_project(str(project_id))
+        result = await storage_service.get_project(str(project_id))
         if not result:
             raise HTTPException(status_code=404, detail="Project not found")
         return result
@@ -47,7 +78,7 @@ async def get_project(project_id: UUID):
 async def update_project(project_id: UUID, project: ProjectUpdate):
     """Update a project"""
     try:
-        result = await supabase_service.update_project(str(project_id), project)
+        result = await storage_service.update_project(str(project_id), project)
         if not result:
             raise HTTPException(status_code=404, detail="Project not found")
         return result
@@ -61,27 +92,163 @@ async def update_project(project_id: UUID, project: ProjectUpdate):
 async def delete_project(project_id: UUID):
     """Delete a project"""
     try:
-        await supabase_service.delete_project(str(project_id))
+        await storage_service.delete_project(str(project_id))
         return {"message": "Project deleted successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{project_id}/export")
+async def export_project_archive(project_id: UUID):
+    """Download a project (nodes, edges, chat messages) as a streamed
+    gzip-compressed NDJSON archive"""
+    try:
+        project = await storage_service.get_project(str(project_id))
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        export_project(storage_service, project),
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": f'attachment; filename="project-{project_id}.ndjson.gz"'
+        },
+    )
+
+
+@router.get("/{project_id}/risk")
+async def get_project_risk(project_id: UUID):
+    """Get the project risk score and the risk score of every node"""
+    try:
+        if not await storage_service.get_project(str(project_id)):
+            raise HTTPException(status_code=404, detail="Project not found")
+        project_risk = await risk_score_service.get(str(project_id))
+        return {"risk_score": project_risk.risk_score, "node_scores": project_risk.scores}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _compact_changes(changes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep only the latest change per entity, in revision order"""
+    latest: Dict[tuple, Dict[str, Any]] = {}
+    for change in changes:
+        key = (change["entity"], change["id"])
+        latest.pop(key, None)
+        latest[key] = change
+    return list(latest.values())
+
+
+@router.get("/{project_id}/changes")
+async def get_project_changes(
+    project_id: UUID,
+    since: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=5000),
+):
+    """Get the node/edge/project changes after revision `since`
+
+    Only the latest change per entity is returned (create/update carry the
+    full row in `data`). `reset` is true when `since` is older than the
+    retained change log (or newer than the project), in which case the
+    client must reload the full project. When `has_more` is true, call again
+    with `since=revision`.
+    """
+    try:
+        result = await storage_service.get_changes_since(str(project_id), since, limit)
+        if result is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        latest = result["revision"]
+        changes = result["changes"]
+        gap = latest > since and (not changes or changes[0]["revision"] != since + 1)
+        if since > latest or gap:
+            return {"revision": latest, "reset": True, "has_more": False, "changes": []}
+
+        revision = changes[-1]["revision"] if changes else latest
+        response = {
+            "revision": revision,
+            "reset": False,
+            "has_more": revision < latest,
+            "changes": _compact_changes(changes),
+        }
+        if settings.FAST_RESPONSES:
+            return FastJSONResponse(response)
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{project_id}/nodes")
-async def get_project_nodes(project_id: UUID):
-    """Get all nodes for a project"""
+async def get_project_nodes(project_id: UUID, fields: Optional[str] = None):
+    """Get all nodes for a project
+
+    `fields` is an optional comma-separated column list, e.g.
+    `fields=id,label,position_x,position_y`.
+    """
+    try:
+        result = await storage_service.get_nodes_by_project(str(project_id))
+        result = project_fields(result, fields)
+        if settings.FAST_RESPONSES:
+            return FastJSONResponse(result)
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{project_id}/nodes/viewport")
+async def get_viewport_nodes(
+    project_id: UUID,
+    min_x: float,
+    min_y: float,
+    max_x: float,
+    max_y: float,
+    zoom: float = Query(1.0, gt=0),
+    fields: Optional[str] = None,
+):
+    """Get the nodes inside a viewport bounding box
+
+    Below VIEWPORT_CLUSTER_ZOOM, nodes are aggregated into cluster stubs
+    (count, centroid, type breakdown) instead of being returned one by one.
+    """
+    if min_x > max_x or min_y > max_y:
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
     try:
-        result = await supabase_service.get_nodes_by_project(str(project_id))
+        index = await spatial_registry.get(str(project_id))
+        if zoom < settings.VIEWPORT_CLUSTER_ZOOM:
+            cluster_size = settings.VIEWPORT_CLUSTER_PX / zoom
+            nodes = []
+            clusters = index.clusters(min_x, min_y, max_x, max_y, cluster_size)
+        else:
+            nodes = project_fields(index.query(min_x, min_y, max_x, max_y), fields)
+            clusters = []
+
+        result = {"nodes": nodes, "clusters": clusters, "total": len(index.nodes)}
+        if settings.FAST_RESPONSES:
+            return FastJSONResponse(result)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{project_id}/edges")
-async def get_project_edges(project_id: UUID):
-    """Get all edges for a project"""
+async def get_project_edges(project_id: UUID, fields: Optional[str] = None):
+    """Get all edges for a project
+
+    `fields` is an optional comma-separated column list, e.g.
+    `fields=id,source_id,target_id`.
+    """
     try:
-        result = await supabase_service.get_edges_by_project(str(project_id))
+        result = await storage_service.get_edges_by_project(str(project_id))
+        result = project_fields(result, fields)
+        if settings.FAST_RESPONSES:
+            return FastJSONResponse(result)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
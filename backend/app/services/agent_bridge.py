@@ -1,8 +1,18 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import httpx
 import os
 
 
+class AgentsBusy(Exception):
+    """The agents service is at capacity (429/503); retry after `retry_after` seconds"""
+
+    def __init__(self, status_code: int, detail: Any, retry_after: Optional[str]):
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
 class AgentBridge:
     """Bridge to communicate with LangGraph agents"""
 
@@ -10,7 +20,10 @@ class AgentBridge:
         self.agents_url = os.getenv("AGENTS_URL", "http://localhost:8001")
 
     async def process_message(
-        self, project_id: str, user_message: str
+        self,
+        project_id: str,
+        user_message: str,
+        project_context: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Send a message to the PM agent and get a response.
@@ -19,19 +32,34 @@ class AgentBridge:
         In production, this would call the LangGraph agents service.
         """
         # TODO: Replace with actual LangGraph agent call
+        response = None
         try:
             async with httpx.AsyncClient() as client:
                 response = await client.post(
                     f"{self.agents_url}/api/chat",
-                    json={"project_id": project_id, "message": user_message},
+                    json={
+                        "project_id": project_id,
+                        "message": user_message,
+                        "project_context": project_context or {},
+                    },
                     timeout=60.0,
                 )
-                if response.status_code == 200:
-                    return response.json()
         except Exception as e:
             # Fallback to mock response if agents service is not available
             pass
 
+        if response is not None:
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code in (429, 503):
+                # Overload is the client's to retry, not a reason to answer
+                # with a mock response
+                raise AgentsBusy(
+                    response.status_code,
+                    response.json().get("detail"),
+                    response.headers.get("Retry-After"),
+                )
+
         # Mock response for development
         return self._generate_mock_response(user_message)
 
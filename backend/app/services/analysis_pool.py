@@ -0,0 +1,222 @@
+"""Bounded process pool for CPU-heavy graph analysis.
+
+Traversals over large project graphs run in ANALYSIS_POOL_WORKERS spawned
+worker processes instead of on the event loop, so WebSocket relaying and
+other requests stay responsive. Small graphs are analysed inline on the
+memoized cached graph, where results usually come back faster than a
+round trip to another process would.
+
+Each worker talks to the parent over its own pipe, one job at a time. That
+makes a job truly cancellable: on timeout or client disconnect the worker
+is killed and replaced, instead of running to completion in the
+background like a ProcessPoolExecutor task would.
+"""
+
+import asyncio
+import multiprocessing
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional
+
+from app.config import settings
+from app.services.analysis_worker import encode_graph, run_operation, worker_main
+from app.services.graph_cache import MISSING, ProjectGraph
+from app.services.impact_analyzer import ImpactAnalyzer
+from app.services.single_flight import SingleFlight
+from app.telemetry import ANALYSIS_JOBS, ANALYSIS_JOBS_WAITING
+
+if TYPE_CHECKING:
+    from app.services.centrality import CentralitySnapshot
+
+# Results that only depend on the graph structure, cached per topology version
+CACHEABLE = {"dependencies", "shortest_path", "k_shortest_paths", "critical_path"}
+
+
+class AnalysisError(Exception):
+    """An analysis job failed in its worker"""
+
+
+class AnalysisTimeout(AnalysisError):
+    """An analysis job ran longer than ANALYSIS_TIMEOUT_SECONDS"""
+
+
+class AnalysisBusy(AnalysisError):
+    """Too many analysis jobs are already waiting for a worker"""
+
+
+class _Worker:
+    """One worker process and the graph snapshots it is known to hold"""
+
+    def __init__(self, context: Any):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(child, settings.ANALYSIS_WORKER_GRAPHS),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        self.graphs: "OrderedDict[Hashable, None]" = OrderedDict()
+
+    async def call(
+        self,
+        key: Hashable,
+        snapshot: bytes,
+        operation: str,
+        args: Dict[str, Any],
+        centrality: Optional[Dict[str, Optional[float]]],
+    ) -> Any:
+        send_snapshot = key not in self.graphs
+        while True:
+            job = (key, snapshot if send_snapshot else None, operation, args, centrality)
+            await asyncio.to_thread(self.conn.send, job)
+            status, value = await asyncio.to_thread(self.conn.recv)
+            if status != "missing" or send_snapshot:
+                break
+            send_snapshot = True
+
+        # Mirror the worker's LRU of decoded graphs
+        self.graphs[key] = None
+        self.graphs.move_to_end(key)
+        while len(self.graphs) > settings.ANALYSIS_WORKER_GRAPHS:
+            self.graphs.popitem(last=False)
+
+        if status == "error":
+            raise AnalysisError(value)
+        return value
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class AnalysisPool:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._all: List[_Worker] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._flights = SingleFlight("analysis")
+
+    async def analyze(
+        self,
+        project_graph: ProjectGraph,
+        operation: str,
+        centrality: Optional["CentralitySnapshot"] = None,
+        **args: Any,
+    ) -> Any:
+        """Run an analysis operation (see analysis_worker.OPERATIONS) on a
+        cached project graph, in the pool when the graph is large enough"""
+        if not self.workers or len(project_graph.graph) < settings.ANALYSIS_POOL_MIN_NODES:
+            analyzer = ImpactAnalyzer.from_project_graph(project_graph)
+            analyzer.centrality = centrality
+            ANALYSIS_JOBS.labels(operation, "inline").inc()
+            return run_operation(analyzer, operation, args)
+
+        version = project_graph.topology_version
+        frozen = tuple(
+            (name, tuple(value) if isinstance(value, list) else value)
+            for name, value in sorted(args.items())
+        )
+        cache_key = (operation, *frozen) if operation in CACHEABLE else None
+        if cache_key is not None:
+            cached = project_graph.cached(cache_key)
+            if cached is not MISSING:
+                ANALYSIS_JOBS.labels(operation, "cached").inc()
+                return cached
+
+        # Encoded once per topology version; the key also tells a reloaded
+        # graph apart from the evicted one it replaces
+        snapshot = project_graph.derived("snapshot", lambda: encode_graph(project_graph.graph))
+        scores = None
+        if centrality is not None:
+            # Only the scored nodes' centrality travels to the worker
+            node_ids = args.get("node_ids") or [args.get("node_id")]
+            scores = {node_id: centrality.score(node_id) for node_id in node_ids}
+
+        key = (project_graph.uid, version)
+        # Identical concurrent jobs (e.g. every collaborator opening the same
+        # impact panel) share one worker run
+        centrality_key = (centrality.uid, centrality.version) if centrality else None
+        flight_key = (key, operation, frozen, centrality_key)
+        result = await self._flights.do(
+            flight_key, lambda: self._submit(key, snapshot, operation, args, scores)
+        )
+        if cache_key is not None:
+            project_graph.store(cache_key, result, version)
+        return result
+
+    async def _submit(
+        self,
+        key: Hashable,
+        snapshot: bytes,
+        operation: str,
+        args: Dict[str, Any],
+        centrality: Optional[Dict[str, Optional[float]]],
+    ) -> Any:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self._slots.locked() and self._waiting >= settings.ANALYSIS_MAX_WAITING:
+            ANALYSIS_JOBS.labels(operation, "busy").inc()
+            raise AnalysisBusy("Too many analysis jobs queued")
+
+        self._waiting += 1
+        ANALYSIS_JOBS_WAITING.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+            ANALYSIS_JOBS_WAITING.dec()
+
+        try:
+            worker = self._idle.pop() if self._idle else self._spawn()
+            try:
+                result = await asyncio.wait_for(
+                    worker.call(key, snapshot, operation, args, centrality),
+                    settings.ANALYSIS_TIMEOUT_SECONDS,
+                )
+            except AnalysisError:
+                # The job failed, the worker is fine
+                self._idle.append(worker)
+                ANALYSIS_JOBS.labels(operation, "error").inc()
+                raise
+            except BaseException as e:
+                # Timed out, cancelled (client gone) or the worker died
+                self._discard(worker)
+                if isinstance(e, asyncio.TimeoutError):
+                    ANALYSIS_JOBS.labels(operation, "timeout").inc()
+                    raise AnalysisTimeout(
+                        f"Analysis exceeded {settings.ANALYSIS_TIMEOUT_SECONDS}s"
+                    )
+                if isinstance(e, asyncio.CancelledError):
+                    ANALYSIS_JOBS.labels(operation, "cancelled").inc()
+                    raise
+                ANALYSIS_JOBS.labels(operation, "error").inc()
+                raise AnalysisError(f"Analysis worker failed: {e!r}")
+            self._idle.append(worker)
+            ANALYSIS_JOBS.labels(operation, "ok").inc()
+            return result
+        finally:
+            self._slots.release()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context)
+        self._all.append(worker)
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        if worker in self._all:
+            self._all.remove(worker)
+
+    def shutdown(self) -> None:
+        for worker in self._all:
+            worker.kill()
+        self._all.clear()
+        self._idle.clear()
+
+
+# Singleton instance
+analysis_pool = AnalysisPool(settings.ANALYSIS_POOL_WORKERS)
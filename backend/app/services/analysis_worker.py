@@ -0,0 +1,199 @@
+"""Graph analysis operations and the analysis worker process.
+
+This module is imported by spawned worker processes, so it must not import
+anything that creates storage clients or other singletons.
+
+Graphs reach the workers as compact snapshots: the node id list, a node
+type table, and the edges as two arrays of node indexes. Each worker keeps
+the last few decoded snapshots, so a graph is only shipped and rebuilt once
+per worker and topology version.
+"""
+
+import pickle
+import signal
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import networkx as nx
+
+from app.services.impact_analyzer import ImpactAnalyzer
+
+
+def encode_graph(graph: nx.DiGraph) -> bytes:
+    """Compact snapshot of the structure and node types of a graph"""
+    ids = list(graph)
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    node_type = [graph.nodes[node_id].get("type") or "" for node_id in ids]
+    types = sorted(set(node_type))
+    type_index = {name: i for i, name in enumerate(types)}
+    node_types = array("H", (type_index[name] for name in node_type))
+    sources = array("I", (index[source] for source, _ in graph.edges))
+    targets = array("I", (index[target] for _, target in graph.edges))
+    return pickle.dumps(
+        (ids, types, node_types.tobytes(), sources.tobytes(), targets.tobytes()),
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+
+
+def _array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    return values
+
+
+def decode_graph(snapshot: bytes) -> nx.DiGraph:
+    ids, types, node_types, sources, targets = pickle.loads(snapshot)
+    graph = nx.DiGraph()
+    graph.add_nodes_from(
+        (node_id, {"type": types[t]}) for node_id, t in zip(ids, _array("H", node_types))
+    )
+    graph.add_edges_from(
+        zip(map(ids.__getitem__, _array("I", sources)), map(ids.__getitem__, _array("I", targets)))
+    )
+    return graph
+
+
+class CentralityScores:
+    """Precomputed centrality of the nodes a job scores; stands in for a
+    CentralitySnapshot inside a worker"""
+
+    def __init__(self, scores: Dict[str, Optional[float]]):
+        self.scores = scores
+
+    def score(self, node_id: str) -> Optional[float]:
+        return self.scores.get(node_id)
+
+
+# Fixed pivot seed, so an unchanged graph always gets the same estimate
+SAMPLE_SEED = 0
+
+
+def pagerank(
+    graph: nx.DiGraph, alpha: float, tol: float, max_iter: int
+) -> Dict[str, float]:
+    """PageRank with rank flowing against edge direction: a node ranks high
+    when many (highly ranked) nodes depend on it"""
+    n = len(graph)
+    if n == 0:
+        return {}
+    dependents = {node_id: graph.in_degree(node_id) for node_id in graph}
+    rank = dict.fromkeys(graph, 1.0 / n)
+    for _ in range(max_iter):
+        # Rank of nodes without dependencies is spread evenly
+        dangling = sum(rank[node_id] for node_id, count in dependents.items() if not count)
+        base = (1 - alpha) / n + alpha * dangling / n
+        updated = dict.fromkeys(graph, base)
+        for node_id, count in dependents.items():
+            if count:
+                share = alpha * rank[node_id] / count
+                for predecessor in graph.predecessors(node_id):
+                    updated[predecessor] += share
+        error = sum(abs(updated[node_id] - rank[node_id]) for node_id in graph)
+        rank = updated
+        if error < n * tol:
+            break
+    return rank
+
+
+def compute_centrality(
+    graph: nx.DiGraph, samples: int, alpha: float, tol: float, max_iter: int
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """(betweenness, pagerank); betweenness is sampled from `samples` pivots
+    unless that is 0 or covers the whole graph"""
+    k = samples if 0 < samples < len(graph) else None
+    betweenness = nx.betweenness_centrality(graph, k=k, seed=SAMPLE_SEED)
+    return betweenness, pagerank(graph, alpha, tol, max_iter)
+
+
+def _impact(analyzer: ImpactAnalyzer, node_id: str) -> Dict[str, Any]:
+    return {
+        "risk_score": analyzer.calculate_impact_score(node_id),
+        "affected_nodes": analyzer.get_affected_nodes(node_id),
+    }
+
+
+def _dependencies(analyzer: ImpactAnalyzer, node_id: str) -> Dict[str, Any]:
+    return {
+        "upstream_nodes": analyzer.get_upstream_nodes(node_id),
+        "downstream_nodes": analyzer.get_downstream_nodes(node_id),
+    }
+
+
+def _batch_impact(analyzer: ImpactAnalyzer, node_ids: List[str]) -> Dict[str, Any]:
+    return analyzer.calculate_batch_impact(node_ids)
+
+
+def _shortest_path(analyzer: ImpactAnalyzer, source_id: str, target_id: str) -> List[str]:
+    return analyzer.get_dependency_path(source_id, target_id)
+
+
+def _k_shortest_paths(
+    analyzer: ImpactAnalyzer, source_id: str, target_id: str, k: int
+) -> List[List[str]]:
+    return analyzer.get_k_shortest_paths(source_id, target_id, k)
+
+
+def _critical_path(analyzer: ImpactAnalyzer) -> List[List[str]]:
+    return analyzer.get_critical_path()
+
+
+def _centrality(
+    analyzer: ImpactAnalyzer, samples: int, alpha: float, tol: float, max_iter: int
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+    return compute_centrality(analyzer.graph, samples, alpha, tol, max_iter)
+
+
+OPERATIONS: Dict[str, Callable[..., Any]] = {
+    "impact": _impact,
+    "batch_impact": _batch_impact,
+    "dependencies": _dependencies,
+    "shortest_path": _shortest_path,
+    "k_shortest_paths": _k_shortest_paths,
+    "critical_path": _critical_path,
+    "centrality": _centrality,
+}
+
+
+def run_operation(analyzer: ImpactAnalyzer, operation: str, args: Dict[str, Any]) -> Any:
+    return OPERATIONS[operation](analyzer, **args)
+
+
+def worker_main(conn: Any, max_graphs: int) -> None:
+    """Serve (key, snapshot, operation, args, centrality) jobs from `conn`.
+
+    Replies ("ok", result), ("error", message), or ("missing", None) when
+    the job came without a snapshot and the graph is not cached here.
+    """
+    # Shutdown is handled by the parent; Ctrl+C in a dev server must not
+    # print a traceback per worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    graphs: "OrderedDict[Any, nx.DiGraph]" = OrderedDict()
+
+    while True:
+        try:
+            key, snapshot, operation, args, centrality = conn.recv()
+        except (EOFError, OSError):
+            return
+
+        graph = graphs.get(key)
+        if graph is None:
+            if snapshot is None:
+                conn.send(("missing", None))
+                continue
+            graph = decode_graph(snapshot)
+            graphs[key] = graph
+            while len(graphs) > max_graphs:
+                graphs.popitem(last=False)
+        else:
+            graphs.move_to_end(key)
+
+        try:
+            analyzer = ImpactAnalyzer()
+            analyzer.graph = graph
+            if centrality is not None:
+                analyzer.centrality = CentralityScores(centrality)
+            reply = ("ok", run_operation(analyzer, operation, args))
+        except Exception as e:
+            reply = ("error", f"{type(e).__name__}: {e}")
+        conn.send(reply)
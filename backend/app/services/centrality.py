@@ -0,0 +1,157 @@
+"""Approximate centrality for the "centrality" risk model.
+
+Exact betweenness is O(V * E), far too slow per request on large graphs.
+Instead betweenness is estimated from CENTRALITY_SAMPLES BFS pivots and
+PageRank is a power iteration to CENTRALITY_PAGERANK_TOL. Both run as an
+analysis pool job (analysis_worker.compute_centrality), in a worker process
+for large graphs, debounced after changes, and are cached per cached graph
+and topology version. Readers get the latest snapshot together with its
+version and never wait for a rerun.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.services.analysis_pool import analysis_pool
+from app.services.debounce import ProjectDebouncer
+from app.services.graph_cache import ProjectGraph, graph_cache
+from app.services.storage import storage_service
+
+class CentralitySnapshot:
+    """Centrality of one topology version of a cached project graph"""
+
+    def __init__(
+        self,
+        uid: int,
+        version: int,
+        betweenness: Dict[str, float],
+        pagerank: Dict[str, float],
+        samples: Optional[int],
+        elapsed_ms: float,
+    ):
+        self.uid = uid
+        self.version = version
+        self.betweenness = betweenness
+        self.pagerank = pagerank
+        self.samples = samples
+        self.elapsed_ms = elapsed_ms
+        self._max_betweenness = max(betweenness.values(), default=0) or 1
+        self._max_pagerank = max(pagerank.values(), default=0) or 1
+
+    def matches(self, project_graph: ProjectGraph) -> bool:
+        """Whether this snapshot was computed from the graph as it is now (a
+        reloaded graph restarts its versions)"""
+        return (self.uid, self.version) == (project_graph.uid, project_graph.topology_version)
+
+    def score(self, node_id: str) -> Optional[float]:
+        """Blended centrality in [0, 1], relative to the most central node;
+        None for nodes added after this snapshot"""
+        betweenness = self.betweenness.get(node_id)
+        if betweenness is None:
+            return None
+        weight = settings.CENTRALITY_BETWEENNESS_WEIGHT
+        return (
+            weight * betweenness / self._max_betweenness
+            + (1 - weight) * self.pagerank.get(node_id, 0) / self._max_pagerank
+        )
+
+
+class CentralityService:
+    """Per-project centrality snapshots, recomputed in the background"""
+
+    def __init__(self):
+        self._snapshots: Dict[str, CentralitySnapshot] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._listeners: List[Callable[[str], Awaitable[None]]] = []
+        self._debouncer = ProjectDebouncer(
+            self.refresh, settings.CENTRALITY_DEBOUNCE_MS, "Centrality update"
+        )
+
+    def add_listener(self, listener: Callable[[str], Awaitable[None]]) -> None:
+        """Called with the project id after every new snapshot"""
+        self._listeners.append(listener)
+
+    def peek(self, project_id: str) -> Optional[CentralitySnapshot]:
+        return self._snapshots.get(project_id)
+
+    def latest(self, project_id: str) -> Optional[CentralitySnapshot]:
+        """The latest snapshot, which may be older than the graph; schedules a
+        recomputation when it is missing or stale"""
+        snapshot = self._snapshots.get(project_id)
+        project_graph = graph_cache.peek(project_id)
+        if snapshot is None or (
+            project_graph is not None and not snapshot.matches(project_graph)
+        ):
+            self._debouncer.schedule(project_id)
+        return snapshot
+
+    async def get(self, project_id: str) -> CentralitySnapshot:
+        """The latest snapshot, computed first if there is none"""
+        snapshot = self.latest(project_id)
+        if snapshot is None:
+            snapshot = await self.refresh(project_id)
+        return snapshot
+
+    async def on_change(self, events: List[Dict[str, Any]]) -> None:
+        """Storage change listener"""
+        changed = set()
+        for event in events:
+            project_id = event["project_id"]
+            if event["entity"] == "project":
+                if event["op"] == "delete":
+                    self._snapshots.pop(project_id, None)
+                    self._locks.pop(project_id, None)
+            elif project_id in self._snapshots:
+                changed.add(project_id)
+        for project_id in changed:
+            if project_id in self._snapshots:
+                self._debouncer.schedule(project_id)
+
+    async def refresh(self, project_id: str) -> CentralitySnapshot:
+        async with self._locks.setdefault(project_id, asyncio.Lock()):
+            project_graph = await graph_cache.get(project_id)
+            snapshot = self._snapshots.get(project_id)
+            if snapshot is not None and snapshot.matches(project_graph):
+                return snapshot
+
+            # Read before the job; the graph may change while it runs
+            uid, version = project_graph.uid, project_graph.topology_version
+            node_count = len(project_graph.graph)
+            samples = settings.CENTRALITY_SAMPLES
+
+            started = time.perf_counter()
+            betweenness, ranks = await analysis_pool.analyze(
+                project_graph,
+                "centrality",
+                samples=samples,
+                alpha=settings.CENTRALITY_PAGERANK_ALPHA,
+                tol=settings.CENTRALITY_PAGERANK_TOL,
+                max_iter=settings.CENTRALITY_PAGERANK_MAX_ITER,
+            )
+            snapshot = CentralitySnapshot(
+                uid,
+                version,
+                betweenness,
+                ranks,
+                samples if 0 < samples < node_count else None,
+                (time.perf_counter() - started) * 1000,
+            )
+            self._snapshots[project_id] = snapshot
+
+            # Drop snapshots whose graph is no longer cached
+            for tracked in list(self._snapshots):
+                if graph_cache.peek(tracked) is None:
+                    del self._snapshots[tracked]
+                    self._locks.pop(tracked, None)
+
+        for listener in self._listeners:
+            await listener(project_id)
+        return snapshot
+
+
+# Singleton instance
+centrality_service = CentralityService()
+if settings.RISK_MODEL == "centrality":
+    storage_service.add_change_listener(centrality_service.on_change)
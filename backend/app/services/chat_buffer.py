@@ -0,0 +1,219 @@
+"""Write-behind buffer for chat messages.
+
+Chat messages get their id and timestamp here and are handed back right
+away, so they can be returned and broadcast before they reach the database.
+A background task writes them with one multi-row insert per
+CHAT_FLUSH_BATCH_SIZE messages, at least every CHAT_FLUSH_INTERVAL_MS.
+
+Durability: the buffer holds at most CHAT_BUFFER_MAX_PENDING unwritten
+messages (senders wait beyond that), failed batches are kept and retried,
+and stop() writes everything still pending on shutdown. A failed batch is
+split in halves down to the rows that fail on their own, so one bad row
+does not hold back or take down the rest. Messages are only lost when the
+process dies without a shutdown, or when a message keeps failing
+CHAT_FLUSH_MAX_ATTEMPTS times.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.models.chat import ChatMessageCreate
+from app.services.storage import StorageService, storage_service
+from app.telemetry import CHAT_FLUSHES, CHAT_MESSAGES_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class ChatWriteBuffer:
+    def __init__(self, storage: StorageService):
+        self.storage = storage
+        self._pending: List[Dict[str, Any]] = []
+        # The batch currently being written; still visible to history reads
+        self._writing: List[Dict[str, Any]] = []
+        # Failed writes per message id
+        self._attempts: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._has_pending: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    def start(self) -> None:
+        """Start the background writer; until then messages are written
+        through one by one"""
+        if not settings.CHAT_WRITE_BEHIND or self._task is not None:
+            return
+        self._closed = False
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background writer and write every pending message"""
+        if self._task is None:
+            return
+        self._closed = True
+        self._has_pending.set()
+        self._batch_full.set()
+        await self._task
+        self._task = None
+        while not await self.flush():
+            await asyncio.sleep(settings.CHAT_FLUSH_INTERVAL_MS / 1000)
+
+    async def add(self, message: ChatMessageCreate) -> Dict[str, Any]:
+        """Accept a message for writing and return its row"""
+        if self._task is None:
+            return await self.storage.create_chat_message(message)
+
+        async with self._space:
+            await self._space.wait_for(
+                lambda: len(self._pending) < settings.CHAT_BUFFER_MAX_PENDING
+            )
+        row = {
+            "id": str(uuid.uuid4()),
+            "project_id": str(message.project_id),
+            "role": message.role,
+            "content": message.content,
+            "agent_type": message.agent_type,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._pending.append(row)
+        CHAT_MESSAGES_PENDING.inc()
+        self._has_pending.set()
+        if len(self._pending) >= settings.CHAT_FLUSH_BATCH_SIZE:
+            self._batch_full.set()
+        return row
+
+    async def get_history(self, project_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Chat history including messages that are not written yet"""
+        # Taken before the read, so a batch written meanwhile shows up in
+        # one of the two (or both, which the id check handles)
+        unwritten = [
+            row for row in self._writing + self._pending if row["project_id"] == project_id
+        ]
+        rows = await self.storage.get_chat_history(project_id, limit)
+        if unwritten and len(rows) < limit:
+            stored = {str(row["id"]) for row in rows}
+            rows = rows + [row for row in unwritten if row["id"] not in stored]
+        return rows[:limit]
+
+    async def get_recent_history(self, project_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """The newest `limit` messages including unwritten ones, oldest first"""
+        unwritten = [
+            row for row in self._writing + self._pending if row["project_id"] == project_id
+        ]
+        rows = await self.storage.get_recent_chat_history(project_id, limit)
+        if unwritten:
+            stored = {str(row["id"]) for row in rows}
+            rows = rows + [row for row in unwritten if row["id"] not in stored]
+        return rows[-limit:]
+
+    async def on_change(self, events: List[Dict[str, Any]]) -> None:
+        """Storage change listener: drop messages of deleted projects, whose
+        rows could no longer be inserted"""
+        deleted = {
+            event["project_id"]
+            for event in events
+            if event["entity"] == "project" and event["op"] == "delete"
+        }
+        if deleted and self._pending:
+            kept = [row for row in self._pending if row["project_id"] not in deleted]
+            for row in self._pending:
+                if row["project_id"] in deleted:
+                    self._attempts.pop(row["id"], None)
+            CHAT_MESSAGES_PENDING.dec(len(self._pending) - len(kept))
+            self._pending = kept
+            await self._notify()
+
+    async def flush(self) -> bool:
+        """Write every pending message; False when some messages failed and
+        were kept for a later retry"""
+        if self._flush_lock is None:
+            return True
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[: settings.CHAT_FLUSH_BATCH_SIZE]
+                del self._pending[: len(batch)]
+                self._writing = batch
+                try:
+                    failed = await self._insert(batch)
+                finally:
+                    self._writing = []
+
+                retry = []
+                for row in failed:
+                    attempts = self._attempts.pop(row["id"], 0) + 1
+                    if attempts < settings.CHAT_FLUSH_MAX_ATTEMPTS:
+                        self._attempts[row["id"]] = attempts
+                        retry.append(row)
+                failed_ids = {row["id"] for row in failed}
+                for row in batch:
+                    if row["id"] not in failed_ids:
+                        self._attempts.pop(row["id"], None)
+
+                if not failed:
+                    CHAT_FLUSHES.labels("ok").inc()
+                if retry:
+                    logger.warning("Writing %d chat messages failed, retrying", len(retry))
+                    CHAT_FLUSHES.labels("error").inc()
+                if len(failed) > len(retry):
+                    logger.error(
+                        "Dropping %d chat messages after %d failed writes",
+                        len(failed) - len(retry),
+                        settings.CHAT_FLUSH_MAX_ATTEMPTS,
+                    )
+                    CHAT_FLUSHES.labels("dropped").inc()
+                CHAT_MESSAGES_PENDING.dec(len(batch) - len(retry))
+                if retry:
+                    self._pending[:0] = retry
+                    await self._notify()
+                    return False
+                await self._notify()
+            return True
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows with one multi-row insert, halving a failed batch down
+        to the rows that fail on their own; returns those rows"""
+        try:
+            await self.storage.insert_rows_batch("chat_messages", rows)
+            return []
+        except Exception:
+            if len(rows) == 1:
+                logger.exception("Writing chat message %s failed", rows[0]["id"])
+                return rows
+        middle = len(rows) // 2
+        return await self._insert(rows[:middle]) + await self._insert(rows[middle:])
+
+    async def _notify(self) -> None:
+        if not self._pending:
+            self._has_pending.clear()
+        if len(self._pending) < settings.CHAT_FLUSH_BATCH_SIZE:
+            self._batch_full.clear()
+        async with self._space:
+            self._space.notify_all()
+
+    async def _run(self) -> None:
+        interval = settings.CHAT_FLUSH_INTERVAL_MS / 1000
+        while not self._closed:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._closed:
+                break
+            if not await self.flush():
+                # Back off before retrying a failed batch
+                await asyncio.sleep(interval)
+
+
+# Singleton instance
+chat_buffer = ChatWriteBuffer(storage_service)
+storage_service.add_change_listener(chat_buffer.on_change)
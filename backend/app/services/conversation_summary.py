@@ -0,0 +1,42 @@
+"""Rolling conversation summaries, one per project.
+
+The agents service folds every finished run into the project's summary
+(decisions, created nodes, open issues) and returns it; it is stored in the
+conversation_summaries table and sent with the next run as
+project_context["summary"], so agents never need the raw chat history.
+Summaries are cached for the most recently used projects. Two runs of one
+project finishing at the same time both build on the same previous summary;
+the one saved last wins.
+"""
+
+from typing import Any, Dict
+
+from app.config import settings
+from app.services.project_cache import ProjectCacheRegistry
+from app.services.storage import storage_service
+
+
+class ConversationSummaryRegistry(ProjectCacheRegistry[Dict[str, Any]]):
+    async def _load(self, project_id: str) -> Dict[str, Any]:
+        row = await self.storage.get_conversation_summary(project_id)
+        return {"data": row["data"] if row else {}}
+
+    def _apply(self, entry: Dict[str, Any], event: Dict[str, Any]) -> None:
+        # Summaries only change through save()
+        pass
+
+    async def summary(self, project_id: str) -> Dict[str, Any]:
+        """The project's current summary ({} before its first run)"""
+        return (await self.get(project_id))["data"]
+
+    async def save(self, project_id: str, data: Dict[str, Any]) -> None:
+        entry = await self.get(project_id)
+        entry["data"] = data
+        await self.storage.save_conversation_summary(project_id, data)
+
+
+# Singleton instance
+conversation_summaries = ConversationSummaryRegistry(
+    storage_service, max_projects=settings.CONVERSATION_SUMMARY_MAX_PROJECTS
+)
+storage_service.add_change_listener(conversation_summaries.on_change)
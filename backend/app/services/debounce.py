@@ -0,0 +1,45 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ProjectDebouncer:
+    """Runs `callback(project_id)` in the background `delay_ms` after the
+    first schedule() of a burst. Schedules that arrive while a run is in
+    progress cause exactly one more run once it finishes.
+    """
+
+    def __init__(
+        self, callback: Callable[[str], Awaitable[None]], delay_ms: int, name: str
+    ):
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self.name = name
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._rerun: Set[str] = set()
+
+    def schedule(self, project_id: str) -> None:
+        task = self._tasks.get(project_id)
+        if task is not None and not task.done():
+            self._rerun.add(project_id)
+            return
+        self._tasks[project_id] = asyncio.create_task(self._run(project_id))
+
+    def pending(self, project_id: str) -> bool:
+        task = self._tasks.get(project_id)
+        return task is not None and not task.done()
+
+    async def _run(self, project_id: str) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.delay_ms / 1000)
+                self._rerun.discard(project_id)
+                await self.callback(project_id)
+                if project_id not in self._rerun:
+                    break
+        except Exception:
+            logger.exception("%s failed for project %s", self.name, project_id)
+        finally:
+            self._tasks.pop(project_id, None)
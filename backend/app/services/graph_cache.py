@@ -0,0 +1,323 @@
+from collections import deque
+from itertools import count, islice
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from app.config import settings
+from app.services.project_cache import ProjectCacheRegistry
+from app.services.storage import storage_service
+
+# Distinguishes a reloaded graph from its evicted predecessor, whose versions
+# restart from zero
+_graph_ids = count(1)
+
+# Marks a derived result that is not cached
+MISSING = object()
+
+
+class ProjectGraph:
+    """Dependency graph of one project, updated in place from change events.
+
+    Reachability (descendants / ancestors) is memoized per node. A change
+    only invalidates the memo entries it can affect, instead of the whole
+    cache: adding u -> v changes the descendants of u and of everything that
+    reaches u, and the ancestors of v and of everything v reaches; removals
+    affect the entries that contained the removed node or edge endpoint.
+
+    Path queries are cached per topology version (bumped only by structural
+    changes: edges, added/removed nodes and node type changes, so dragging
+    nodes around keeps them warm). Sources
+    queried PATH_HOT_SOURCE_HITS times get a full BFS tree, after which any
+    shortest path from them is a parent-pointer walk.
+    """
+
+    def __init__(self):
+        self.graph = nx.DiGraph()
+        self.uid = next(_graph_ids)
+        # Bumped on every applied change; lets callers key derived results
+        self.version = 0
+        # Bumped only when reachability, paths or node types can change
+        self.topology_version = 0
+        # Bumped when a node label changes
+        self.label_version = 0
+        # edge id -> (source, target); parallel edges collapse into one graph edge
+        self._edges: Dict[str, Tuple[str, str]] = {}
+        self._edge_counts: Dict[Tuple[str, str], int] = {}
+        self._node_edges: Dict[str, Set[str]] = {}
+        self._descendants: Dict[str, FrozenSet[str]] = {}
+        self._ancestors: Dict[str, FrozenSet[str]] = {}
+        self._derived: Dict[Hashable, Any] = {}
+        self._derived_version = 0
+        self._source_hits: Dict[str, int] = {}
+        # Nodes whose score inputs (reachability, degree, data neighbors) may
+        # have changed; only collected once track_dirty is switched on
+        self.track_dirty = False
+        self._dirty: Set[str] = set()
+
+    @classmethod
+    def build(
+        cls, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]
+    ) -> "ProjectGraph":
+        project_graph = cls()
+        for node in nodes:
+            project_graph._add_node(node)
+        for edge in edges:
+            project_graph._add_edge(edge)
+        return project_graph
+
+    # Reachability
+    def descendants(self, node_id: str) -> FrozenSet[str]:
+        if node_id not in self.graph:
+            return frozenset()
+        cached = self._descendants.get(node_id)
+        if cached is None:
+            cached = frozenset(nx.descendants(self.graph, node_id))
+            self._descendants[node_id] = cached
+        return cached
+
+    def ancestors(self, node_id: str) -> FrozenSet[str]:
+        if node_id not in self.graph:
+            return frozenset()
+        cached = self._ancestors.get(node_id)
+        if cached is None:
+            cached = frozenset(nx.ancestors(self.graph, node_id))
+            self._ancestors[node_id] = cached
+        return cached
+
+    def _invalidate(self, memo: Dict[str, FrozenSet[str]], affected: Set[str]) -> None:
+        for key in [k for k, reach in memo.items() if k in affected or reach & affected]:
+            del memo[key]
+
+    # Paths
+    def derived(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Result of compute(), cached until the topology changes"""
+        cached = self.cached(key)
+        if cached is MISSING:
+            cached = compute()
+            self.store(key, cached, self.topology_version)
+        return cached
+
+    def cached(self, key: Hashable) -> Any:
+        """A derived result of the current topology, or MISSING"""
+        if self._derived_version != self.topology_version:
+            self._derived.clear()
+            self._derived_version = self.topology_version
+        return self._derived.get(key, MISSING)
+
+    def store(self, key: Hashable, value: Any, topology_version: int) -> None:
+        """Cache a result computed elsewhere for `topology_version`, unless
+        the graph has changed since"""
+        if topology_version != self.topology_version:
+            return
+        self.cached(key)
+        if len(self._derived) >= settings.PATH_CACHE_SIZE:
+            self._derived.clear()
+        self._derived[key] = value
+
+    def shortest_path(self, source: str, target: str) -> List[str]:
+        if source not in self.graph or target not in self.graph:
+            return []
+        if len(self._source_hits) >= settings.PATH_CACHE_SIZE:
+            self._source_hits.clear()
+        hits = self._source_hits.get(source, 0) + 1
+        self._source_hits[source] = hits
+
+        if hits >= settings.PATH_HOT_SOURCE_HITS:
+            parents = self.derived(("bfs_tree", source), lambda: self._bfs_tree(source))
+            return self._walk_tree(parents, source, target)
+        return self.derived(
+            ("shortest_path", source, target),
+            lambda: self._shortest_path(source, target),
+        )
+
+    def k_shortest_paths(self, source: str, target: str, k: int) -> List[List[str]]:
+        if source not in self.graph or target not in self.graph:
+            return []
+
+        def compute() -> List[List[str]]:
+            try:
+                return list(islice(nx.shortest_simple_paths(self.graph, source, target), k))
+            except nx.NetworkXNoPath:
+                return []
+
+        return self.derived(("k_shortest", source, target, k), compute)
+
+    def critical_path(self) -> List[List[str]]:
+        """Longest dependency chain, as the strongly connected components
+        (cycles collapsed into one step) along the longest path of the
+        condensation DAG"""
+
+        def compute() -> List[List[str]]:
+            if not self.graph:
+                return []
+            condensed = nx.condensation(self.graph)
+            members = nx.get_node_attributes(condensed, "members")
+            return [sorted(members[c]) for c in nx.dag_longest_path(condensed)]
+
+        return self.derived("critical_path", compute)
+
+    def _shortest_path(self, source: str, target: str) -> List[str]:
+        try:
+            return nx.bidirectional_shortest_path(self.graph, source, target)
+        except nx.NetworkXNoPath:
+            return []
+
+    def _bfs_tree(self, source: str) -> Dict[str, Optional[str]]:
+        parents: Dict[str, Optional[str]] = {source: None}
+        queue = deque([source])
+        while queue:
+            node_id = queue.popleft()
+            for successor in self.graph.successors(node_id):
+                if successor not in parents:
+                    parents[successor] = node_id
+                    queue.append(successor)
+        return parents
+
+    @staticmethod
+    def _walk_tree(
+        parents: Dict[str, Optional[str]], source: str, target: str
+    ) -> List[str]:
+        if target not in parents:
+            return []
+        path = [target]
+        while path[-1] != source:
+            path.append(parents[path[-1]])
+        path.reverse()
+        return path
+
+    # Change tracking
+    def take_dirty(self) -> Set[str]:
+        """Nodes marked since the last call"""
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def _mark_reach_change(self, source: str, target: str) -> None:
+        # Adding or removing source -> target changes the descendants of
+        # everything that reaches source and the ancestors of everything
+        # target reaches; evaluated before the change
+        if self.track_dirty:
+            self._dirty |= {source, target} | self.ancestors(source) | self.descendants(target)
+
+    # Mutations
+    def apply(self, event: Dict[str, Any]) -> None:
+        entity, op, row = event["entity"], event["op"], event["row"]
+        if entity == "node":
+            if op == "delete":
+                self._remove_node(event["id"])
+            elif row is not None:
+                self._add_node(row)
+        elif entity == "edge":
+            if op == "delete":
+                self._remove_edge(event["id"])
+            elif row is not None:
+                self._add_edge(row)
+        else:
+            return
+        self.version += 1
+
+    def _add_node(self, node: Dict[str, Any]) -> None:
+        # Attributes only; an existing node keeps its edges and reachability
+        node_id = node["id"]
+        if node_id not in self.graph:
+            self.topology_version += 1
+            if self.track_dirty:
+                self._dirty.add(node_id)
+        else:
+            attrs = self.graph.nodes[node_id]
+            if attrs.get("type") != node.get("type", ""):
+                self.topology_version += 1
+                if self.track_dirty:
+                    self._dirty |= {node_id} | set(nx.all_neighbors(self.graph, node_id))
+            if attrs.get("label") != node.get("label", ""):
+                self.label_version += 1
+        self.graph.add_node(
+            node["id"],
+            label=node.get("label", ""),
+            type=node.get("type", ""),
+            data=node.get("data", {}),
+        )
+
+    def _remove_node(self, node_id: str) -> None:
+        if node_id not in self.graph:
+            return
+        if self.track_dirty:
+            self._dirty |= (
+                {node_id}
+                | self.ancestors(node_id)
+                | self.descendants(node_id)
+                | set(nx.all_neighbors(self.graph, node_id))
+            )
+        self._invalidate(self._descendants, {node_id})
+        self._invalidate(self._ancestors, {node_id})
+        self.topology_version += 1
+        for edge_id in self._node_edges.pop(node_id, set()):
+            ends = self._edges.pop(edge_id, None)
+            if ends is not None:
+                self._edge_counts.pop(ends, None)
+                other = ends[1] if ends[0] == node_id else ends[0]
+                self._node_edges.get(other, set()).discard(edge_id)
+        self.graph.remove_node(node_id)
+
+    def _add_edge(self, edge: Dict[str, Any]) -> None:
+        if edge["id"] in self._edges:
+            return
+        source, target = edge["source_id"], edge["target_id"]
+        self._edges[edge["id"]] = (source, target)
+        self._node_edges.setdefault(source, set()).add(edge["id"])
+        self._node_edges.setdefault(target, set()).add(edge["id"])
+        count = self._edge_counts.get((source, target), 0)
+        self._edge_counts[(source, target)] = count + 1
+        if count:
+            return
+
+        self._mark_reach_change(source, target)
+        if source not in self.graph or target not in self.graph:
+            # The edge implicitly adds a node; rare, so just drop the memos
+            self._descendants.clear()
+            self._ancestors.clear()
+        elif self._descendants or self._ancestors:
+            # Must run before the edge exists, while the memos are still valid
+            self._invalidate(self._descendants, {source} | self.ancestors(source))
+            self._invalidate(self._ancestors, {target} | self.descendants(target))
+        self.topology_version += 1
+        self.graph.add_edge(source, target, label=edge.get("label", ""))
+
+    def _remove_edge(self, edge_id: str) -> None:
+        ends = self._edges.pop(edge_id, None)
+        if ends is None:
+            return
+        for node_id in ends:
+            self._node_edges.get(node_id, set()).discard(edge_id)
+        count = self._edge_counts.get(ends, 0) - 1
+        if count > 0:
+            self._edge_counts[ends] = count
+            return
+        self._edge_counts.pop(ends, None)
+
+        source, target = ends
+        self._mark_reach_change(source, target)
+        self._invalidate(self._descendants, {source})
+        self._invalidate(self._ancestors, {target})
+        self.topology_version += 1
+        if self.graph.has_edge(source, target):
+            self.graph.remove_edge(source, target)
+
+
+class GraphCache(ProjectCacheRegistry[ProjectGraph]):
+    """Per-project dependency graphs, loaded once and then maintained from
+    storage change events. At most GRAPH_CACHE_MAX_PROJECTS are kept (LRU).
+    """
+
+    async def _load(self, project_id: str) -> ProjectGraph:
+        nodes = await self.storage.get_nodes_by_project(project_id)
+        edges = await self.storage.get_edges_by_project(project_id)
+        return ProjectGraph.build(nodes, edges)
+
+    def _apply(self, project_graph: ProjectGraph, event: Dict[str, Any]) -> None:
+        project_graph.apply(event)
+
+
+# Singleton instance
+graph_cache = GraphCache(storage_service, max_projects=settings.GRAPH_CACHE_MAX_PROJECTS)
+storage_service.add_change_listener(graph_cache.on_change)
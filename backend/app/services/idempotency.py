@@ -0,0 +1,103 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from app.config import settings
+from app.services.single_flight import SingleFlight
+from app.services.storage import storage_service
+from app.telemetry import IDEMPOTENT_REQUESTS
+
+
+class IdempotencyConflict(Exception):
+    """An idempotency key was reused for a different request"""
+
+
+def fingerprint(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Results of recent keyed requests per project.
+
+    A request repeated with the same key gets the stored result, or waits
+    for the first one while it is still running, instead of running again.
+    Results are kept for `ttl_seconds`, at most `max_keys` per project;
+    failed requests are not stored, so they can be retried.
+    """
+
+    def __init__(self, ttl_seconds: float, max_keys: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_keys = max_keys
+        # project id -> key -> (expiry, request fingerprint, result), oldest first
+        self._results: Dict[str, "OrderedDict[str, Tuple[float, str, Any]]"] = {}
+        self._running: Dict[Tuple[str, str], str] = {}
+        self._flights = SingleFlight("idempotency")
+
+    async def run(
+        self,
+        project_id: str,
+        key: str,
+        request_fingerprint: str,
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        self._expire(time.monotonic())
+        stored = self._results.get(project_id, {}).get(key)
+        if stored is not None:
+            self._check(key, stored[1], request_fingerprint)
+            IDEMPOTENT_REQUESTS.labels("replayed").inc()
+            return stored[2]
+
+        flight_key = (project_id, key)
+        running = self._running.get(flight_key)
+        if running is not None:
+            self._check(key, running, request_fingerprint)
+            IDEMPOTENT_REQUESTS.labels("attached").inc()
+        else:
+            self._running[flight_key] = request_fingerprint
+            IDEMPOTENT_REQUESTS.labels("new").inc()
+
+        async def run_and_store() -> Any:
+            try:
+                result = await call()
+            finally:
+                self._running.pop(flight_key, None)
+            self._store(project_id, key, request_fingerprint, result)
+            return result
+
+        return await self._flights.do(flight_key, run_and_store)
+
+    async def on_change(self, events: List[Dict[str, Any]]) -> None:
+        """Storage change listener"""
+        for event in events:
+            if event["entity"] == "project" and event["op"] == "delete":
+                self._results.pop(event["project_id"], None)
+
+    def _check(self, key: str, expected: str, request_fingerprint: str) -> None:
+        if expected != request_fingerprint:
+            raise IdempotencyConflict(
+                f"Idempotency key {key!r} was already used for a different request"
+            )
+
+    def _store(self, project_id: str, key: str, request_fingerprint: str, result: Any) -> None:
+        entries = self._results.setdefault(project_id, OrderedDict())
+        entries[key] = (time.monotonic() + self.ttl_seconds, request_fingerprint, result)
+        entries.move_to_end(key)
+        while len(entries) > self.max_keys:
+            entries.popitem(last=False)
+
+    def _expire(self, now: float) -> None:
+        # Entries share one TTL, so each project's oldest entries expire first
+        for project_id in list(self._results):
+            entries = self._results[project_id]
+            while entries and next(iter(entries.values()))[0] <= now:
+                entries.popitem(last=False)
+            if not entries:
+                del self._results[project_id]
+
+
+# Singleton instance
+idempotency_store = IdempotencyStore(
+    settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_KEYS
+)
+storage_service.add_change_listener(idempotency_store.on_change)
@@ -1,16 +1,46 @@
 import networkx as nx
-from typing import List, Dict, Any
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from app.services.centrality import CentralitySnapshot
+    from app.services.graph_cache import ProjectGraph
+
+
+def _bits(mask: int) -> List[int]:
+    """Indexes of the set bits of a mask"""
+    indexes = []
+    while mask:
+        low = mask & -mask
+        indexes.append(low.bit_length() - 1)
+        mask ^= low
+    return indexes
 
 
 class ImpactAnalyzer:
     def __init__(self):
         self.graph = nx.DiGraph()
+        # Memoized reachability of a cached project graph, if analysing one
+        self.reachability: Optional["ProjectGraph"] = None
+        # Betweenness/PageRank snapshot used instead of degree centrality
+        # (RISK_MODEL=centrality); nodes it does not know fall back to degree
+        self.centrality: Optional["CentralitySnapshot"] = None
+
+    @classmethod
+    def from_project_graph(cls, project_graph: "ProjectGraph") -> "ImpactAnalyzer":
+        """Analyse a cached project graph without copying or rebuilding it"""
+        analyzer = cls()
+        analyzer.graph = project_graph.graph
+        analyzer.reachability = project_graph
+        return analyzer
 
     def build_graph(
         self, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]
     ) -> None:
         """Build a directed graph from nodes and edges"""
-        self.graph.clear()
+        self.graph = nx.DiGraph()
+        self.reachability = None
 
         # Add all nodes
         for node in nodes:
@@ -27,6 +57,16 @@ class ImpactAnalyzer:
                 edge["source_id"], edge["target_id"], label=edge.get("label", "")
             )
 
+    def _descendants(self, node_id: str):
+        if self.reachability is not None:
+            return self.reachability.descendants(node_id)
+        return nx.descendants(self.graph, node_id)
+
+    def _ancestors(self, node_id: str):
+        if self.reachability is not None:
+            return self.reachability.ancestors(node_id)
+        return nx.ancestors(self.graph, node_id)
+
     def calculate_impact_score(self, node_id: str) -> int:
         """
         Calculate impact score (1-10) based on node connectivity.
@@ -34,29 +74,38 @@ class ImpactAnalyzer:
         Factors considered:
         - Number of downstream nodes (nodes that depend on this one)
         - Number of upstream nodes (nodes this one depends on)
-        - Centrality in the graph
+        - Centrality in the graph (degree, or betweenness/PageRank when a
+          centrality snapshot is set)
         - Type of connected nodes (data nodes have higher weight)
         """
         if node_id not in self.graph:
             return 1
+        return self.score_components(self.get_score_components(node_id), node_id)
 
+    def get_score_components(
+        self,
+        node_id: str,
+        downstream: Optional[int] = None,
+        upstream: Optional[int] = None,
+    ) -> Tuple[int, int, int, int]:
+        """The graph-dependent inputs of a node's impact score:
+        (downstream count, upstream count, degree, data neighbor count).
+        Reachability counts the caller already has are not recomputed."""
         # Get downstream nodes (affected by this node)
-        try:
-            downstream = len(list(nx.descendants(self.graph, node_id)))
-        except:
-            downstream = 0
+        if downstream is None:
+            try:
+                downstream = len(self._descendants(node_id))
+            except:
+                downstream = 0
 
         # Get upstream nodes (this node depends on)
-        try:
-            upstream = len(list(nx.ancestors(self.graph, node_id)))
-        except:
-            upstream = 0
+        if upstream is None:
+            try:
+                upstream = len(self._ancestors(node_id))
+            except:
+                upstream = 0
 
-        # Calculate degree centrality
-        try:
-            centrality = nx.degree_centrality(self.graph).get(node_id, 0)
-        except:
-            centrality = 0
+        degree = self.graph.degree(node_id)
 
         # Check if any connected nodes are data nodes (higher risk)
         data_node_factor = 0
@@ -67,6 +116,28 @@ class ImpactAnalyzer:
             if self.graph.nodes[neighbor].get("type") == "data":
                 data_node_factor += 1
 
+        return downstream, upstream, degree, data_node_factor
+
+    def score_components(
+        self, components: Tuple[int, int, int, int], node_id: Optional[str] = None
+    ) -> int:
+        """Impact score (1-10) from get_score_components() for the current graph size"""
+        downstream, upstream, degree, data_node_factor = components
+
+        centrality = None
+        if self.centrality is not None and node_id is not None:
+            centrality = self.centrality.score(node_id)
+        if centrality is None:
+            # Degree centrality of this node only (same definition as
+            # nx.degree_centrality, without computing it for every node)
+            total_nodes = len(self.graph)
+            centrality = degree / (total_nodes - 1) if total_nodes > 1 else 1
+
+        return self._combine_score(downstream, upstream, centrality, data_node_factor)
+
+    def _combine_score(
+        self, downstream: int, upstream: int, centrality: float, data_node_factor: int
+    ) -> int:
         # Calculate base score
         total_nodes = len(self.graph.nodes)
         if total_nodes == 0:
@@ -84,13 +155,128 @@ class ImpactAnalyzer:
         )
         return min(max(int(raw_score), 1), 10)
 
+    def _multi_source_reach(
+        self, sources: List[str], neighbors: Callable[[str], Iterable[str]]
+    ) -> Dict[str, int]:
+        """Reachability from several sources in one traversal.
+
+        Source i is bit 1 << i. Returns node -> bitmask of the sources it is
+        reachable from (a source never counts as reaching itself). A node is
+        only revisited when it gains bits it did not have, so overlapping
+        blast radii are walked once instead of once per source.
+        """
+        masks: Dict[str, int] = {}
+        own_bit = {node_id: 1 << i for i, node_id in enumerate(sources)}
+        pending: Dict[str, int] = dict(own_bit)
+        queue = deque(sources)
+
+        while queue:
+            node_id = queue.popleft()
+            bits = pending.pop(node_id, 0)
+            for neighbor in neighbors(node_id):
+                new_bits = bits & ~masks.get(neighbor, 0) & ~own_bit.get(neighbor, 0)
+                if not new_bits:
+                    continue
+                masks[neighbor] = masks.get(neighbor, 0) | new_bits
+                if neighbor not in pending:
+                    queue.append(neighbor)
+                pending[neighbor] = pending.get(neighbor, 0) | new_bits
+        return masks
+
+    def calculate_batch_impact(self, node_ids: List[str]) -> Dict[str, Any]:
+        """
+        Impact of changing several nodes together.
+
+        Returns the union of affected (downstream) nodes, a per-node risk
+        score and affected count, the nodes affected by more than one of the
+        changed nodes (overlap), pairwise overlap counts and a combined risk
+        score that scores the group as if it were a single node.
+        """
+        sources = list(dict.fromkeys(n for n in node_ids if n in self.graph))
+        downstream = self._multi_source_reach(sources, self.graph.successors)
+        upstream = self._multi_source_reach(sources, self.graph.predecessors)
+
+        affected_counts = [0] * len(sources)
+        upstream_counts = [0] * len(sources)
+        pair_counts: Dict[tuple, int] = {}
+        overlap_nodes = []
+        for node_id, mask in downstream.items():
+            members = _bits(mask)
+            for i in members:
+                affected_counts[i] += 1
+            if len(members) > 1:
+                overlap_nodes.append(node_id)
+                for a in range(len(members)):
+                    for b in range(a + 1, len(members)):
+                        key = (members[a], members[b])
+                        pair_counts[key] = pair_counts.get(key, 0) + 1
+        for mask in upstream.values():
+            for i in _bits(mask):
+                upstream_counts[i] += 1
+
+        # Per-node scores from the counts above, without another traversal
+        # per node
+        per_node = [
+            {
+                "node_id": node_id,
+                "risk_score": self.score_components(
+                    self.get_score_components(
+                        node_id,
+                        downstream=affected_counts[i],
+                        upstream=upstream_counts[i],
+                    ),
+                    node_id,
+                ),
+                "affected_count": affected_counts[i],
+            }
+            for i, node_id in enumerate(sources)
+        ]
+
+        combined_score = 1
+        if sources:
+            group = set(sources)
+            data_neighbors = {
+                neighbor
+                for node_id in sources
+                for neighbor in nx.all_neighbors(self.graph, node_id)
+                if neighbor not in group
+                and self.graph.nodes[neighbor].get("type") == "data"
+            }
+            total_nodes = len(self.graph.nodes)
+            # Same centrality as the single-node score: the snapshot when one
+            # is set (RISK_MODEL=centrality), degree for nodes it does not know
+            centralities = []
+            for n in sources:
+                score = None
+                if self.centrality is not None:
+                    score = self.centrality.score(n)
+                if score is None:
+                    degree = self.graph.degree(n)
+                    score = degree / (total_nodes - 1) if total_nodes > 1 else 0
+                centralities.append(score)
+            centrality = max(centralities)
+            combined_score = self._combine_score(
+                len(downstream), len(upstream), centrality, len(data_neighbors)
+            )
+
+        return {
+            "risk_score": combined_score,
+            "affected_nodes": list(downstream),
+            "per_node": per_node,
+            "overlap_nodes": overlap_nodes,
+            "overlaps": [
+                {"node_a": sources[a], "node_b": sources[b], "shared_count": count}
+                for (a, b), count in pair_counts.items()
+            ],
+        }
+
     def get_affected_nodes(self, node_id: str) -> List[str]:
         """Get all nodes that would be affected by changing this node"""
         if node_id not in self.graph:
             return []
 
         try:
-            descendants = list(nx.descendants(self.graph, node_id))
+            descendants = list(self._descendants(node_id))
             return descendants
         except:
             return []
@@ -101,7 +287,7 @@ class ImpactAnalyzer:
             return []
 
         try:
-            return list(nx.descendants(self.graph, node_id))
+            return list(self._descendants(node_id))
         except:
             return []
 
@@ -111,7 +297,7 @@ class ImpactAnalyzer:
             return []
 
         try:
-            return list(nx.ancestors(self.graph, node_id))
+            return list(self._ancestors(node_id))
         except:
             return []
 
@@ -119,8 +305,36 @@ class ImpactAnalyzer:
         """Get the shortest path between two nodes"""
         if source_id not in self.graph or target_id not in self.graph:
             return []
+        if self.reachability is not None:
+            return self.reachability.shortest_path(source_id, target_id)
 
         try:
             return list(nx.shortest_path(self.graph, source_id, target_id))
         except nx.NetworkXNoPath:
             return []
+
+    def get_k_shortest_paths(
+        self, source_id: str, target_id: str, k: int
+    ) -> List[List[str]]:
+        """Get up to k shortest simple paths between two nodes, shortest first"""
+        if source_id not in self.graph or target_id not in self.graph:
+            return []
+        if self.reachability is not None:
+            return self.reachability.k_shortest_paths(source_id, target_id, k)
+
+        try:
+            return list(islice(nx.shortest_simple_paths(self.graph, source_id, target_id), k))
+        except nx.NetworkXNoPath:
+            return []
+
+    def get_critical_path(self) -> List[List[str]]:
+        """Get the longest dependency chain through the DAG of strongly
+        connected components, as the list of components along it"""
+        if self.reachability is not None:
+            return self.reachability.critical_path()
+        if not self.graph:
+            return []
+
+        condensed = nx.condensation(self.graph)
+        members = nx.get_node_attributes(condensed, "members")
+        return [sorted(members[c]) for c in nx.dag_longest_path(condensed)]
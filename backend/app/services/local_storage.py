@@ -0,0 +1,560 @@
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Dict, Any
+
+from app.config import settings
+from app.telemetry import instrumented
+from app.services.storage import PROJECT_TABLES, StorageService
+from app.models.project import ProjectCreate, ProjectUpdate
+from app.models.node import NodeCreate, NodeUpdate, EdgeCreate
+from app.models.chat import ChatMessageCreate
+
+# Mirrors backend/schema.sql, minus Supabase-specific parts
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    version TEXT DEFAULT '0.0.1',
+    risk_score INTEGER DEFAULT 0,
+    revision INTEGER DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    project_id TEXT REFERENCES projects(id) ON DELETE CASCADE,
+    type TEXT NOT NULL CHECK (type IN ('action', 'function', 'data')),
+    label TEXT NOT NULL,
+    position_x REAL DEFAULT 0,
+    position_y REAL DEFAULT 0,
+    data TEXT DEFAULT '{}',
+    status TEXT DEFAULT 'idle' CHECK (status IN ('idle', 'working', 'completed', 'error')),
+    revision INTEGER,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS edges (
+    id TEXT PRIMARY KEY,
+    project_id TEXT REFERENCES projects(id) ON DELETE CASCADE,
+    source_id TEXT REFERENCES nodes(id) ON DELETE CASCADE,
+    target_id TEXT REFERENCES nodes(id) ON DELETE CASCADE,
+    label TEXT,
+    revision INTEGER,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    id TEXT PRIMARY KEY,
+    project_id TEXT REFERENCES projects(id) ON DELETE CASCADE,
+    role TEXT NOT NULL CHECK (role IN ('user', 'assistant', 'system')),
+    content TEXT NOT NULL,
+    agent_type TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    project_id TEXT PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    data TEXT NOT NULL DEFAULT '{}',
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS project_changes (
+    project_id TEXT REFERENCES projects(id) ON DELETE CASCADE,
+    revision INTEGER NOT NULL,
+    entity TEXT NOT NULL,
+    op TEXT NOT NULL,
+    entity_id TEXT NOT NULL,
+    data TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (project_id, revision)
+);
+
+CREATE INDEX IF NOT EXISTS idx_project_changes_entity_id ON project_changes(entity_id);
+CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at);
+CREATE INDEX IF NOT EXISTS idx_nodes_project_id ON nodes(project_id);
+CREATE INDEX IF NOT EXISTS idx_edges_project_id ON edges(project_id);
+CREATE INDEX IF NOT EXISTS idx_edges_source_id ON edges(source_id);
+CREATE INDEX IF NOT EXISTS idx_edges_target_id ON edges(target_id);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_project_created
+    ON chat_messages(project_id, created_at);
+"""
+
+
+# Change-log triggers: every node/edge write and project edit is logged in
+# the transaction of the write itself, and inserted/updated rows are stamped
+# with the revision of their change. {retention} is CHANGE_LOG_RETENTION.
+LOGGED_COLUMNS = {
+    "node": (
+        "nodes",
+        ("id", "project_id", "type", "label", "position_x", "position_y", "data",
+         "status", "created_at", "updated_at"),
+    ),
+    "edge": ("edges", ("id", "project_id", "source_id", "target_id", "label", "created_at")),
+}
+
+CHANGE_LOG_TRIGGER = """
+DROP TRIGGER IF EXISTS log_{table}_{op};
+CREATE TRIGGER log_{table}_{op} AFTER {event} ON {table}
+BEGIN
+    UPDATE projects SET revision = revision + 1 WHERE id = {row}.project_id;
+{stamp}    INSERT INTO project_changes
+        (project_id, revision, entity, op, entity_id, data, created_at)
+    SELECT id, revision, '{entity}', '{op}', {row}.id, {data},
+        strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+    FROM projects WHERE id = {row}.project_id;
+    DELETE FROM project_changes
+    WHERE project_id = {row}.project_id
+        AND revision <= (SELECT revision FROM projects WHERE id = {row}.project_id) - {retention};
+END;
+"""
+
+PROJECT_UPDATE_TRIGGER = """
+DROP TRIGGER IF EXISTS log_projects_update;
+CREATE TRIGGER log_projects_update AFTER UPDATE OF name, description, version ON projects
+WHEN OLD.name IS NOT NEW.name
+    OR OLD.description IS NOT NEW.description
+    OR OLD.version IS NOT NEW.version
+BEGIN
+    UPDATE projects SET revision = revision + 1 WHERE id = NEW.id;
+    INSERT INTO project_changes
+        (project_id, revision, entity, op, entity_id, data, created_at)
+    SELECT id, revision, 'project', 'update', id,
+        json_object('id', id, 'name', name, 'description', description,
+            'version', version, 'risk_score', risk_score, 'revision', revision,
+            'created_at', created_at, 'updated_at', updated_at),
+        strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')
+    FROM projects WHERE id = NEW.id;
+    DELETE FROM project_changes
+    WHERE project_id = NEW.id
+        AND revision <= (SELECT revision FROM projects WHERE id = NEW.id) - {retention};
+END;
+"""
+
+
+def _change_log_triggers(retention: int) -> str:
+    scripts = [PROJECT_UPDATE_TRIGGER.format(retention=retention)]
+    for entity, (table, columns) in LOGGED_COLUMNS.items():
+        for op, event, row in (
+            ("create", "INSERT", "NEW"),
+            # Not fired by the revision stamp itself
+            ("update", f"UPDATE OF {', '.join(columns)}", "NEW"),
+            ("delete", "DELETE", "OLD"),
+        ):
+            data = "NULL"
+            stamp = ""
+            if op != "delete":
+                fields = ", ".join(
+                    f"'{c}', json(NEW.{c})" if c == "data" else f"'{c}', NEW.{c}"
+                    for c in columns
+                )
+                data = f"json_object({fields}, 'revision', revision)"
+                stamp = (
+                    f"    UPDATE {table} SET revision = (SELECT revision FROM projects"
+                    f" WHERE id = NEW.project_id) WHERE id = NEW.id;\n"
+                )
+            scripts.append(
+                CHANGE_LOG_TRIGGER.format(
+                    table=table,
+                    op=op,
+                    event=event,
+                    row=row,
+                    stamp=stamp,
+                    entity=entity,
+                    data=data,
+                    retention=retention,
+                )
+            )
+    return "".join(scripts)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+class SQLiteStorageService(StorageService):
+    """Local SQLite implementation of the storage interface.
+
+    Used for local development, CI, load tests and air-gapped installs.
+    A single connection is shared and guarded by a lock; path ":memory:"
+    gives a throwaway database.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        super().__init__()
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database file was first created, and
+        (re)create the change-log triggers with the current retention"""
+        for table, column in (
+            ("projects", "revision INTEGER DEFAULT 0"),
+            ("nodes", "revision INTEGER"),
+            ("edges", "revision INTEGER"),
+        ):
+            columns = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if "revision" not in columns:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+                self.conn.commit()
+        self.conn.executescript(_change_log_triggers(settings.CHANGE_LOG_RETENTION))
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        with self._lock, self.conn:
+            return self.conn.execute(sql, params).rowcount
+
+    def _insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        values = tuple(
+            json.dumps(v) if isinstance(v, dict) else v for v in row.values()
+        )
+        # Read back in the same transaction, with the revision it was logged under
+        with self._lock, self.conn:
+            self.conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", values)
+            result = self.conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row["id"],))
+            return self._to_dict(result.fetchone())
+
+    def _update(
+        self, table: str, row_id: str, values: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        assignments = ", ".join(f"{k} = ?" for k in values)
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"UPDATE {table} SET {assignments} WHERE id = ?", (*values.values(), row_id)
+            )
+            result = self.conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,))
+            row = result.fetchone()
+        return self._to_dict(row) if row else None
+
+    def _with_delete_revisions(
+        self, entity: str, rows: List[sqlite3.Row]
+    ) -> List[Dict[str, Any]]:
+        """The deleted rows with the revision their delete was logged under;
+        called in the delete's transaction"""
+        rows = [dict(row) for row in rows]
+        if not rows:
+            return rows
+        placeholders = ", ".join("?" for _ in rows)
+        logged = {
+            entity_id: revision
+            for entity_id, revision in self.conn.execute(
+                f"SELECT entity_id, revision FROM project_changes "
+                f"WHERE entity = ? AND op = 'delete' AND entity_id IN ({placeholders})",
+                (entity, *(row["id"] for row in rows)),
+            )
+        }
+        return [{**row, "revision": logged.get(row["id"])} for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        result = dict(row)
+        if isinstance(result.get("data"), str):
+            result["data"] = json.loads(result["data"])
+        return result
+
+    # Change log
+    @instrumented("get_changes_since")
+    async def get_changes_since(
+        self, project_id: str, since: int, limit: int = 1000
+    ) -> Optional[Dict[str, Any]]:
+        project = self._query("SELECT revision FROM projects WHERE id = ?", (project_id,))
+        if not project:
+            return None
+        rows = self._query(
+            "SELECT revision, entity, op, entity_id AS id, data FROM project_changes "
+            "WHERE project_id = ? AND revision > ? ORDER BY revision LIMIT ?",
+            (project_id, since, limit),
+        )
+        return {"revision": project[0]["revision"], "changes": rows}
+
+    # Project operations
+    @instrumented("create_project")
+    async def create_project(self, project: ProjectCreate) -> Dict[str, Any]:
+        now = _now()
+        row = self._insert(
+            "projects",
+            {
+                "id": _new_id(),
+                "name": project.name,
+                "description": project.description,
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+        await self._emit_rows("project", "create", [row])
+        return row
+
+    @instrumented("list_projects")
+    async def list_projects(self) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM projects ORDER BY created_at DESC")
+
+    @instrumented("get_project")
+    async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM projects WHERE id = ?", (project_id,))
+        return rows[0] if rows else None
+
+    @instrumented("update_project")
+    async def update_project(
+        self, project_id: str, project: ProjectUpdate
+    ) -> Optional[Dict[str, Any]]:
+        update_data = {k: v for k, v in project.model_dump().items() if v is not None}
+        if not update_data:
+            return await self.get_project(project_id)
+        update_data["updated_at"] = _now()
+        row = self._update("projects", project_id, update_data)
+        await self._emit_rows("project", "update", [row] if row else [])
+        return row
+
+    @instrumented("set_risk_score")
+    async def set_risk_score(self, project_id: str, risk_score: int) -> None:
+        self._execute(
+            "UPDATE projects SET risk_score = ? WHERE id = ?", (risk_score, project_id)
+        )
+        row = await self.get_project(project_id)
+        await self._emit_rows("project", "update", [row] if row else [], record=False)
+
+    @instrumented("delete_project")
+    async def delete_project(self, project_id: str) -> None:
+        rows = self._query("SELECT id FROM projects WHERE id = ?", (project_id,))
+        self._execute("DELETE FROM projects WHERE id = ?", (project_id,))
+        await self._emit_rows("project", "delete", rows)
+
+    # Node operations
+    @instrumented("create_node")
+    async def create_node(self, node: NodeCreate) -> Dict[str, Any]:
+        now = _now()
+        row = self._insert(
+            "nodes",
+            {
+                "id": _new_id(),
+                "project_id": str(node.project_id),
+                "type": node.type.value,
+                "label": node.label,
+                "position_x": node.position_x,
+                "position_y": node.position_y,
+                "data": node.data,
+                "created_at": now,
+                "updated_at": now,
+            },
+        )
+        await self._emit_rows("node", "create", [row])
+        return row
+
+    @instrumented("get_node")
+    async def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM nodes WHERE id = ?", (node_id,))
+        return rows[0] if rows else None
+
+    @instrumented("get_nodes_by_project")
+    async def get_nodes_by_project(self, project_id: str) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM nodes WHERE project_id = ?", (project_id,))
+
+    @instrumented("update_node")
+    async def update_node(
+        self, node_id: str, node: NodeUpdate
+    ) -> Optional[Dict[str, Any]]:
+        update_data = {}
+        if node.label is not None:
+            update_data["label"] = node.label
+        if node.position_x is not None:
+            update_data["position_x"] = node.position_x
+        if node.position_y is not None:
+            update_data["position_y"] = node.position_y
+        if node.data is not None:
+            update_data["data"] = json.dumps(node.data)
+        if node.status is not None:
+            update_data["status"] = node.status.value
+
+        if not update_data:
+            return await self.get_node(node_id)
+
+        update_data["updated_at"] = _now()
+        row = self._update("nodes", node_id, update_data)
+        await self._emit_rows("node", "update", [row] if row else [])
+        return row
+
+    @instrumented("delete_nodes_batch")
+    async def delete_nodes_batch(self, node_ids: list[str]) -> Dict[str, List[str]]:
+        if not node_ids:
+            return {"node_ids": [], "edge_ids": []}
+        placeholders = ", ".join("?" for _ in node_ids)
+        params = tuple(node_ids)
+        with self._lock, self.conn:
+            nodes = self.conn.execute(
+                f"SELECT id, project_id FROM nodes WHERE id IN ({placeholders})", params
+            ).fetchall()
+            edges = self.conn.execute(
+                f"SELECT id, project_id FROM edges "
+                f"WHERE source_id IN ({placeholders}) OR target_id IN ({placeholders})",
+                params * 2,
+            ).fetchall()
+            self.conn.execute(
+                f"DELETE FROM edges "
+                f"WHERE source_id IN ({placeholders}) OR target_id IN ({placeholders})",
+                params * 2,
+            )
+            self.conn.execute(f"DELETE FROM nodes WHERE id IN ({placeholders})", params)
+            edges = self._with_delete_revisions("edge", edges)
+            nodes = self._with_delete_revisions("node", nodes)
+
+        await self._emit_events(
+            self._row_events("edge", "delete", edges) + self._row_events("node", "delete", nodes)
+        )
+        return {
+            "node_ids": [row["id"] for row in nodes],
+            "edge_ids": [row["id"] for row in edges],
+        }
+
+    # Edge operations
+    @instrumented("create_edge")
+    async def create_edge(self, edge: EdgeCreate) -> Dict[str, Any]:
+        row = self._insert(
+            "edges",
+            {
+                "id": _new_id(),
+                "project_id": str(edge.project_id),
+                "source_id": str(edge.source_id),
+                "target_id": str(edge.target_id),
+                "label": edge.label,
+                "created_at": _now(),
+            },
+        )
+        await self._emit_rows("edge", "create", [row])
+        return row
+
+    @instrumented("get_edges_by_project")
+    async def get_edges_by_project(self, project_id: str) -> List[Dict[str, Any]]:
+        return self._query("SELECT * FROM edges WHERE project_id = ?", (project_id,))
+
+    @instrumented("delete_edge")
+    async def delete_edge(self, edge_id: str) -> None:
+        with self._lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT id, project_id FROM edges WHERE id = ?", (edge_id,)
+            ).fetchall()
+            self.conn.execute("DELETE FROM edges WHERE id = ?", (edge_id,))
+            rows = self._with_delete_revisions("edge", rows)
+        await self._emit_rows("edge", "delete", rows)
+
+    # Bulk operations (export / import)
+    @instrumented("get_project_rows_page")
+    async def get_project_rows_page(
+        self, table: str, project_id: str, after_id: Optional[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        if table not in PROJECT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        return self._query(
+            f"SELECT * FROM {table} WHERE project_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (project_id, after_id or "", limit),
+        )
+
+    @instrumented("insert_rows_batch")
+    async def insert_rows_batch(
+        self, table: str, rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if table not in PROJECT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if not rows:
+            return []
+        now = _now()
+        rows = [{"created_at": now, **row} for row in rows]
+        if table == "nodes":
+            rows = [{"updated_at": now, **row} for row in rows]
+
+        columns = list(rows[0])
+        placeholders = ", ".join("?" for _ in columns)
+        values = [
+            tuple(
+                json.dumps(row.get(c)) if isinstance(row.get(c), dict) else row.get(c)
+                for c in columns
+            )
+            for row in rows
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                values,
+            )
+        if PROJECT_TABLES[table]:
+            await self._emit_rows(PROJECT_TABLES[table], "create", rows, record=False)
+        return rows
+
+    # Chat operations
+    @instrumented("create_chat_message")
+    async def create_chat_message(self, message: ChatMessageCreate) -> Dict[str, Any]:
+        return self._insert(
+            "chat_messages",
+            {
+                "id": _new_id(),
+                "project_id": str(message.project_id),
+                "role": message.role,
+                "content": message.content,
+                "agent_type": message.agent_type,
+                "created_at": _now(),
+            },
+        )
+
+    @instrumented("get_chat_history")
+    async def get_chat_history(
+        self, project_id: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT * FROM chat_messages WHERE project_id = ? "
+            "ORDER BY created_at ASC, rowid ASC LIMIT ?",
+            (project_id, limit),
+        )
+
+    @instrumented("get_recent_chat_history")
+    async def get_recent_chat_history(
+        self, project_id: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT * FROM chat_messages WHERE project_id = ? "
+            "ORDER BY created_at DESC, rowid DESC LIMIT ?",
+            (project_id, limit),
+        )
+        rows.reverse()
+        return rows
+
+    @instrumented("get_conversation_summary")
+    async def get_conversation_summary(self, project_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT * FROM conversation_summaries WHERE project_id = ?", (project_id,)
+        )
+        return rows[0] if rows else None
+
+    @instrumented("save_conversation_summary")
+    async def save_conversation_summary(
+        self, project_id: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        row = {"project_id": project_id, "data": data, "updated_at": _now()}
+        self._execute(
+            "INSERT INTO conversation_summaries (project_id, data, updated_at) "
+            "VALUES (?, ?, ?) ON CONFLICT (project_id) "
+            "DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+            (project_id, json.dumps(data), row["updated_at"]),
+        )
+        return row
@@ -0,0 +1,284 @@
+"""Streaming project export/import.
+
+An archive is gzip-compressed NDJSON, one record per line:
+
+    {"type": "header", "format": "ai-sync-project", "version": 1}
+    {"type": "project", "data": {...}}
+    {"type": "node", "data": {...}}          (all nodes before any edge)
+    {"type": "edge", "data": {...}}
+    {"type": "chat_message", "data": {...}}
+
+Export pages through the tables with keyset paging and compresses as it
+goes; import decompresses the request body incrementally and bulk-inserts
+in batches, so server memory does not grow with the archive size (apart
+from the old -> new node id map). Imports stop once the decompressed archive
+exceeds IMPORT_MAX_BYTES, so a small crafted upload cannot expand without
+bound.
+"""
+
+import json
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.config import settings
+from app.models.project import ProjectCreate, ProjectUpdate
+from app.services.chat_buffer import chat_buffer
+from app.services.storage import StorageService
+
+ARCHIVE_FORMAT = "ai-sync-project"
+ARCHIVE_VERSION = 1
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Most bytes one decompress call may produce
+INFLATE_CHUNK = 64 * 1024
+
+# (table, record type) in archive order; edges need every node id first
+EXPORT_ORDER = (("nodes", "node"), ("edges", "edge"), ("chat_messages", "chat_message"))
+
+# Imported columns and their defaults; every row of a batch has the same keys
+NODE_COLUMNS = {
+    "type": None,
+    "label": None,
+    "position_x": 0,
+    "position_y": 0,
+    "data": {},
+    "status": "idle",
+}
+CHAT_COLUMNS = {"role": None, "content": None, "agent_type": None, "created_at": None}
+
+
+def _pick(data: Dict[str, Any], columns: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: default if data.get(k) is None else data[k] for k, default in columns.items()}
+
+
+class ArchiveError(ValueError):
+    """The uploaded archive is malformed"""
+
+
+class ArchiveTooLarge(ArchiveError):
+    """The uploaded archive decompresses to more than IMPORT_MAX_BYTES"""
+
+
+def _line(record_type: str, data: Optional[Dict[str, Any]] = None, **extra: Any) -> bytes:
+    record = {"type": record_type, **extra}
+    if data is not None:
+        record["data"] = data
+    return json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+async def export_project(
+    storage: StorageService, project: Dict[str, Any]
+) -> AsyncIterator[bytes]:
+    """Yield the gzip-compressed archive of a project chunk by chunk"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    page_size = settings.EXPORT_PAGE_SIZE
+
+    header = _line("header", format=ARCHIVE_FORMAT, version=ARCHIVE_VERSION)
+    meta = {k: project.get(k) for k in ("name", "description", "version", "risk_score")}
+    chunk = compressor.compress(header + _line("project", meta))
+    if chunk:
+        yield chunk
+
+    for table, record_type in EXPORT_ORDER:
+        if table == "chat_messages":
+            # Write out messages still waiting in the write-behind buffer
+            await chat_buffer.flush()
+        after_id = None
+        while True:
+            rows = await storage.get_project_rows_page(
+                table, project["id"], after_id, page_size
+            )
+            if not rows:
+                break
+            after_id = rows[-1]["id"]
+            for row in rows:
+                row.pop("project_id", None)
+            chunk = compressor.compress(b"".join(_line(record_type, row) for row in rows))
+            if chunk:
+                yield chunk
+            if len(rows) < page_size:
+                break
+
+    yield compressor.flush()
+
+
+async def _iter_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Dict[str, Any]]:
+    """Parse NDJSON records from a (optionally gzip-compressed) byte stream"""
+    decompressor = None
+    detected = False
+    pending = b""
+    buffer = b""
+    total = 0
+
+    async for chunk in chunks:
+        if not detected:
+            pending += chunk
+            if len(pending) < len(GZIP_MAGIC):
+                continue
+            chunk, pending, detected = pending, b"", True
+            if chunk.startswith(GZIP_MAGIC):
+                decompressor = zlib.decompressobj(31)
+        if decompressor is not None:
+            # Inflate in bounded steps, checking the total after each one
+            pieces = []
+            while chunk:
+                try:
+                    piece = decompressor.decompress(chunk, INFLATE_CHUNK)
+                except zlib.error as e:
+                    raise ArchiveError(f"Invalid gzip data: {e}")
+                total += len(piece)
+                if total > settings.IMPORT_MAX_BYTES:
+                    break
+                pieces.append(piece)
+                chunk = decompressor.unconsumed_tail
+            chunk = b"".join(pieces)
+        else:
+            total += len(chunk)
+        if total > settings.IMPORT_MAX_BYTES:
+            raise ArchiveTooLarge(
+                f"Archive exceeds {settings.IMPORT_MAX_BYTES} bytes uncompressed"
+            )
+
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield _parse(line)
+
+    buffer = pending + buffer
+    if buffer.strip():
+        yield _parse(buffer)
+
+
+def _parse(line: bytes) -> Dict[str, Any]:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise ArchiveError(f"Invalid archive line: {e}")
+    if not isinstance(record, dict) or "type" not in record:
+        raise ArchiveError("Archive records must be objects with a type")
+    return record
+
+
+async def _next_record(records: AsyncIterator[Dict[str, Any]]) -> Dict[str, Any]:
+    try:
+        return await records.__anext__()
+    except StopAsyncIteration:
+        raise ArchiveError("Archive is truncated")
+
+
+class _Importer:
+    """Buffers imported rows per table and inserts them in batches"""
+
+    def __init__(self, storage: StorageService, project_id: str):
+        self.storage = storage
+        self.project_id = project_id
+        self.node_ids: Dict[str, str] = {}
+        self.batches: Dict[str, List[Dict[str, Any]]] = {
+            table: [] for table, _ in EXPORT_ORDER
+        }
+        self.counts: Dict[str, int] = {table: 0 for table, _ in EXPORT_ORDER}
+
+    async def add(self, record_type: str, data: Dict[str, Any]) -> None:
+        if record_type == "node":
+            await self._add_node(data)
+        elif record_type == "edge":
+            await self._add_edge(data)
+        elif record_type == "chat_message":
+            row = _pick(data, CHAT_COLUMNS)
+            row["created_at"] = row["created_at"] or datetime.now(timezone.utc).isoformat()
+            await self._append("chat_messages", {"id": str(uuid.uuid4()), **row})
+        else:
+            raise ArchiveError(f"Unknown record type: {record_type}")
+
+    async def _add_node(self, data: Dict[str, Any]) -> None:
+        if self.counts["edges"] or self.batches["edges"]:
+            raise ArchiveError("Node records must come before edge records")
+        new_id = str(uuid.uuid4())
+        if data.get("id"):
+            self.node_ids[str(data["id"])] = new_id
+        await self._append("nodes", {"id": new_id, **_pick(data, NODE_COLUMNS)})
+
+    async def _add_edge(self, data: Dict[str, Any]) -> None:
+        # The node batch must be written before edges can reference it
+        await self._flush("nodes")
+        source_id = self.node_ids.get(str(data.get("source_id")))
+        target_id = self.node_ids.get(str(data.get("target_id")))
+        if source_id is None or target_id is None:
+            raise ArchiveError("Edge references a node that is not in the archive")
+        row = {
+            "id": str(uuid.uuid4()),
+            "source_id": source_id,
+            "target_id": target_id,
+            "label": data.get("label"),
+        }
+        await self._append("edges", row)
+
+    async def _append(self, table: str, row: Dict[str, Any]) -> None:
+        row["project_id"] = self.project_id
+        self.batches[table].append(row)
+        if len(self.batches[table]) >= settings.IMPORT_BATCH_SIZE:
+            await self._flush(table)
+
+    async def _flush(self, table: str) -> None:
+        batch = self.batches[table]
+        if batch:
+            self.batches[table] = []
+            await self.storage.insert_rows_batch(table, batch)
+            self.counts[table] += len(batch)
+
+    async def finish(self) -> Dict[str, int]:
+        for table, _ in EXPORT_ORDER:
+            await self._flush(table)
+        return self.counts
+
+
+async def import_project(
+    storage: StorageService, chunks: AsyncIterator[bytes], name: Optional[str] = None
+) -> Dict[str, Any]:
+    """Create a new project from an archive stream.
+
+    Node and edge ids are regenerated, so the same archive can be imported
+    any number of times (e.g. to clone a template). If anything fails, the
+    partially imported project is deleted.
+    """
+    records = _iter_records(chunks)
+    header = await _next_record(records)
+    if header.get("type") != "header" or header.get("format") != ARCHIVE_FORMAT:
+        raise ArchiveError("Not an ai-sync-project archive")
+    if header.get("version") != ARCHIVE_VERSION:
+        raise ArchiveError(f"Unsupported archive version: {header.get('version')}")
+
+    record = await _next_record(records)
+    meta = record.get("data") or {}
+    if record["type"] != "project" or not isinstance(meta, dict):
+        raise ArchiveError("Archive must start with a project record after the header")
+    project = await storage.create_project(
+        ProjectCreate(
+            name=name or meta.get("name") or "Imported project",
+            description=meta.get("description"),
+        )
+    )
+    try:
+        importer = _Importer(storage, project["id"])
+        async for record in records:
+            await importer.add(record["type"], record.get("data") or {})
+        counts = await importer.finish()
+
+        extra = {k: meta[k] for k in ("version", "risk_score") if meta.get(k) is not None}
+        if extra:
+            project = await storage.update_project(project["id"], ProjectUpdate(**extra))
+    except BaseException:
+        await storage.delete_project(project["id"])
+        raise
+
+    return {
+        "project": project,
+        "nodes": counts["nodes"],
+        "edges": counts["edges"],
+        "chat_messages": counts["chat_messages"],
+    }
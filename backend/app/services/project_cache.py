@@ -0,0 +1,72 @@
+import asyncio
+from collections import OrderedDict
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+from app.services.storage import StorageService
+
+T = TypeVar("T")
+
+
+class ProjectCacheRegistry(Generic[T]):
+    """Per-project in-memory structures, loaded on first use and kept in sync
+    with storage change events. At most `max_projects` are kept (LRU).
+
+    Subclasses implement _load() to build a project's structure from storage
+    and _apply() to fold one change event into it.
+    """
+
+    def __init__(self, storage: StorageService, max_projects: int):
+        self.storage = storage
+        self.max_projects = max_projects
+        self._entries: "OrderedDict[str, T]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Changes that arrive while a project is being loaded
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def _load(self, project_id: str) -> T:
+        raise NotImplementedError
+
+    def _apply(self, entry: T, event: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def peek(self, project_id: str) -> Optional[T]:
+        """The cached structure, if the project is loaded"""
+        return self._entries.get(project_id)
+
+    async def get(self, project_id: str) -> T:
+        entry = self._entries.get(project_id)
+        if entry is not None:
+            self._entries.move_to_end(project_id)
+            return entry
+
+        lock = self._locks.setdefault(project_id, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(project_id)
+            if entry is None:
+                self._pending[project_id] = []
+                try:
+                    entry = await self._load(project_id)
+                finally:
+                    pending = self._pending.pop(project_id)
+                for event in pending:
+                    self._apply(entry, event)
+                self._entries[project_id] = entry
+                while len(self._entries) > self.max_projects:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._locks.pop(evicted, None)
+        return entry
+
+    async def on_change(self, events: List[Dict[str, Any]]) -> None:
+        """Storage change listener"""
+        for event in events:
+            project_id = event["project_id"]
+            if event["entity"] == "project":
+                if event["op"] == "delete":
+                    self._entries.pop(project_id, None)
+                continue
+            if project_id in self._pending:
+                self._pending[project_id].append(event)
+                continue
+            entry = self._entries.get(project_id)
+            if entry is not None:
+                self._apply(entry, event)
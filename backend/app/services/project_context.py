@@ -0,0 +1,142 @@
+"""Compact project summaries sent to the agents with every run.
+
+The summary lists the most important nodes of the cached project graph
+(by risk score, then degree) with their labels, types and scores, the edges
+between them, node type counts and risk hotspots, cut off at
+PROJECT_CONTEXT_MAX_TOKENS so prompts stay small on huge projects. It is
+cached per graph topology version, node label version and risk score
+version, so moving nodes around never rebuilds it; after a change that can
+alter its content it is rebuilt in full, picking the top nodes with a heap
+rather than sorting the whole graph.
+"""
+
+import heapq
+import json
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from app.config import settings
+from app.services.graph_cache import graph_cache
+from app.services.risk_scores import risk_score_service
+from app.services.storage import storage_service
+from app.services.tokens import estimate_tokens
+
+MAX_LABEL_CHARS = 60
+HOTSPOT_MIN_SCORE = 7
+MAX_HOTSPOTS = 10
+
+
+def _tokens(value: Any) -> int:
+    """Rough token estimate of `value` as JSON"""
+    return estimate_tokens(json.dumps(value, ensure_ascii=False))
+
+
+class ProjectContextService:
+    def __init__(self):
+        self._cache: Dict[str, Tuple[Tuple[int, int, int, int], Dict[str, Any]]] = {}
+
+    async def get(self, project_id: str) -> Dict[str, Any]:
+        project_graph = await graph_cache.get(project_id)
+        project_risk = (
+            await risk_score_service.get(project_id) if settings.RISK_SCORE_TRACKING else None
+        )
+        key = (
+            project_graph.uid,
+            project_graph.topology_version,
+            project_graph.label_version,
+            project_risk.version if project_risk is not None else -1,
+        )
+        cached = self._cache.get(project_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        scores = project_risk.scores if project_risk is not None else {}
+        context = self._build(project_graph.graph, scores, settings.PROJECT_CONTEXT_MAX_TOKENS)
+        context["version"] = project_graph.version
+        self._cache[project_id] = (key, context)
+
+        # Drop summaries whose graph is no longer cached
+        for tracked in list(self._cache):
+            if graph_cache.peek(tracked) is None:
+                del self._cache[tracked]
+        return context
+
+    async def on_change(self, events: List[Dict[str, Any]]) -> None:
+        """Storage change listener"""
+        for event in events:
+            if event["entity"] == "project" and event["op"] == "delete":
+                self._cache.pop(event["project_id"], None)
+
+    def _build(self, graph: Any, scores: Dict[str, int], max_tokens: int) -> Dict[str, Any]:
+        degree = dict(graph.degree)
+        context: Dict[str, Any] = {
+            "node_count": graph.number_of_nodes(),
+            "edge_count": graph.number_of_edges(),
+            "type_counts": dict(Counter(graph.nodes[node_id].get("type") or "" for node_id in graph)),
+            "nodes": [],
+            "edges": [],
+            "hotspots": [],
+            "truncated": False,
+        }
+        budget = max_tokens - _tokens(context)
+
+        # Nodes take up to three quarters of the budget, edges between them
+        # the rest
+        ranked = heapq.nlargest(
+            settings.PROJECT_CONTEXT_MAX_NODES,
+            graph.nodes,
+            key=lambda node_id: (scores.get(node_id, 0), degree[node_id]),
+        )
+        index: Dict[str, int] = {}
+        node_budget = budget * 3 // 4
+        for node_id in ranked:
+            attrs = graph.nodes[node_id]
+            entry = {
+                "label": (attrs.get("label") or "")[:MAX_LABEL_CHARS],
+                "type": attrs.get("type") or "",
+                "degree": degree[node_id],
+            }
+            if node_id in scores:
+                entry["risk"] = scores[node_id]
+            cost = _tokens(entry)
+            if cost > node_budget:
+                break
+            node_budget -= cost
+            budget -= cost
+            index[node_id] = len(index)
+            context["nodes"].append(entry)
+
+        # Edges refer to nodes by their index in "nodes"; the ones between
+        # the most important nodes come first
+        edges = heapq.nsmallest(
+            settings.PROJECT_CONTEXT_MAX_NODES,
+            (
+                [index[source], index[target]]
+                for source, target in graph.edges
+                if source in index and target in index
+            ),
+            key=sum,
+        )
+        for edge in edges:
+            cost = _tokens(edge)
+            if cost > budget:
+                break
+            budget -= cost
+            context["edges"].append(edge)
+
+        # Nodes are ranked by risk first, so the hotspots lead the list
+        context["hotspots"] = [
+            i
+            for i, entry in enumerate(context["nodes"][:MAX_HOTSPOTS])
+            if entry.get("risk", 0) >= HOTSPOT_MIN_SCORE
+        ]
+        context["truncated"] = (
+            len(context["nodes"]) < context["node_count"]
+            or len(context["edges"]) < context["edge_count"]
+        )
+        return context
+
+
+# Singleton instance
+project_context_service = ProjectContextService()
+storage_service.add_change_listener(project_context_service.on_change)
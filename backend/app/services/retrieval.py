@@ -0,0 +1,197 @@
+import asyncio
+import heapq
+import math
+import re
+import zlib
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.config import settings
+from app.services.chat_buffer import chat_buffer
+from app.services.project_cache import ProjectCacheRegistry
+from app.services.storage import storage_service
+
+WORD = re.compile(r"\w+")
+# Feature space of the hashed vectors
+DIMENSIONS = 1 << 20
+# Yield to the event loop every N documents while building an index
+YIELD_EVERY = 500
+
+
+def features(text: str) -> Counter:
+    """Hashed term counts of `text`: whole words, plus character bigrams of
+    non-ASCII words so Korean words match across particles"""
+    counts: Counter = Counter()
+    for word in WORD.findall(text.lower()):
+        counts[zlib.crc32(word.encode()) % DIMENSIONS] += 1
+        if not word.isascii():
+            for i in range(len(word) - 1):
+                counts[zlib.crc32(word[i : i + 2].encode()) % DIMENSIONS] += 1
+    return counts
+
+
+def _vector(counts: Counter) -> Dict[int, float]:
+    # Sublinear term frequency, unit length
+    weights = {feature: 1 + math.log(count) for feature, count in counts.items()}
+    norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+    return {feature: w / norm for feature, w in weights.items()}
+
+
+def _flatten(value: Any) -> Iterable[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _flatten(item)
+
+
+class RetrievalIndex:
+    """Inverted index of hashed sparse vectors over one project's nodes
+    (label and text in `data`) and chat messages.
+
+    Documents are stored as unit-length sublinear tf vectors; queries are
+    weighted by idf, so scoring only walks the postings of the query's
+    features. Only the newest RETRIEVAL_MAX_MESSAGES messages are kept.
+    """
+
+    def __init__(self, max_messages: int):
+        self.max_messages = max_messages
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[int, Dict[str, float]] = {}
+        self._messages: "OrderedDict[str, None]" = OrderedDict()
+
+    def upsert_node(self, node: Dict[str, Any]) -> None:
+        label = node.get("label") or ""
+        text = " ".join([label, *_flatten(node.get("data") or {})]).strip()
+        self._upsert(
+            f"node:{node['id']}",
+            text,
+            {"kind": "node", "id": str(node["id"]), "label": label, "type": node.get("type", "")},
+        )
+
+    def add_message(self, message: Dict[str, Any]) -> None:
+        doc_id = f"message:{message['id']}"
+        self._upsert(
+            doc_id,
+            message.get("content") or "",
+            {
+                "kind": "message",
+                "id": str(message["id"]),
+                "role": message.get("role"),
+                "created_at": str(message.get("created_at") or ""),
+            },
+        )
+        self._messages[doc_id] = None
+        while len(self._messages) > self.max_messages:
+            oldest, _ = self._messages.popitem(last=False)
+            self.remove(oldest)
+
+    def remove(self, doc_id: str) -> None:
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for feature in doc["vector"]:
+            posting = self.postings.get(feature)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[feature]
+
+    def search(self, query: str, k: int, exclude: Set[str] = frozenset()) -> List[Dict[str, Any]]:
+        counts = features(query)
+        if not counts or not self.docs:
+            return []
+        n = len(self.docs)
+        scores: Dict[str, float] = {}
+        for feature, weight in _vector(counts).items():
+            posting = self.postings.get(feature)
+            if not posting:
+                continue
+            idf = math.log(1 + n / len(posting))
+            for doc_id, doc_weight in posting.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * doc_weight
+        best = heapq.nlargest(
+            k,
+            (doc_id for doc_id in scores if self.docs[doc_id]["meta"]["id"] not in exclude),
+            key=scores.__getitem__,
+        )
+        return [
+            {
+                **self.docs[doc_id]["meta"],
+                "text": self.docs[doc_id]["text"][: settings.RETRIEVAL_SNIPPET_CHARS],
+                "score": round(scores[doc_id], 4),
+            }
+            for doc_id in best
+        ]
+
+    def _upsert(self, doc_id: str, text: str, meta: Dict[str, Any]) -> None:
+        doc = self.docs.get(doc_id)
+        if doc is not None and doc["text"] == text:
+            doc["meta"] = meta
+            return
+        self.remove(doc_id)
+        vector = _vector(features(text))
+        self.docs[doc_id] = {"text": text, "meta": meta, "vector": vector}
+        for feature, weight in vector.items():
+            self.postings.setdefault(feature, {})[doc_id] = weight
+
+
+class RetrievalIndexRegistry(ProjectCacheRegistry[RetrievalIndex]):
+    """Per-project retrieval indexes, built on first search and then kept in
+    sync with node changes and new chat messages. At most
+    RETRIEVAL_MAX_PROJECTS indexes are kept (LRU).
+    """
+
+    async def _load(self, project_id: str) -> RetrievalIndex:
+        index = RetrievalIndex(settings.RETRIEVAL_MAX_MESSAGES)
+        nodes = await self.storage.get_nodes_by_project(project_id)
+        for i, node in enumerate(nodes):
+            index.upsert_node(node)
+            if i % YIELD_EVERY == YIELD_EVERY - 1:
+                await asyncio.sleep(0)
+        for message in await chat_buffer.get_recent_history(
+            project_id, settings.RETRIEVAL_MAX_MESSAGES
+        ):
+            index.add_message(message)
+        return index
+
+    def _apply(self, index: RetrievalIndex, event: Dict[str, Any]) -> None:
+        if event["entity"] == "node":
+            if event["op"] == "delete":
+                index.remove(f"node:{event['id']}")
+            elif event["row"] is not None:
+                index.upsert_node(event["row"])
+        elif event["entity"] == "chat_message" and event["row"] is not None:
+            index.add_message(event["row"])
+
+    async def add_message(self, message: Dict[str, Any]) -> None:
+        """Index a new chat message (chat messages have no change events)"""
+        await self.on_change(
+            [
+                {
+                    "project_id": str(message["project_id"]),
+                    "entity": "chat_message",
+                    "op": "create",
+                    "id": str(message["id"]),
+                    "row": message,
+                    "revision": None,
+                }
+            ]
+        )
+
+    async def search(
+        self, project_id: str, query: str, k: Optional[int] = None, exclude: Set[str] = frozenset()
+    ) -> List[Dict[str, Any]]:
+        """Top-k nodes and chat messages for `query`"""
+        index = await self.get(project_id)
+        return index.search(query, k or settings.RETRIEVAL_TOP_K, exclude)
+
+
+# Singleton instance
+retrieval_index = RetrievalIndexRegistry(
+    storage_service, max_projects=settings.RETRIEVAL_MAX_PROJECTS
+)
+storage_service.add_change_listener(retrieval_index.on_change)
@@ -0,0 +1,315 @@
+"""Project risk scores kept up to date from graph changes.
+
+For every project with recent node/edge changes, a per-node table of score
+inputs (downstream/upstream counts, degree, data neighbors) is maintained
+against the cached project graph. After a change only the nodes the graph
+marked dirty get new inputs and scores. Scores are normalized by the node
+count, so once it has drifted by more than RISK_RESCORE_DRIFT since the last
+full pass every score is re-derived from the stored inputs (arithmetic only).
+
+Reachability counts are taken on the strongly connected component
+condensation, where all members of a component share the same reach, with
+bitsets over the part of the DAG reachable from the dirty components. The
+bitsets cover at most RISK_BITSET_CHUNK_NODES nodes per pass, so memory stays
+bounded on large graphs, and no per-node reachability sets are kept. It runs
+in a worker thread on an edge-only copy of the cached graph.
+
+The project score (90th percentile of node scores) is written to
+projects.risk_score (not a change-log entry) and pushed over the WebSocket
+together with the node scores that changed.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import networkx as nx
+
+from app.config import settings
+from app.services.centrality import centrality_service
+from app.services.debounce import ProjectDebouncer
+from app.services.graph_cache import ProjectGraph, graph_cache
+from app.services.impact_analyzer import ImpactAnalyzer
+from app.services.storage import StorageService, storage_service
+from app.websocket.manager import manager
+
+# Yield to the event loop every N nodes during a full computation
+YIELD_EVERY = 500
+
+
+class ProjectRisk:
+    """Per-node score table of one project"""
+
+    def __init__(self, project_graph: ProjectGraph):
+        self.project_graph = project_graph
+        self.analyzer = ImpactAnalyzer.from_project_graph(project_graph)
+        self.components: Dict[str, Tuple[int, int, int, int]] = {}
+        self.scores: Dict[str, int] = {}
+        # histogram[s] = number of nodes scoring s (1-10)
+        self.histogram = [0] * 11
+        # Node count at the last full rescore
+        self.node_count = 0
+        self.risk_score = 0
+        # Bumped whenever a node score changes
+        self.version = 0
+        # Centrality snapshot the current scores were computed with
+        self._centrality = None
+
+    def _set_score(self, node_id: str, score: Optional[int], changed: Dict[str, int]) -> None:
+        old = self.scores.get(node_id)
+        if old == score:
+            return
+        if old is not None:
+            self.histogram[old] -= 1
+        if score is None:
+            self.scores.pop(node_id, None)
+        else:
+            self.scores[node_id] = score
+            self.histogram[score] += 1
+            changed[node_id] = score
+
+    async def update(self, dirty: Optional[Set[str]]) -> Dict[str, int]:
+        """Refresh the inputs of `dirty` nodes (all nodes if None) and return
+        the node scores that changed"""
+        graph = self.project_graph.graph
+        if dirty is None:
+            dirty = set(graph) | set(self.components)
+
+        present = [node_id for node_id in dirty if node_id in graph]
+        counts: Dict[str, Tuple[int, int]] = {}
+        if present:
+            # The cached graph keeps changing on the event loop; the worker
+            # thread gets its own copy of the structure
+            snapshot = nx.DiGraph()
+            snapshot.add_nodes_from(graph)
+            snapshot.add_edges_from(graph.edges)
+            counts = await asyncio.to_thread(
+                reach_counts, snapshot, present, settings.RISK_BITSET_CHUNK_NODES
+            )
+            # Nodes deleted meanwhile are marked dirty for the next update
+            present = [node_id for node_id in present if node_id in graph]
+
+        for node_id in dirty.difference(present):
+            self.components.pop(node_id, None)
+        for i, node_id in enumerate(present):
+            downstream, upstream = counts[node_id]
+            self.components[node_id] = self.analyzer.get_score_components(
+                node_id, downstream, upstream
+            )
+            if i % YIELD_EVERY == YIELD_EVERY - 1:
+                # Changes made meanwhile are marked dirty for the next update
+                await asyncio.sleep(0)
+
+        # Scores are normalized by the node count and by the most central node,
+        # so a larger size drift or a new centrality snapshot rescores all
+        rescore = dirty
+        drift = abs(len(graph) - self.node_count)
+        if (
+            drift > settings.RISK_RESCORE_DRIFT * self.node_count
+            or self.analyzer.centrality is not self._centrality
+        ):
+            rescore = dirty | self.components.keys()
+            self.node_count = len(graph)
+        self._centrality = self.analyzer.centrality
+        changed: Dict[str, int] = {}
+        for node_id in list(rescore):
+            components = self.components.get(node_id)
+            score = (
+                self.analyzer.score_components(components, node_id) if components else None
+            )
+            self._set_score(node_id, score, changed)
+
+        self.risk_score = self._percentile(0.9)
+        if changed:
+            self.version += 1
+        return changed
+
+    def _percentile(self, q: float) -> int:
+        total = sum(self.histogram)
+        if total == 0:
+            return 0
+        threshold = q * total
+        seen = 0
+        for score in range(1, 11):
+            seen += self.histogram[score]
+            if seen >= threshold:
+                return score
+        return 10
+
+
+def reach_counts(
+    graph: nx.DiGraph, node_ids: List[str], chunk_size: int
+) -> Dict[str, Tuple[int, int]]:
+    """(descendant count, ancestor count) of each of `node_ids`"""
+    condensed = nx.condensation(graph)
+    mapping = condensed.graph["mapping"]
+    members = condensed.nodes
+    starts = {mapping[node_id] for node_id in node_ids}
+    down = _reach_sizes(starts, condensed.successors, members, chunk_size)
+    up = _reach_sizes(starts, condensed.predecessors, members, chunk_size)
+
+    counts = {}
+    for node_id in node_ids:
+        component = mapping[node_id]
+        # Other members of the node's own cycle are reachable both ways
+        own = len(members[component]["members"]) - 1
+        counts[node_id] = (down[component] + own, up[component] + own)
+    return counts
+
+
+def _reach_sizes(
+    starts: Set[int],
+    neighbors: Callable[[int], Iterable[int]],
+    members: Any,
+    chunk_size: int,
+) -> Dict[int, int]:
+    """Number of nodes reachable from each start component of a DAG, counted
+    with bitsets over at most `chunk_size` nodes at a time"""
+    # Only nodes of components reachable from the starts get a bit
+    reached = set(starts)
+    stack = list(starts)
+    while stack:
+        for neighbor in neighbors(stack.pop()):
+            if neighbor not in reached:
+                reached.add(neighbor)
+                stack.append(neighbor)
+    nodes = [
+        node_id for component in reached for node_id in members[component]["members"]
+    ]
+
+    sizes = dict.fromkeys(starts, 0)
+    for offset in range(0, len(nodes), chunk_size):
+        chunk = nodes[offset : offset + chunk_size]
+        bit = {node_id: 1 << i for i, node_id in enumerate(chunk)}
+
+        def mask(component: int) -> int:
+            value = 0
+            for node_id in members[component]["members"]:
+                value |= bit.get(node_id, 0)
+            return value
+
+        reach = _component_reach(starts, neighbors, mask)
+        for start in starts:
+            sizes[start] += reach[start].bit_count()
+    return sizes
+
+
+def _component_reach(
+    starts: Iterable[int],
+    neighbors: Callable[[int], Iterable[int]],
+    mask: Callable[[int], int],
+) -> Dict[int, int]:
+    """Bitset of the nodes reachable from each component of a DAG, for the
+    starts and everything they reach (iterative post-order DFS)"""
+    reach: Dict[int, int] = {}
+    masks: Dict[int, int] = {}
+    for start in starts:
+        if start in reach:
+            continue
+        stack = [(start, False)]
+        while stack:
+            component, expanded = stack.pop()
+            if expanded:
+                value = 0
+                for neighbor in neighbors(component):
+                    value |= masks[neighbor] | reach[neighbor]
+                reach[component] = value
+                continue
+            if component in reach or component in masks:
+                continue
+            masks[component] = mask(component)
+            stack.append((component, True))
+            for neighbor in neighbors(component):
+                if neighbor not in masks:
+                    stack.append((neighbor, False))
+    return reach
+
+
+class RiskScoreService:
+    """Debounced, per-project risk recomputation driven by change events"""
+
+    def __init__(self, storage: StorageService):
+        self.storage = storage
+        self._projects: Dict[str, ProjectRisk] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._debouncer = ProjectDebouncer(
+            self.refresh, settings.RISK_SCORE_DEBOUNCE_MS, "Risk score update"
+        )
+
+    async def on_change(self, events: List[Dict[str, Any]]) -> None:
+        """Storage change listener"""
+        scheduled = set()
+        for event in events:
+            project_id = event["project_id"]
+            if event["entity"] == "project":
+                if event["op"] == "delete":
+                    self._projects.pop(project_id, None)
+                    self._locks.pop(project_id, None)
+            elif project_id not in scheduled:
+                scheduled.add(project_id)
+                self._debouncer.schedule(project_id)
+
+    async def on_centrality(self, project_id: str) -> None:
+        """Centrality listener: rescore with the new snapshot"""
+        if project_id in self._projects:
+            self._debouncer.schedule(project_id)
+
+    def peek(self, project_id: str) -> Optional[ProjectRisk]:
+        """The project's score table, if it is tracked for the cached graph"""
+        project_risk = self._projects.get(project_id)
+        if project_risk is None or project_risk.project_graph is not graph_cache.peek(project_id):
+            return None
+        return project_risk
+
+    async def get(self, project_id: str) -> ProjectRisk:
+        """The project's score table, computed first if it is not tracked yet"""
+        project_risk = self._projects.get(project_id)
+        project_graph = graph_cache.peek(project_id)
+        if project_risk is None or project_risk.project_graph is not project_graph:
+            await self.refresh(project_id)
+            project_risk = self._projects[project_id]
+        return project_risk
+
+    async def refresh(self, project_id: str) -> None:
+        async with self._locks.setdefault(project_id, asyncio.Lock()):
+            await self._refresh(project_id)
+
+    async def _refresh(self, project_id: str) -> None:
+        project_graph = await graph_cache.get(project_id)
+        project_risk = self._projects.get(project_id)
+
+        if project_risk is None or project_risk.project_graph is not project_graph:
+            # First run, or the graph was evicted and reloaded: full computation
+            project_graph.track_dirty = True
+            project_graph.take_dirty()
+            project_risk = ProjectRisk(project_graph)
+            self._projects[project_id] = project_risk
+            previous = None
+            dirty = None
+        else:
+            previous = project_risk.risk_score
+            dirty = project_graph.take_dirty()
+        if settings.RISK_MODEL == "centrality":
+            project_risk.analyzer.centrality = centrality_service.latest(project_id)
+        changed = await project_risk.update(dirty)
+
+        # Drop tables whose graph is no longer cached
+        for tracked in list(self._projects):
+            if graph_cache.peek(tracked) is None:
+                del self._projects[tracked]
+                self._locks.pop(tracked, None)
+
+        if project_risk.risk_score != previous:
+            project = await self.storage.get_project(project_id)
+            if project and project.get("risk_score") != project_risk.risk_score:
+                await self.storage.set_risk_score(project_id, project_risk.risk_score)
+        if changed or project_risk.risk_score != previous:
+            await manager.broadcast_risk_scores(
+                project_id, project_risk.risk_score, changed
+            )
+
+
+# Singleton instance
+risk_score_service = RiskScoreService(storage_service)
+if settings.RISK_SCORE_TRACKING:
+    storage_service.add_change_listener(risk_score_service.on_change)
+    centrality_service.add_listener(risk_score_service.on_centrality)
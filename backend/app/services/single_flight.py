@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.telemetry import SINGLE_FLIGHT_CALLS
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight call.
+
+    The first caller of a key starts the call; callers arriving while it runs
+    wait for the same result (or exception) instead of repeating it. The
+    call is only cancelled once every waiter has been cancelled. Results are
+    shared between waiters and must not be mutated.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+            SINGLE_FLIGHT_CALLS.labels(self.name, "leader").inc()
+        else:
+            SINGLE_FLIGHT_CALLS.labels(self.name, "follower").inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def forget(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Let later callers of matching keys start a new call (e.g. after a
+        write made the in-flight result stale); current waiters still get it"""
+        for key in [key for key in self._flights if predicate(key)]:
+            del self._flights[key]
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Retrieved here so a failure nobody waits for is not logged
+            flight.task.exception()
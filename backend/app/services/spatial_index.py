@@ -0,0 +1,149 @@
+import math
+from typing import Any, Dict, List, Set, Tuple
+
+from app.config import settings
+from app.services.project_cache import ProjectCacheRegistry
+from app.services.storage import StorageService, storage_service
+
+Cell = Tuple[int, int]
+
+
+class SpatialIndex:
+    """Uniform grid index over node positions for one project.
+
+    Nodes are bucketed by (floor(x / cell_size), floor(y / cell_size)), so a
+    viewport query only touches the cells it overlaps.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Cell, Set[str]] = {}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self._node_cells: Dict[str, Cell] = {}
+
+    def _cell(self, x: float, y: float) -> Cell:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def upsert(self, node: Dict[str, Any]) -> None:
+        node_id = node["id"]
+        cell = self._cell(node.get("position_x") or 0, node.get("position_y") or 0)
+
+        old_cell = self._node_cells.get(node_id)
+        if old_cell is not None and old_cell != cell:
+            self._discard(node_id, old_cell)
+
+        self.cells.setdefault(cell, set()).add(node_id)
+        self._node_cells[node_id] = cell
+        self.nodes[node_id] = node
+
+    def remove(self, node_id: str) -> None:
+        cell = self._node_cells.pop(node_id, None)
+        if cell is not None:
+            self._discard(node_id, cell)
+        self.nodes.pop(node_id, None)
+
+    def _discard(self, node_id: str, cell: Cell) -> None:
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(node_id)
+            if not members:
+                del self.cells[cell]
+
+    def query(
+        self, min_x: float, min_y: float, max_x: float, max_y: float
+    ) -> List[Dict[str, Any]]:
+        """Nodes whose position lies inside the bounding box"""
+        min_cx, min_cy = self._cell(min_x, min_y)
+        max_cx, max_cy = self._cell(max_x, max_y)
+
+        # When the box spans more cells than there are nodes, a linear scan is cheaper
+        cell_count = (max_cx - min_cx + 1) * (max_cy - min_cy + 1)
+        if cell_count > len(self.cells):
+            candidates = (
+                node_id
+                for (cx, cy), members in self.cells.items()
+                if min_cx <= cx <= max_cx and min_cy <= cy <= max_cy
+                for node_id in members
+            )
+        else:
+            candidates = (
+                node_id
+                for cx in range(min_cx, max_cx + 1)
+                for cy in range(min_cy, max_cy + 1)
+                for node_id in self.cells.get((cx, cy), ())
+            )
+
+        result = []
+        for node_id in candidates:
+            node = self.nodes[node_id]
+            x, y = node.get("position_x") or 0, node.get("position_y") or 0
+            if min_x <= x <= max_x and min_y <= y <= max_y:
+                result.append(node)
+        return result
+
+    def clusters(
+        self,
+        min_x: float,
+        min_y: float,
+        max_x: float,
+        max_y: float,
+        cluster_size: float,
+    ) -> List[Dict[str, Any]]:
+        """Aggregate the nodes inside the box into cluster stubs on a coarser grid"""
+        buckets: Dict[Cell, Dict[str, Any]] = {}
+        for node in self.query(min_x, min_y, max_x, max_y):
+            x, y = node.get("position_x") or 0, node.get("position_y") or 0
+            key = (math.floor(x / cluster_size), math.floor(y / cluster_size))
+            bucket = buckets.setdefault(
+                key, {"count": 0, "sum_x": 0.0, "sum_y": 0.0, "types": {}}
+            )
+            bucket["count"] += 1
+            bucket["sum_x"] += x
+            bucket["sum_y"] += y
+            node_type = node.get("type", "")
+            bucket["types"][node_type] = bucket["types"].get(node_type, 0) + 1
+
+        return [
+            {
+                "id": f"cluster:{cx}:{cy}",
+                "cluster": True,
+                "count": bucket["count"],
+                "position_x": bucket["sum_x"] / bucket["count"],
+                "position_y": bucket["sum_y"] / bucket["count"],
+                "types": bucket["types"],
+            }
+            for (cx, cy), bucket in buckets.items()
+        ]
+
+
+class SpatialIndexRegistry(ProjectCacheRegistry[SpatialIndex]):
+    """Per-project spatial indexes, loaded on first query and kept in sync with
+    node changes. At most SPATIAL_INDEX_MAX_PROJECTS indexes are kept (LRU).
+    """
+
+    def __init__(self, storage: StorageService, cell_size: float, max_projects: int):
+        super().__init__(storage, max_projects)
+        self.cell_size = cell_size
+
+    async def _load(self, project_id: str) -> SpatialIndex:
+        index = SpatialIndex(self.cell_size)
+        for node in await self.storage.get_nodes_by_project(project_id):
+            index.upsert(node)
+        return index
+
+    def _apply(self, index: SpatialIndex, event: Dict[str, Any]) -> None:
+        if event["entity"] != "node":
+            return
+        if event["op"] == "delete":
+            index.remove(event["id"])
+        elif event["row"] is not None:
+            index.upsert(event["row"])
+
+
+# Singleton instance
+spatial_registry = SpatialIndexRegistry(
+    storage_service,
+    cell_size=settings.SPATIAL_INDEX_CELL_SIZE,
+    max_projects=settings.SPATIAL_INDEX_MAX_PROJECTS,
+)
+storage_service.add_change_listener(spatial_registry.on_change)
@@ -0,0 +1,273 @@
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Optional, Dict, Any
+
+from app.config import settings
+from app.models.project import ProjectCreate, ProjectUpdate
+from app.models.node import NodeCreate, NodeUpdate, EdgeCreate
+from app.models.chat import ChatMessageCreate
+from app.services.single_flight import SingleFlight
+
+# Receives the change events of one storage operation, one per mutated row:
+# {"project_id", "entity": "project"|"node"|"edge", "op": "create"|"update"|"delete",
+#  "id", "row", "revision"}  ("row" is None for deletes; "revision" is the
+#  revision the change was logged under, returned by the write itself; None
+#  for project create/delete, which are not part of the project's change log)
+ChangeListener = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+# Project-scoped tables that can be paged and bulk-inserted, and the change
+# entity their rows are reported as (None: not reported to listeners)
+PROJECT_TABLES: Dict[str, Optional[str]] = {
+    "nodes": "node",
+    "edges": "edge",
+    "chat_messages": None,
+}
+
+# Reads whose concurrent identical calls share one query. All of them are
+# invalidated by change events, so a read never joins a query that started
+# before a write it should see.
+COALESCED_READS = ("list_projects", "get_project", "get_nodes_by_project", "get_edges_by_project")
+
+
+class StorageService(ABC):
+    """Storage interface for projects, nodes, edges and chat messages.
+
+    Implementations return plain dict rows shaped like the Supabase tables in
+    schema.sql, so routers and analysis code do not care which one is active.
+    Constructing a service must stay cheap; clients are created in connect().
+
+    Every project/node/edge mutation is reported to the registered change
+    listeners, which keep derived in-memory structures in sync. Node, edge and
+    project-update changes are also appended to the project's change log
+    under a new, monotonically increasing project revision, by database
+    triggers in the same transaction as the write (schema.sql, and
+    local_storage for SQLite).
+    """
+
+    def __init__(self):
+        self._change_listeners: List[ChangeListener] = []
+        self._reads = SingleFlight("storage")
+        for name in COALESCED_READS:
+            setattr(self, name, self._coalesced(name, getattr(self, name)))
+
+    def _coalesced(
+        self, name: str, read: Callable[..., Awaitable[Any]]
+    ) -> Callable[..., Awaitable[Any]]:
+        async def coalesced_read(*args: Any, **kwargs: Any) -> Any:
+            key = (name, *args, *sorted(kwargs.items()))
+            return await self._reads.do(key, lambda: read(*args, **kwargs))
+
+        return coalesced_read
+
+    async def connect(self) -> None:
+        """Create clients and connections ahead of the first request"""
+        pass
+
+    def add_change_listener(self, listener: ChangeListener) -> None:
+        self._change_listeners.append(listener)
+
+    def _row_events(
+        self,
+        entity: str,
+        op: str,
+        rows: Optional[List[Dict[str, Any]]],
+        record: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Build one change event per affected row. The database logged the
+        rows in the write's own transaction (change-log triggers) and the write
+        returned each row with its revision (for deletes, the backend looks it
+        up in the same transaction or by the deleted id)"""
+        logged = record and (entity != "project" or op == "update")
+        events = []
+        for row in rows or []:
+            project_id = row["id"] if entity == "project" else row.get("project_id")
+            if not project_id:
+                continue
+            events.append(
+                {
+                    "project_id": project_id,
+                    "entity": entity,
+                    "op": op,
+                    "id": row["id"],
+                    "row": None if op == "delete" else row,
+                    "revision": row.get("revision") if logged else None,
+                }
+            )
+        return events
+
+    async def _emit_events(self, events: List[Dict[str, Any]]) -> None:
+        if not events:
+            return
+        project_ids = {event["project_id"] for event in events}
+        projects_changed = any(event["entity"] == "project" for event in events)
+
+        def stale(key: Any) -> bool:
+            if key[0] == "list_projects":
+                return projects_changed
+            # Every other coalesced read takes the project id first
+            return key[1] in project_ids
+
+        self._reads.forget(stale)
+        for listener in self._change_listeners:
+            await listener(events)
+
+    async def _emit_rows(
+        self,
+        entity: str,
+        op: str,
+        rows: Optional[List[Dict[str, Any]]],
+        record: bool = True,
+    ) -> None:
+        """Emit one change event per affected row, as one batch.
+
+        With record=False events carry no revision (bulk imports into a new
+        project, derived values that are not logged).
+        """
+        await self._emit_events(self._row_events(entity, op, rows, record))
+
+    # Change log
+    @abstractmethod
+    async def get_changes_since(
+        self, project_id: str, since: int, limit: int = 1000
+    ) -> Optional[Dict[str, Any]]:
+        """Current revision and up to `limit` changes after `since`, oldest first:
+        {"revision": int, "changes": [{"revision", "entity", "op", "id", "data"}]}.
+        Returns None if the project does not exist.
+        """
+        pass
+
+    # Project operations
+    @abstractmethod
+    async def create_project(self, project: ProjectCreate) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def list_projects(self) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def update_project(
+        self, project_id: str, project: ProjectUpdate
+    ) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def set_risk_score(self, project_id: str, risk_score: int) -> None:
+        """Store the derived project risk score. Listeners are notified, but
+        it is not a change-log entry (the score follows from the logged node
+        and edge changes)"""
+        pass
+
+    @abstractmethod
+    async def delete_project(self, project_id: str) -> None:
+        pass
+
+    # Node operations
+    @abstractmethod
+    async def create_node(self, node: NodeCreate) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_nodes_by_project(self, project_id: str) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def update_node(
+        self, node_id: str, node: NodeUpdate
+    ) -> Optional[Dict[str, Any]]:
+        pass
+
+    async def delete_node(self, node_id: str) -> Dict[str, List[str]]:
+        """Delete a node and its edges (see delete_nodes_batch)"""
+        return await self.delete_nodes_batch([node_id])
+
+    @abstractmethod
+    async def delete_nodes_batch(self, node_ids: list[str]) -> Dict[str, List[str]]:
+        """Delete multiple nodes and every edge attached to them in one operation.
+
+        Returns {"node_ids": [...], "edge_ids": [...]} of the removed rows.
+        """
+        pass
+
+    # Edge operations
+    @abstractmethod
+    async def create_edge(self, edge: EdgeCreate) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_edges_by_project(self, project_id: str) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def delete_edge(self, edge_id: str) -> None:
+        pass
+
+    # Bulk operations (export / import)
+    @abstractmethod
+    async def get_project_rows_page(
+        self, table: str, project_id: str, after_id: Optional[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        """Up to `limit` rows of a PROJECT_TABLES table ordered by id, starting
+        after `after_id` (keyset paging)"""
+        pass
+
+    @abstractmethod
+    async def insert_rows_batch(
+        self, table: str, rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Insert rows (ids included) into a PROJECT_TABLES table in one round trip"""
+        pass
+
+    # Chat operations
+    @abstractmethod
+    async def create_chat_message(self, message: ChatMessageCreate) -> Dict[str, Any]:
+        pass
+
+    @abstractmethod
+    async def get_chat_history(
+        self, project_id: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def get_recent_chat_history(
+        self, project_id: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """The newest `limit` messages, oldest first"""
+        pass
+
+    @abstractmethod
+    async def get_conversation_summary(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """The project's conversation_summaries row, if any"""
+        pass
+
+    @abstractmethod
+    async def save_conversation_summary(
+        self, project_id: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Insert or replace the project's conversation summary"""
+        pass
+
+
+def create_storage_service() -> StorageService:
+    """Create the storage backend selected by STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "sqlite":
+        from app.services.local_storage import SQLiteStorageService
+
+        return SQLiteStorageService(settings.SQLITE_PATH)
+    if settings.STORAGE_BACKEND == "supabase":
+        from app.services.supabase_service import SupabaseService
+
+        return SupabaseService()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+# Singleton instance
+storage_service = create_storage_service()
@@ -1,63 +1,141 @@
-from supabase import create_client, Client
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, TYPE_CHECKING
 import asyncio
+from datetime import datetime, timezone
 
 from app.config import settings
+from app.telemetry import instrumented
+from app.services.storage import PROJECT_TABLES, StorageService
 from app.models.project import ProjectCreate, ProjectUpdate
 from app.models.node import NodeCreate, NodeUpdate, EdgeCreate
 from app.models.chat import ChatMessageCreate
 
+if TYPE_CHECKING:
+    from supabase import Client
 
-class SupabaseService:
+
+class SupabaseService(StorageService):
     def __init__(self):
-        self.client: Client = create_client(
-            settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY
+        super().__init__()
+        self._client: Optional["Client"] = None
+
+    @property
+    def client(self) -> "Client":
+        """Supabase client, created on first use or by connect()"""
+        if self._client is None:
+            # Imported lazily: the supabase package is slow to import
+            from supabase import create_client
+
+            self._client = create_client(
+                settings.SUPABASE_URL, settings.SUPABASE_SERVICE_KEY
+            )
+        return self._client
+
+    async def connect(self) -> None:
+        self.client
+
+    # Change log
+    @instrumented("get_delete_revisions")
+    async def _with_delete_revisions(
+        self, entity: str, rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """The deleted rows with the revision their delete was logged under
+        (by the delete's own trigger; a deleted id is logged only once)"""
+        if not rows:
+            return rows
+        result = await asyncio.to_thread(
+            self.client.table("project_changes")
+            .select("entity_id, revision")
+            .eq("entity", entity)
+            .eq("op", "delete")
+            .in_("entity_id", [row["id"] for row in rows])
+            .execute
+        )
+        logged = {row["entity_id"]: row["revision"] for row in result.data}
+        return [{**row, "revision": logged.get(row["id"])} for row in rows]
+
+    @instrumented("get_changes_since")
+    async def get_changes_since(
+        self, project_id: str, since: int, limit: int = 1000
+    ) -> Optional[Dict[str, Any]]:
+        project = await asyncio.to_thread(
+            self.client.table("projects")
+            .select("revision")
+            .eq("id", project_id)
+            .execute
         )
+        if not project.data:
+            return None
+        result = await asyncio.to_thread(
+            self.client.table("project_changes")
+            .select("revision, entity, op, id:entity_id, data")
+            .eq("project_id", project_id)
+            .gt("revision", since)
+            .order("revision")
+            .limit(limit)
+            .execute
+        )
+        return {"revision": project.data[0]["revision"], "changes": result.data}
 
     # Project operations
+    @instrumented("create_project")
     async def create_project(self, project: ProjectCreate) -> Dict[str, Any]:
-        result = (
+        result = await asyncio.to_thread(
             self.client.table("projects")
             .insert({"name": project.name, "description": project.description})
-            .execute()
+            .execute
         )
+        await self._emit_rows("project", "create", result.data)
         return result.data[0] if result.data else None
 
+    @instrumented("list_projects")
     async def list_projects(self) -> List[Dict[str, Any]]:
-        result = (
-            self.client.table("projects")
-            .select("*")
-            .order("created_at", desc=True)
-            .execute()
-        )
+        query = self.client.table("projects").select("*").order("created_at", desc=True)
+        result = await asyncio.to_thread(query.execute)
         return result.data
 
+    @instrumented("get_project")
     async def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
-        result = (
-            self.client.table("projects").select("*").eq("id", project_id).execute()
-        )
+        query = self.client.table("projects").select("*").eq("id", project_id)
+        result = await asyncio.to_thread(query.execute)
         return result.data[0] if result.data else None
 
+    @instrumented("update_project")
     async def update_project(
         self, project_id: str, project: ProjectUpdate
     ) -> Optional[Dict[str, Any]]:
         update_data = {k: v for k, v in project.model_dump().items() if v is not None}
         if not update_data:
             return await self.get_project(project_id)
-        result = (
+        result = await asyncio.to_thread(
             self.client.table("projects")
             .update(update_data)
             .eq("id", project_id)
-            .execute()
+            .execute
         )
+        await self._emit_rows("project", "update", result.data)
         return result.data[0] if result.data else None
 
+    @instrumented("set_risk_score")
+    async def set_risk_score(self, project_id: str, risk_score: int) -> None:
+        result = await asyncio.to_thread(
+            self.client.table("projects")
+            .update({"risk_score": risk_score})
+            .eq("id", project_id)
+            .execute
+        )
+        await self._emit_rows("project", "update", result.data, record=False)
+
+    @instrumented("delete_project")
     async def delete_project(self, project_id: str) -> None:
-        self.client.table("projects").delete().eq("id", project_id).execute()
+        result = await asyncio.to_thread(
+            self.client.table("projects").delete().eq("id", project_id).execute
+        )
+        await self._emit_rows("project", "delete", result.data)
 
     # Node operations
+    @instrumented("create_node")
     async def create_node(self, node: NodeCreate) -> Dict[str, Any]:
-        result = (
+        result = await asyncio.to_thread(
             self.client.table("nodes")
             .insert(
                 {
@@ -69,23 +147,24 @@ class SupabaseService:
                     "data": node.data,
                 }
             )
-            .execute()
+            .execute
         )
+        await self._emit_rows("node", "create", result.data)
         return result.data[0] if result.data else None
 
+    @instrumented("get_node")
     async def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
-        result = self.client.table("nodes").select("*").eq("id", node_id).execute()
+        query = self.client.table("nodes").select("*").eq("id", node_id)
+        result = await asyncio.to_thread(query.execute)
         return result.data[0] if result.data else None
 
+    @instrumented("get_nodes_by_project")
     async def get_nodes_by_project(self, project_id: str) -> List[Dict[str, Any]]:
-        result = (
-            self.client.table("nodes")
-            .select("*")
-            .eq("project_id", project_id)
-            .execute()
-        )
+        query = self.client.table("nodes").select("*").eq("project_id", project_id)
+        result = await asyncio.to_thread(query.execute)
         return result.data
 
+    @instrumented("update_node")
     async def update_node(
         self, node_id: str, node: NodeUpdate
     ) -> Optional[Dict[str, Any]]:
@@ -104,24 +183,35 @@ class SupabaseService:
         if not update_data:
             return await self.get_node(node_id)
 
-        result = (
-            self.client.table("nodes").update(update_data).eq("id", node_id).execute()
+        result = await asyncio.to_thread(
+            self.client.table("nodes").update(update_data).eq("id", node_id).execute
         )
+        await self._emit_rows("node", "update", result.data)
         return result.data[0] if result.data else None
 
-    async def delete_node(self, node_id: str) -> None:
-        self.client.table("nodes").delete().eq("id", node_id).execute()
-
-    async def delete_nodes_batch(self, node_ids: list[str]) -> int:
-        """Delete multiple nodes at once. Returns the number of deleted nodes."""
+    @instrumented("delete_nodes_batch")
+    async def delete_nodes_batch(self, node_ids: list[str]) -> Dict[str, List[str]]:
         if not node_ids:
-            return 0
-        result = self.client.table("nodes").delete().in_("id", node_ids).execute()
-        return len(result.data) if result.data else 0
+            return {"node_ids": [], "edge_ids": []}
+        # Deletes the nodes and their edges in one transaction and returns
+        # the revisions the deletes were logged under (schema.sql)
+        result = await asyncio.to_thread(
+            self.client.rpc("delete_nodes_cascade", {"p_node_ids": node_ids}).execute
+        )
+        nodes = [row for row in result.data if row["entity"] == "node"]
+        edges = [row for row in result.data if row["entity"] == "edge"]
+        await self._emit_events(
+            self._row_events("edge", "delete", edges) + self._row_events("node", "delete", nodes)
+        )
+        return {
+            "node_ids": [row["id"] for row in nodes],
+            "edge_ids": [row["id"] for row in edges],
+        }
 
     # Edge operations
+    @instrumented("create_edge")
     async def create_edge(self, edge: EdgeCreate) -> Dict[str, Any]:
-        result = (
+        result = await asyncio.to_thread(
             self.client.table("edges")
             .insert(
                 {
@@ -131,25 +221,56 @@ class SupabaseService:
                     "label": edge.label,
                 }
             )
-            .execute()
+            .execute
         )
+        await self._emit_rows("edge", "create", result.data)
         return result.data[0] if result.data else None
 
+    @instrumented("get_edges_by_project")
     async def get_edges_by_project(self, project_id: str) -> List[Dict[str, Any]]:
-        result = (
-            self.client.table("edges")
-            .select("*")
-            .eq("project_id", project_id)
-            .execute()
-        )
+        query = self.client.table("edges").select("*").eq("project_id", project_id)
+        result = await asyncio.to_thread(query.execute)
         return result.data
 
+    @instrumented("delete_edge")
     async def delete_edge(self, edge_id: str) -> None:
-        self.client.table("edges").delete().eq("id", edge_id).execute()
+        result = await asyncio.to_thread(
+            self.client.table("edges").delete().eq("id", edge_id).execute
+        )
+        await self._emit_rows(
+            "edge", "delete", await self._with_delete_revisions("edge", result.data)
+        )
+
+    # Bulk operations (export / import)
+    @instrumented("get_project_rows_page")
+    async def get_project_rows_page(
+        self, table: str, project_id: str, after_id: Optional[str], limit: int
+    ) -> List[Dict[str, Any]]:
+        if table not in PROJECT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        query = self.client.table(table).select("*").eq("project_id", project_id)
+        if after_id:
+            query = query.gt("id", after_id)
+        result = await asyncio.to_thread(query.order("id").limit(limit).execute)
+        return result.data
+
+    @instrumented("insert_rows_batch")
+    async def insert_rows_batch(
+        self, table: str, rows: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if table not in PROJECT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if not rows:
+            return []
+        result = await asyncio.to_thread(self.client.table(table).insert(rows).execute)
+        if PROJECT_TABLES[table]:
+            await self._emit_rows(PROJECT_TABLES[table], "create", result.data, record=False)
+        return result.data
 
     # Chat operations
+    @instrumented("create_chat_message")
     async def create_chat_message(self, message: ChatMessageCreate) -> Dict[str, Any]:
-        result = (
+        result = await asyncio.to_thread(
             self.client.table("chat_messages")
             .insert(
                 {
@@ -159,23 +280,61 @@ class SupabaseService:
                     "agent_type": message.agent_type,
                 }
             )
-            .execute()
+            .execute
         )
         return result.data[0] if result.data else None
 
+    @instrumented("get_chat_history")
     async def get_chat_history(
         self, project_id: str, limit: int = 50
     ) -> List[Dict[str, Any]]:
-        result = (
+        result = await asyncio.to_thread(
             self.client.table("chat_messages")
             .select("*")
             .eq("project_id", project_id)
             .order("created_at", desc=False)
             .limit(limit)
-            .execute()
+            .execute
         )
         return result.data
 
+    @instrumented("get_recent_chat_history")
+    async def get_recent_chat_history(
+        self, project_id: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        result = await asyncio.to_thread(
+            self.client.table("chat_messages")
+            .select("*")
+            .eq("project_id", project_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute
+        )
+        return list(reversed(result.data))
 
-# Singleton instance
-supabase_service = SupabaseService()
+    @instrumented("get_conversation_summary")
+    async def get_conversation_summary(self, project_id: str) -> Optional[Dict[str, Any]]:
+        result = await asyncio.to_thread(
+            self.client.table("conversation_summaries")
+            .select("*")
+            .eq("project_id", project_id)
+            .execute
+        )
+        return result.data[0] if result.data else None
+
+    @instrumented("save_conversation_summary")
+    async def save_conversation_summary(
+        self, project_id: str, data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        result = await asyncio.to_thread(
+            self.client.table("conversation_summaries")
+            .upsert(
+                {
+                    "project_id": project_id,
+                    "data": data,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+            .execute
+        )
+        return result.data[0] if result.data else None
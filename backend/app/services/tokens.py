@@ -0,0 +1,12 @@
+"""Token estimates for the prompt budgets of summaries sent to the agents.
+
+About 4 ASCII characters per token, and one token per other character
+(e.g. Hangul). Kept in step with agents/app/llm/tokens.py, which the agents
+use to fit the same summaries into their prompts.
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of `text` (at least 1)"""
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
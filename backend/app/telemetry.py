@@ -0,0 +1,250 @@
+"""Request and data-layer instrumentation for the backend.
+
+Metrics live in the default prometheus_client registry and are served on
+/metrics. Operations slower than the configured thresholds are written to
+the "app.slow" logger and kept in a bounded buffer for /metrics/slow.
+"""
+
+import functools
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+slow_logger = logging.getLogger("app.slow")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+
+# HTTP
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["method"],
+)
+
+# Data layer
+DB_LATENCY = Histogram(
+    "db_operation_duration_seconds",
+    "Storage operation latency",
+    ["operation"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_ROWS = Histogram(
+    "db_operation_rows",
+    "Rows returned by a storage operation",
+    ["operation"],
+    buckets=ROW_BUCKETS,
+)
+DB_PAYLOAD_BYTES = Histogram(
+    "db_operation_payload_bytes",
+    "Approximate serialized size of a storage operation result",
+    ["operation"],
+    buckets=SIZE_BUCKETS,
+)
+DB_ERRORS = Counter(
+    "db_operation_errors_total",
+    "Storage operations that raised",
+    ["operation"],
+)
+
+# Analysis stages (fetch / graph build / scoring)
+STAGE_LATENCY = Histogram(
+    "analysis_stage_duration_seconds",
+    "Latency of individual analysis stages",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Analysis process pool
+ANALYSIS_JOBS = Counter(
+    "analysis_jobs_total",
+    "Analysis jobs by operation and outcome (inline, ok, error, timeout, cancelled, busy)",
+    ["operation", "outcome"],
+)
+ANALYSIS_JOBS_WAITING = Gauge(
+    "analysis_jobs_waiting",
+    "Analysis jobs waiting for a pool worker",
+)
+
+# Request coalescing
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total",
+    "Coalesced calls by group; followers shared a leader's in-flight call",
+    ["group", "role"],
+)
+
+# Idempotent requests: new runs, retries attached to a running one, and
+# retries answered from stored results
+IDEMPOTENT_REQUESTS = Counter(
+    "idempotent_requests_total",
+    "Requests carrying an idempotency key by outcome (new, attached, replayed)",
+    ["outcome"],
+)
+
+# Chat write-behind buffer
+CHAT_MESSAGES_PENDING = Gauge(
+    "chat_messages_pending",
+    "Chat messages accepted but not yet written to storage",
+)
+CHAT_FLUSHES = Counter(
+    "chat_flushes_total",
+    "Chat message batch writes by outcome (ok, error, dropped)",
+    ["outcome"],
+)
+
+MAX_SLOW_OPERATIONS = 500
+
+_slow_operations: Deque[Dict[str, Any]] = deque(maxlen=MAX_SLOW_OPERATIONS)
+
+
+def record_slow(kind: str, name: str, duration_ms: float, **details: Any) -> None:
+    """Log an operation to the slow-operation log"""
+    entry = {
+        "kind": kind,
+        "name": name,
+        "duration_ms": round(duration_ms, 2),
+        "at": time.time(),
+        **details,
+    }
+    _slow_operations.append(entry)
+    slow_logger.warning("slow %s %s %.1fms %s", kind, name, duration_ms, details)
+
+
+def slow_operations(limit: int = 100) -> List[Dict[str, Any]]:
+    """Most recent slow operations, newest first"""
+    return list(reversed(_slow_operations))[:limit]
+
+
+def _row_count(result: Any) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, int) and not isinstance(result, bool):
+        return result
+    return 1
+
+
+def _payload_size(result: Any) -> int:
+    """Approximate JSON size of a result. Lists are sized from their first
+    item times their length, so a large result costs one row to measure
+    instead of being serialized again on the event loop."""
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        if not result:
+            return 2
+        return 2 + (_payload_size(result[0]) + 1) * len(result)
+    if isinstance(result, dict):
+        return 2 + sum(
+            len(str(key)) + 4 + _payload_size(value) for key, value in result.items()
+        )
+    return len(json.dumps(result, default=str))
+
+
+def instrumented(operation: str) -> Callable:
+    """Wrap an async storage method with timing, row and payload metrics"""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                DB_ERRORS.labels(operation).inc()
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                DB_LATENCY.labels(operation).observe(elapsed)
+
+            rows = _row_count(result)
+            payload = _payload_size(result)
+            DB_ROWS.labels(operation).observe(rows)
+            DB_PAYLOAD_BYTES.labels(operation).observe(payload)
+
+            if elapsed * 1000 >= settings.SLOW_OPERATION_MS:
+                record_slow(
+                    "db", operation, elapsed * 1000, rows=rows, payload_bytes=payload
+                )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time one stage of a request (e.g. analysis fetch / build / score)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_LATENCY.labels(stage).observe(elapsed)
+        if elapsed * 1000 >= settings.SLOW_OPERATION_MS:
+            record_slow("stage", stage, elapsed * 1000)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests.
+
+    Routes are labelled by their path template (e.g. /api/nodes/{node_id}),
+    rebuilt from the matched path parameters, so label cardinality stays
+    bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def _route_template(scope: Scope) -> str:
+        if "endpoint" not in scope:
+            return "unmatched"
+        path = scope["path"]
+        for name, value in scope.get("path_params", {}).items():
+            path = path.replace(f"/{value}", f"/{{{name}}}", 1)
+        return path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            route = self._route_template(scope)
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(elapsed)
+            if elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                record_slow("http", f"{method} {route}", elapsed * 1000, status=status)
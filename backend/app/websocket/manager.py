@@ -1,5 +1,5 @@
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Any, Dict, List
 import json
 
 
@@ -64,3 +64,38 @@ class ConnectionManager:
     async def broadcast_chat_message(self, project_id: str, message: dict):
         """Broadcast a new chat message"""
         await self.broadcast(project_id, {"type": "chat_message", "message": message})
+
+    async def broadcast_revision(self, events: List[Dict[str, Any]]):
+        """Storage change listener: announce the new project revision with one
+        message per project and operation, so that clients can fetch the
+        diff from /api/projects/{id}/changes"""
+        by_project: Dict[str, List[Dict[str, Any]]] = {}
+        for event in events:
+            if event["revision"] is not None:
+                by_project.setdefault(event["project_id"], []).append(event)
+
+        for project_id, project_events in by_project.items():
+            await self.broadcast(
+                project_id,
+                {
+                    "type": "revision",
+                    "revision": max(e["revision"] for e in project_events),
+                    "changes": [
+                        {"entity": e["entity"], "op": e["op"], "id": e["id"]}
+                        for e in project_events
+                    ],
+                },
+            )
+
+    async def broadcast_risk_scores(
+        self, project_id: str, risk_score: int, node_scores: Dict[str, int]
+    ):
+        """Broadcast the project risk score and the node scores that changed"""
+        await self.broadcast(
+            project_id,
+            {"type": "risk_scores", "risk_score": risk_score, "node_scores": node_scores},
+        )
+
+
+# Singleton instance
+manager = ConnectionManager()
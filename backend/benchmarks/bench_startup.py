@@ -0,0 +1,97 @@
+"""Startup benchmark for the backend.
+
+Measures, in fresh interpreters, how long `import app.main` takes and how
+long until lifespan startup finishes (storage client connected, /ready
+passing), plus the slowest top-level imports from -X importtime.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.bench_startup --repeat 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+CHILD = """
+import asyncio, json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def warm_up():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(warm_up())
+print(json.dumps({"import_s": imported - start, "ready_s": ready - start}))
+"""
+
+
+def parse_importtime(stderr: str, top: int) -> List[Dict[str, Any]]:
+    """Slowest top-level imports (cumulative) from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if name.startswith("  ") or not cumulative.strip().isdigit():
+            continue
+        modules.append({"module": name.strip(), "cumulative_ms": int(cumulative) / 1000})
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return modules[:top]
+
+
+def run_once(env: Dict[str, str]) -> Dict[str, Any]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["slowest_imports"] = parse_importtime(result.stderr, 10)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--storage", default="sqlite", help="STORAGE_BACKEND to start (default: sqlite)"
+    )
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    env = {**os.environ, "STORAGE_BACKEND": args.storage}
+    if args.storage == "sqlite":
+        env.setdefault("SQLITE_PATH", ":memory:")
+    runs = [run_once(env) for _ in range(args.repeat)]
+
+    results = {
+        "benchmark": "backend.startup",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "storage": args.storage,
+        "repeat": args.repeat,
+        "import_s": statistics.median(r["import_s"] for r in runs),
+        "ready_s": statistics.median(r["ready_s"] for r in runs),
+        "slowest_imports": runs[-1]["slowest_imports"],
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""HTTP and WebSocket load test for the backend.
+
+Drives a realistic mix of canvas traffic against the FastAPI app: node CRUD,
+project graph reads, impact analysis, chat messages and WebSocket broadcast
+storms on /ws/{project_id}. Reports per-endpoint throughput, p50/p95/p99
+latency and error rate as JSON.
+
+By default it starts the backend in-process on a local port with the SQLite
+storage backend (in memory) and a mock agents service, so no network
+services are needed. Pass --base-url to target an already running backend.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.loadtest --users 50 --duration 30 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+# Relative weights of each virtual-user action
+ACTION_WEIGHTS = {
+    "create_node": 10,
+    "update_node": 30,
+    "get_node": 10,
+    "delete_node": 4,
+    "create_edge": 8,
+    "get_project_nodes": 15,
+    "get_project_edges": 10,
+    "impact": 10,
+    "chat": 3,
+}
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+@dataclass
+class EndpointStats:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        total = len(self.latencies_ms)
+        return {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(_percentile(self.latencies_ms, 50), 2),
+            "p95_ms": round(_percentile(self.latencies_ms, 95), 2),
+            "p99_ms": round(_percentile(self.latencies_ms, 99), 2),
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+        }
+
+
+class Stats:
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, name: str, latency_ms: float, ok: bool) -> None:
+        stats = self.endpoints.setdefault(name, EndpointStats())
+        stats.latencies_ms.append(latency_ms)
+        if not ok:
+            stats.errors += 1
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            name: stats.summary(elapsed)
+            for name, stats in sorted(self.endpoints.items())
+        }
+
+
+@dataclass
+class ProjectFixture:
+    id: str
+    node_ids: List[str] = field(default_factory=list)
+
+
+async def _request(
+    client: httpx.AsyncClient,
+    stats: Optional[Stats],
+    name: str,
+    method: str,
+    url: str,
+    **kwargs: Any,
+) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response, ok = None, False
+    if stats is not None:
+        stats.record(name, (time.perf_counter() - start) * 1000, ok)
+    return response if ok else None
+
+
+# Local stand-in servers
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(app_path: str, port: int) -> Any:
+    import uvicorn
+
+    server = uvicorn.Server(
+        uvicorn.Config(app_path, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"Failed to start {app_path}")
+        time.sleep(0.05)
+    return server
+
+
+def start_local_stack(sqlite_path: str) -> Dict[str, Any]:
+    """Start the mock agents service and the backend on free local ports"""
+    agents_port = _free_port()
+    backend_port = _free_port()
+
+    # Must be set before app.config is imported by the backend server
+    os.environ["STORAGE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_PATH"] = sqlite_path
+    os.environ["AGENTS_URL"] = f"http://127.0.0.1:{agents_port}"
+
+    agents = _start_server("benchmarks.mock_agents:app", agents_port)
+    backend = _start_server("app.main:app", backend_port)
+    return {
+        "base_url": f"http://127.0.0.1:{backend_port}",
+        "servers": [backend, agents],
+    }
+
+
+# Scenario
+
+
+async def seed(
+    client: httpx.AsyncClient, projects: int, nodes_per_project: int, rng: random.Random
+) -> List[ProjectFixture]:
+    """Create projects with a random DAG of nodes and edges"""
+    fixtures = []
+    for i in range(projects):
+        response = await _request(
+            client, None, "seed", "POST", "/api/projects/", json={"name": f"load-{i}"}
+        )
+        if response is None:
+            raise RuntimeError("Failed to seed projects")
+        fixture = ProjectFixture(id=response.json()["id"])
+
+        for n in range(nodes_per_project):
+            response = await _request(
+                client,
+                None,
+                "seed",
+                "POST",
+                "/api/nodes/",
+                json={
+                    "project_id": fixture.id,
+                    "type": rng.choice(["action", "function", "data"]),
+                    "label": f"node-{n}",
+                    "position_x": rng.uniform(0, 5000),
+                    "position_y": rng.uniform(0, 5000),
+                },
+            )
+            if response is not None:
+                fixture.node_ids.append(response.json()["id"])
+
+        # Forward edges only, so the seeded graph is a DAG
+        for n in range(1, len(fixture.node_ids)):
+            source = fixture.node_ids[rng.randrange(n)]
+            await _request(
+                client,
+                None,
+                "seed",
+                "POST",
+                "/api/nodes/edges",
+                json={
+                    "project_id": fixture.id,
+                    "source_id": source,
+                    "target_id": fixture.node_ids[n],
+                },
+            )
+        fixtures.append(fixture)
+    return fixtures
+
+
+async def virtual_user(
+    client: httpx.AsyncClient,
+    stats: Stats,
+    projects: List[ProjectFixture],
+    deadline: float,
+    rng: random.Random,
+    include_chat: bool,
+) -> None:
+    actions = [a for a in ACTION_WEIGHTS if include_chat or a != "chat"]
+    weights = [ACTION_WEIGHTS[a] for a in actions]
+
+    while time.perf_counter() < deadline:
+        project = rng.choice(projects)
+        action = rng.choices(actions, weights)[0]
+        node_id = rng.choice(project.node_ids) if project.node_ids else None
+
+        if action == "create_node" or node_id is None:
+            response = await _request(
+                client,
+                stats,
+                "POST /api/nodes",
+                "POST",
+                "/api/nodes/",
+                json={
+                    "project_id": project.id,
+                    "type": "action",
+                    "label": "load node",
+                    "position_x": rng.uniform(0, 5000),
+                    "position_y": rng.uniform(0, 5000),
+                },
+            )
+            if response is not None:
+                project.node_ids.append(response.json()["id"])
+        elif action == "update_node":
+            await _request(
+                client,
+                stats,
+                "PUT /api/nodes/{node_id}",
+                "PUT",
+                f"/api/nodes/{node_id}",
+                json={
+                    "position_x": rng.uniform(0, 5000),
+                    "position_y": rng.uniform(0, 5000),
+                },
+            )
+        elif action == "get_node":
+            await _request(
+                client, stats, "GET /api/nodes/{node_id}", "GET", f"/api/nodes/{node_id}"
+            )
+        elif action == "delete_node":
+            # Keep projects from draining under a long run
+            if len(project.node_ids) <= 10:
+                continue
+            project.node_ids.remove(node_id)
+            await _request(
+                client,
+                stats,
+                "DELETE /api/nodes/{node_id}",
+                "DELETE",
+                f"/api/nodes/{node_id}",
+            )
+        elif action == "create_edge":
+            if len(project.node_ids) < 2:
+                continue
+            source, target = rng.sample(project.node_ids, 2)
+            await _request(
+                client,
+                stats,
+                "POST /api/nodes/edges",
+                "POST",
+                "/api/nodes/edges",
+                json={
+                    "project_id": project.id,
+                    "source_id": source,
+                    "target_id": target,
+                },
+            )
+        elif action == "get_project_nodes":
+            await _request(
+                client,
+                stats,
+                "GET /api/projects/{project_id}/nodes",
+                "GET",
+                f"/api/projects/{project.id}/nodes",
+            )
+        elif action == "get_project_edges":
+            await _request(
+                client,
+                stats,
+                "GET /api/projects/{project_id}/edges",
+                "GET",
+                f"/api/projects/{project.id}/edges",
+            )
+        elif action == "impact":
+            await _request(
+                client,
+                stats,
+                "POST /api/analysis/impact",
+                "POST",
+                "/api/analysis/impact",
+                json={"project_id": project.id, "node_id": node_id},
+            )
+        elif action == "chat":
+            await _request(
+                client,
+                stats,
+                "POST /api/chat/message",
+                "POST",
+                "/api/chat/message",
+                json={
+                    "project_id": project.id,
+                    "role": "user",
+                    "content": "로그인 기능 추가해줘",
+                },
+            )
+
+
+async def websocket_storm(
+    base_url: str, project_id: str, clients: int, messages: int, timeout: float
+) -> Dict[str, Any]:
+    """One sender floods /ws/{project_id}; every client measures delivery latency"""
+    import websockets
+
+    ws_url = base_url.replace("http", "ws", 1) + f"/ws/{project_id}"
+    latencies: List[float] = []
+    expected = clients * messages
+
+    connections = [await websockets.connect(ws_url) for _ in range(clients)]
+
+    async def receive(conn: Any) -> None:
+        received = 0
+        while received < messages:
+            data = json.loads(await conn.recv())
+            if data.get("type") != "loadtest":
+                continue
+            latencies.append((time.time() - data["sent_at"]) * 1000)
+            received += 1
+
+    receivers = [asyncio.create_task(receive(conn)) for conn in connections]
+
+    start = time.perf_counter()
+    for i in range(messages):
+        await connections[0].send(
+            json.dumps({"type": "loadtest", "seq": i, "sent_at": time.time()})
+        )
+    done, pending = await asyncio.wait(receivers, timeout=timeout)
+    elapsed = time.perf_counter() - start
+    for task in pending:
+        task.cancel()
+    for conn in connections:
+        await conn.close()
+
+    return {
+        "clients": clients,
+        "messages_sent": messages,
+        "deliveries_expected": expected,
+        "deliveries": len(latencies),
+        "deliveries_per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "loss_rate": round(1 - len(latencies) / expected, 4) if expected else 0.0,
+    }
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        projects = await seed(client, args.projects, args.nodes, rng)
+
+        deadline = time.perf_counter() + args.duration
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                virtual_user(
+                    client,
+                    stats,
+                    projects,
+                    deadline,
+                    random.Random(rng.random()),
+                    not args.no_chat,
+                )
+                for _ in range(args.users)
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    websocket = None
+    if args.ws_clients:
+        websocket = await websocket_storm(
+            base_url, projects[0].id, args.ws_clients, args.ws_messages, args.timeout
+        )
+
+    all_latencies = [l for s in stats.endpoints.values() for l in s.latencies_ms]
+    all_errors = sum(s.errors for s in stats.endpoints.values())
+    return {
+        "duration_s": round(elapsed, 2),
+        "total": {
+            "requests": len(all_latencies),
+            "throughput_rps": round(len(all_latencies) / elapsed, 2),
+            "p50_ms": round(_percentile(all_latencies, 50), 2),
+            "p95_ms": round(_percentile(all_latencies, 95), 2),
+            "p99_ms": round(_percentile(all_latencies, 99), 2),
+            "error_rate": round(all_errors / len(all_latencies), 4)
+            if all_latencies
+            else 0.0,
+        },
+        "endpoints": stats.report(elapsed),
+        "websocket": websocket,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="Target a running backend instead")
+    parser.add_argument("--sqlite-path", default=":memory:")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--nodes", type=int, default=200)
+    parser.add_argument("--ws-clients", type=int, default=50)
+    parser.add_argument("--ws-messages", type=int, default=100)
+    parser.add_argument("--no-chat", action="store_true")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    stack = None
+    base_url = args.base_url
+    if not base_url:
+        stack = start_local_stack(args.sqlite_path)
+        base_url = stack["base_url"]
+
+    try:
+        results = {
+            "benchmark": "backend.load",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "target": "local" if stack else base_url,
+            "config": {
+                "users": args.users,
+                "duration_s": args.duration,
+                "projects": args.projects,
+                "nodes_per_project": args.nodes,
+                "ws_clients": args.ws_clients,
+                "ws_messages": args.ws_messages,
+                "mix": ACTION_WEIGHTS,
+            },
+            **asyncio.run(run(args, base_url)),
+        }
+    finally:
+        if stack:
+            for server in stack["servers"]:
+                server.should_exit = True
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
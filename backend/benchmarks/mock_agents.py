@@ -0,0 +1,37 @@
+"""Mock agents service for load tests.
+
+Implements /api/chat with a canned PM response and a configurable delay, so
+backend load tests do not depend on LLM capacity.
+"""
+
+import asyncio
+import os
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+MOCK_AGENT_LATENCY_MS = float(os.getenv("MOCK_AGENT_LATENCY_MS", "50"))
+
+app = FastAPI(title="AI-Sync OpenDev Mock Agents")
+
+
+class ChatRequest(BaseModel):
+    project_id: str
+    message: str
+    project_context: dict = {}
+
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy", "service": "mock-agents"}
+
+
+@app.post("/api/chat")
+async def chat(request: ChatRequest):
+    await asyncio.sleep(MOCK_AGENT_LATENCY_MS / 1000)
+    return {
+        "content": f'요청을 확인했습니다: "{request.message[:50]}"',
+        "agent_type": "pm",
+        "workflow_stage": "idle",
+        "risk_score": 0,
+    }
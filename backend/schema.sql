@@ -61,6 +61,273 @@ CREATE TABLE IF NOT EXISTS chat_messages (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Rolling conversation summary per project, refreshed after every agent run
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    project_id UUID PRIMARY KEY REFERENCES projects(id) ON DELETE CASCADE,
+    data JSONB NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Per-project revision and append-only change log (incremental canvas sync)
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS revision BIGINT DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS project_changes (
+    project_id UUID REFERENCES projects(id) ON DELETE CASCADE,
+    revision BIGINT NOT NULL,
+    entity TEXT NOT NULL,
+    op TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    data JSONB,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (project_id, revision)
+);
+CREATE INDEX IF NOT EXISTS idx_project_changes_entity_id ON project_changes(entity_id);
+
+-- Revision of each node/edge row's last logged change. Writes return it, so
+-- change events carry the revision their change was logged under.
+ALTER TABLE nodes ADD COLUMN IF NOT EXISTS revision BIGINT;
+ALTER TABLE edges ADD COLUMN IF NOT EXISTS revision BIGINT;
+
+-- Bumps the project revision by the number of changes, appends them under
+-- consecutive revisions and prunes entries older than p_retention revisions
+-- (deletes, which have no row left to carry their revision).
+-- p_changes is a JSON array of {entity, op, entity_id, data}. Returns the new
+-- revision (NULL if the project no longer exists).
+CREATE OR REPLACE FUNCTION record_project_changes(
+    p_project_id UUID,
+    p_changes JSONB,
+    p_retention BIGINT
+)
+RETURNS BIGINT AS $$
+DECLARE
+    change_count BIGINT := jsonb_array_length(p_changes);
+    new_revision BIGINT;
+BEGIN
+    UPDATE projects SET revision = revision + change_count
+    WHERE id = p_project_id
+    RETURNING revision INTO new_revision;
+
+    IF new_revision IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO project_changes (project_id, revision, entity, op, entity_id, data)
+    SELECT
+        p_project_id,
+        new_revision - change_count + c.ordinality,
+        c.value->>'entity',
+        c.value->>'op',
+        (c.value->>'entity_id')::UUID,
+        NULLIF(c.value->'data', 'null'::JSONB)
+    FROM jsonb_array_elements(p_changes) WITH ORDINALITY AS c;
+
+    DELETE FROM project_changes
+    WHERE project_id = p_project_id AND revision <= new_revision - p_retention;
+
+    RETURN new_revision;
+END;
+$$ language 'plpgsql';
+
+-- Change-log triggers: node/edge writes and project edits are logged in the
+-- transaction of the write itself, so a committed change is never missing
+-- from the log. The revision bump locks the project row until commit, so
+-- concurrent writers get revisions in commit order. Retention is the
+-- app.change_log_retention setting (default 5000, like CHANGE_LOG_RETENTION):
+--   ALTER DATABASE postgres SET app.change_log_retention = '5000';
+CREATE OR REPLACE FUNCTION change_log_retention()
+RETURNS BIGINT AS $$
+    SELECT COALESCE(NULLIF(current_setting('app.change_log_retention', true), '')::BIGINT, 5000);
+$$ language 'sql' STABLE;
+
+-- Row-level, before node/edge inserts and updates: takes the project's next
+-- revision for the row.
+CREATE OR REPLACE FUNCTION stamp_revision()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.project_id IS NOT NULL THEN
+        UPDATE projects SET revision = revision + 1
+        WHERE id = NEW.project_id
+        RETURNING revision INTO NEW.revision;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Statement-level: logs inserted/updated rows under their stamped revision,
+-- deleted rows with one revision bump per project and statement.
+-- TG_ARGV[0] is the entity name; changed_rows is the transition table.
+CREATE OR REPLACE FUNCTION log_project_changes()
+RETURNS TRIGGER AS $$
+DECLARE
+    change_op TEXT := CASE TG_OP
+        WHEN 'INSERT' THEN 'create'
+        WHEN 'UPDATE' THEN 'update'
+        ELSE 'delete'
+    END;
+    project RECORD;
+BEGIN
+    IF TG_OP <> 'DELETE' THEN
+        INSERT INTO project_changes (project_id, revision, entity, op, entity_id, data)
+        SELECT c.project_id, c.revision, TG_ARGV[0], change_op, c.id, to_jsonb(c)
+        FROM changed_rows c
+        WHERE c.revision IS NOT NULL;
+
+        DELETE FROM project_changes p
+        USING (
+            SELECT c.project_id, MAX(c.revision) AS revision
+            FROM changed_rows c
+            WHERE c.revision IS NOT NULL
+            GROUP BY c.project_id
+        ) latest
+        WHERE p.project_id = latest.project_id
+            AND p.revision <= latest.revision - change_log_retention();
+        RETURN NULL;
+    END IF;
+
+    FOR project IN
+        SELECT
+            c.project_id,
+            jsonb_agg(
+                jsonb_build_object(
+                    'entity', TG_ARGV[0],
+                    'op', change_op,
+                    'entity_id', c.id,
+                    'data', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE to_jsonb(c) END
+                )
+                ORDER BY c.id
+            ) AS changes
+        FROM changed_rows c
+        WHERE c.project_id IS NOT NULL
+        GROUP BY c.project_id
+        ORDER BY c.project_id
+    LOOP
+        PERFORM record_project_changes(project.project_id, project.changes, change_log_retention());
+    END LOOP;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Project edits: the revision is taken before the update, so the updated
+-- row returns it, and the change is logged after it
+CREATE OR REPLACE FUNCTION stamp_project_revision()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.revision := OLD.revision + 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION log_project_update()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO project_changes (project_id, revision, entity, op, entity_id, data)
+    VALUES (NEW.id, NEW.revision, 'project', 'update', NEW.id, to_jsonb(NEW));
+    DELETE FROM project_changes
+    WHERE project_id = NEW.id AND revision <= NEW.revision - change_log_retention();
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS stamp_node_revision ON nodes;
+CREATE TRIGGER stamp_node_revision BEFORE INSERT OR UPDATE ON nodes
+    FOR EACH ROW EXECUTE FUNCTION stamp_revision();
+DROP TRIGGER IF EXISTS stamp_edge_revision ON edges;
+CREATE TRIGGER stamp_edge_revision BEFORE INSERT OR UPDATE ON edges
+    FOR EACH ROW EXECUTE FUNCTION stamp_revision();
+
+DROP TRIGGER IF EXISTS log_node_inserts ON nodes;
+CREATE TRIGGER log_node_inserts AFTER INSERT ON nodes
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_project_changes('node');
+DROP TRIGGER IF EXISTS log_node_updates ON nodes;
+CREATE TRIGGER log_node_updates AFTER UPDATE ON nodes
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_project_changes('node');
+DROP TRIGGER IF EXISTS log_node_deletes ON nodes;
+CREATE TRIGGER log_node_deletes AFTER DELETE ON nodes
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_project_changes('node');
+DROP TRIGGER IF EXISTS log_edge_inserts ON edges;
+CREATE TRIGGER log_edge_inserts AFTER INSERT ON edges
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_project_changes('edge');
+DROP TRIGGER IF EXISTS log_edge_updates ON edges;
+CREATE TRIGGER log_edge_updates AFTER UPDATE ON edges
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_project_changes('edge');
+DROP TRIGGER IF EXISTS log_edge_deletes ON edges;
+CREATE TRIGGER log_edge_deletes AFTER DELETE ON edges
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION log_project_changes('edge');
+
+-- Only edits of the project itself; revision and risk_score updates are not logged
+DROP TRIGGER IF EXISTS stamp_project_updates ON projects;
+CREATE TRIGGER stamp_project_updates BEFORE UPDATE OF name, description, version ON projects
+    FOR EACH ROW
+    WHEN (
+        OLD.name IS DISTINCT FROM NEW.name
+        OR OLD.description IS DISTINCT FROM NEW.description
+        OR OLD.version IS DISTINCT FROM NEW.version
+    )
+    EXECUTE FUNCTION stamp_project_revision();
+DROP TRIGGER IF EXISTS log_project_updates ON projects;
+CREATE TRIGGER log_project_updates AFTER UPDATE OF name, description, version ON projects
+    FOR EACH ROW
+    WHEN (
+        OLD.name IS DISTINCT FROM NEW.name
+        OR OLD.description IS DISTINCT FROM NEW.description
+        OR OLD.version IS DISTINCT FROM NEW.version
+    )
+    EXECUTE FUNCTION log_project_update();
+
+-- Deletes nodes together with every edge attached to them. Returns one row
+-- per removed edge and node, with the revision its delete was logged under.
+CREATE OR REPLACE FUNCTION delete_nodes_cascade(p_node_ids UUID[])
+RETURNS TABLE (entity TEXT, id UUID, project_id UUID, revision BIGINT) AS $$
+#variable_conflict use_column
+DECLARE
+    edge_ids UUID[];
+    edge_projects UUID[];
+    node_ids UUID[];
+    node_projects UUID[];
+BEGIN
+    WITH removed AS (
+        DELETE FROM edges e
+        WHERE e.source_id = ANY(p_node_ids) OR e.target_id = ANY(p_node_ids)
+        RETURNING e.id, e.project_id
+    )
+    SELECT array_agg(removed.id), array_agg(removed.project_id)
+    INTO edge_ids, edge_projects
+    FROM removed;
+
+    WITH removed AS (
+        DELETE FROM nodes n
+        WHERE n.id = ANY(p_node_ids)
+        RETURNING n.id, n.project_id
+    )
+    SELECT array_agg(removed.id), array_agg(removed.project_id)
+    INTO node_ids, node_projects
+    FROM removed;
+
+    -- The delete triggers ran at the end of each statement above
+    RETURN QUERY
+    SELECT r.entity, r.id, r.project_id, c.revision
+    FROM (
+        SELECT 'edge'::TEXT AS entity, u.id, u.project_id
+        FROM unnest(edge_ids, edge_projects) AS u(id, project_id)
+        UNION ALL
+        SELECT 'node'::TEXT, u.id, u.project_id
+        FROM unnest(node_ids, node_projects) AS u(id, project_id)
+    ) r
+    LEFT JOIN project_changes c
+        ON c.project_id = r.project_id
+        AND c.entity = r.entity
+        AND c.op = 'delete'
+        AND c.entity_id = r.id
+    ORDER BY c.revision;
+END;
+$$ language 'plpgsql';
+
 -- Create indexes for better query performance
 CREATE INDEX IF NOT EXISTS idx_nodes_project_id ON nodes(project_id);
 CREATE INDEX IF NOT EXISTS idx_edges_project_id ON edges(project_id);
@@ -68,6 +335,8 @@ CREATE INDEX IF NOT EXISTS idx_edges_source_id ON edges(source_id);
 CREATE INDEX IF NOT EXISTS idx_edges_target_id ON edges(target_id);
 CREATE INDEX IF NOT EXISTS idx_chat_messages_project_id ON chat_messages(project_id);
 CREATE INDEX IF NOT EXISTS idx_decision_logs_project_id ON decision_logs(project_id);
+CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at);
+CREATE INDEX IF NOT EXISTS idx_chat_messages_project_created ON chat_messages(project_id, created_at);
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()